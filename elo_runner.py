@@ -1,55 +1,121 @@
+import argparse
+import os
 import time
 import pandas as pd
-import datetime
 from src.consts import ESPNSportTypes, ELO_HYPERPARAMETERS, START_SEASONS
-from src.elo import EloRunner, ELO_SCHEMA
-from src.utils import put_dataframe, get_dataframe, get_seasons_to_update
-from src.sport import ESPNSport
+from src.elo import EloRunner, ELO_ARROW_SCHEMA
+from src.utils import put_dataframe, get_dataframe, table_to_dataframe, get_seasons_to_update, run_sport_jobs, print_status_report
+from src.team_registry import TeamRegistry
+from src.checkpoint import EloCheckpoint
+from src.manifest import Manifest, hash_object
+from src.rating_index import RatingIndex
 
 
-def get_active_sports():
+def get_elo_fingerprint(manifest: Manifest, event_root_path: str, sport: ESPNSportTypes, season: int, previous_elos: dict) -> str:
     """
-    Get a list of active ESPN sports based on their current status.
+    Fingerprint of the inputs of a season of Elo ratings: its events file, the hyperparameters and the ratings
+    carried in from the previous season.
+
+    Args:
+        manifest (Manifest): Elo stage manifest of the sport.
+        event_root_path (str): Root path for event data.
+        sport (ESPNSportTypes): Type of sport.
+        season (int): Season year.
+        previous_elos (dict): Ratings carried into the season.
+
+    Returns:
+        str: Input fingerprint.
+    """
+    return manifest.fingerprint([f'{event_root_path}/{sport.value}/{season}.parquet'], {
+        'k': ELO_HYPERPARAMETERS[sport]['k'],
+        'hfa': ELO_HYPERPARAMETERS[sport]['hfa'],
+        'width': 800,
+        'mean_elo': 1505,
+        'preloaded_elos': ELO_HYPERPARAMETERS[sport]['preloaded_elos'] if season == START_SEASONS[sport] else None,
+        'previous_elos': hash_object(previous_elos),
+    })
+
+
+def build_missing_rating_index(elo_root_path: str, rating_root_path: str, sport: ESPNSportTypes, season: int):
+    """
+    Build the rating index of a skipped season from its stored Elo ratings if it has never been written.
+
+    Args:
+        elo_root_path (str): Root path for Elo data.
+        rating_root_path (str): Root path for the point in time rating index.
+        sport (ESPNSportTypes): Type of sport.
+        season (int): Season year.
+    """
+    if not os.path.exists(f'{rating_root_path}/{sport.value}/{season}.parquet'):
+        RatingIndex.write_season(rating_root_path, sport, season, get_dataframe(f'{elo_root_path}/{sport.value}/{season}.parquet'))
+
+
+def get_event_dataframe(event_root_path: str, sport: ESPNSportTypes, season: int, event_tables: dict = None) -> pd.DataFrame:
+    """
+    Get the events of a season, from memory if the events stage handed its table on, else from disk.
+
+    Args:
+        event_root_path (str): Root path for event data.
+        sport (ESPNSportTypes): Type of sport.
+        season (int): Season year.
+        event_tables (dict): Events tables by season (default is None to read from disk).
 
     Returns:
-        List: List of active sports.
+        pd.DataFrame: Events of the season.
     """
-    espn_sports = []
-    for sport in ESPNSportTypes:
-        sport_api = ESPNSport(sport)
-        espn_sports.append(sport_api)
-    return [espn_sport.sport for espn_sport in espn_sports if espn_sport.is_active and espn_sport.sport != ESPNSportTypes.SOCCER_EPL]
+    if event_tables is not None and season in event_tables:
+        return table_to_dataframe(event_tables[season])
+    return get_dataframe(f'{event_root_path}/{sport.value}/{season}.parquet')
 
 
-def run_elo_for_sport(event_root_path: str, elo_root_path: str, sport: ESPNSportTypes):
+def run_elo_for_sport(event_root_path: str, elo_root_path: str, sport: ESPNSportTypes, registry_root_path: str = './data/teams', checkpoint_root_path: str = './data/checkpoints', manifest_root_path: str = './data/manifests', rating_root_path: str = './data/ratings', force: bool = False, event_tables: dict = None, elo_tables: dict = None):
     """
-    Run Elo calculations for a specific sport and update Elo ratings.
+    Run Elo calculations for a specific sport and update Elo ratings. Seasons whose inputs are identical to the
+    last run are skipped.
 
     Args:
         event_root_path (str): Root path for event data.
         elo_root_path (str): Root path for Elo data.
         sport (ESPNSportTypes): Type of sport.
+        registry_root_path (str): Root path for the team index registry.
+        checkpoint_root_path (str): Root path for end of season rating checkpoints.
+        manifest_root_path (str): Root path for the stage manifests.
+        rating_root_path (str): Root path for the point in time rating index.
+        force (bool): Rerun seasons even if their inputs are unchanged (default is False).
+        event_tables (dict): Events tables by season kept in memory by the events stage, read instead of the
+            stored files (default is None).
+        elo_tables (dict): Filled with the written Elo table of every rated season, keyed by season (default is
+            None).
 
     Returns:
-        None
+        dict: Number of skipped and processed seasons.
     """
     seasons = get_seasons_to_update(elo_root_path, sport)
+    registry = TeamRegistry.load(registry_root_path, sport)
+    checkpoint = EloCheckpoint.load(checkpoint_root_path, sport)
+    manifest = Manifest.load(manifest_root_path, 'elo', sport)
+    skipped = 0
+    processed = 0
     print(f'Starting Runner for {sport.value} ({seasons[0]}-{seasons[-1]})...')
     for season in seasons:
         if (season == 2005 and sport == ESPNSportTypes.NHL) or (season == 2024 and sport == ESPNSportTypes.PLL):
             continue
+        # Carry ratings in from the checkpoint instead of re-reading every previous season.
+        # Only seasons missing from the checkpoint are read (once) to backfill it.
+        checkpoint.bootstrap(elo_root_path, sport, season - 1)
+        previous_elos = checkpoint.get_previous_elos(season)
+
+        fingerprint = get_elo_fingerprint(manifest, event_root_path, sport, season, previous_elos)
+        if not force and manifest.is_unchanged(str(season), fingerprint):
+            print(f'Skipping Elo for {sport.value} - {season} (inputs unchanged)')
+            checkpoint.bootstrap(elo_root_path, sport, season)
+            build_missing_rating_index(elo_root_path, rating_root_path, sport, season)
+            skipped = skipped + 1
+            continue
         print(f'Making Elo for {sport.value} - {season}')
-        try:
-            prev_elo_df = pd.concat([get_dataframe(f'{elo_root_path}/{sport.value}/{elo_season}.parquet') for elo_season in list(range(START_SEASONS[sport], season))])
-            elo_cols = ['str_event_id', 'season', 'date', 'neutral_site', 'home_team_id', 'home_team_score', 'away_team_id', 'away_team_score', 'home_elo_pre', 'away_elo_pre', 'home_elo_prob', 'away_elo_prob', 'home_elo_post', 'away_elo_post']
-        except Exception as e:
-            prev_elo_df = pd.DataFrame()
-            elo_cols = ['str_event_id', 'season', 'date', 'neutral_site', 'home_team_id', 'home_team_score', 'away_team_id', 'away_team_score']
-
-        df = pd.concat([
-            prev_elo_df,
-            get_dataframe(f'{event_root_path}/{sport.value}/{season}.parquet')
-        ])
+
+        df = get_event_dataframe(event_root_path, sport, season, event_tables)
+        elo_cols = ['str_event_id', 'season', 'date', 'neutral_site', 'home_team_id', 'home_team_score', 'away_team_id', 'away_team_score']
 
         er = EloRunner(
             df=df[elo_cols].rename(columns={'home_team_id': 'home_team_name', 'away_team_id': 'away_team_name'}),
@@ -58,52 +124,157 @@ def run_elo_for_sport(event_root_path: str, elo_root_path: str, sport: ESPNSport
             mean_elo=1505,
             home_field_advantage=ELO_HYPERPARAMETERS[sport]['hfa'],
             width=800,
-            preloaded_elos=ELO_HYPERPARAMETERS[sport]['preloaded_elos'] if season == START_SEASONS[sport] else None
+            preloaded_elos=ELO_HYPERPARAMETERS[sport]['preloaded_elos'] if season == START_SEASONS[sport] else None,
+            previous_elos=previous_elos,
+            engine='array',
+            registry=registry
         )
         elo_df = er.run_to_date()
         elo_df = elo_df.rename(columns={'home_team_name': 'home_team_id', 'away_team_name': 'away_team_id'})
         elo_df = pd.merge(elo_df, df[['id', 'str_event_id', 'home_team_name', 'away_team_name', 'is_postseason', 'tournament_id', 'is_finished', 'datetime']], on=['str_event_id'])
         elo_df = elo_df.loc[elo_df.season == season].copy()
-        put_dataframe(elo_df, f'{elo_root_path}/{sport.value}/{season}.parquet', ELO_SCHEMA)
+        elo_path = f'{elo_root_path}/{sport.value}/{season}.parquet'
+        table = put_dataframe(elo_df, elo_path, ELO_ARROW_SCHEMA)
+        if elo_tables is not None:
+            elo_tables[season] = table
+        rating_path = RatingIndex.write_season(rating_root_path, sport, season, elo_df)
+        checkpoint.update(season, elo_df)
+        checkpoint.save(checkpoint_root_path, sport)
+        manifest.record(str(season), fingerprint, [elo_path, rating_path])
+        manifest.save(manifest_root_path, 'elo', sport)
+        processed = processed + 1
+    registry.save(registry_root_path, sport)
+    return {'skipped': skipped, 'processed': processed}
 
 
-def main():
+def update_elo_for_sport(event_root_path: str, elo_root_path: str, sport: ESPNSportTypes, registry_root_path: str = './data/teams', checkpoint_root_path: str = './data/checkpoints', manifest_root_path: str = './data/manifests', rating_root_path: str = './data/ratings', force: bool = False, event_tables: dict = None, elo_tables: dict = None):
+    """
+    Incrementally update the current season's Elo ratings with the events that finished since the last run.
+
+    Only new or corrected finished events are applied (a corrected or late score replays the season from that
+    event onwards) and scheduled events are re-projected. Falls back to run_elo_for_sport when more than one
+    season needs updating or the incremental update cannot be applied.
+
+    Args:
+        event_root_path (str): Root path for event data.
+        elo_root_path (str): Root path for Elo data.
+        sport (ESPNSportTypes): Type of sport.
+        registry_root_path (str): Root path for the team index registry.
+        checkpoint_root_path (str): Root path for end of season rating checkpoints.
+        manifest_root_path (str): Root path for the stage manifests.
+        rating_root_path (str): Root path for the point in time rating index.
+        force (bool): Update even if the inputs are unchanged (default is False).
+        event_tables (dict): Events tables by season kept in memory by the events stage, read instead of the
+            stored files (default is None).
+        elo_tables (dict): Filled with the written Elo table of every rated season, keyed by season (default is
+            None).
+
+    Returns:
+        dict: Number of skipped and processed seasons.
+    """
+    seasons = get_seasons_to_update(elo_root_path, sport)
+    season = seasons[-1]
+    elo_path = f'{elo_root_path}/{sport.value}/{season}.parquet'
+    elo_df = get_dataframe(elo_path) if len(seasons) == 1 else pd.DataFrame()
+    if elo_df.shape[0] == 0:
+        return run_elo_for_sport(event_root_path, elo_root_path, sport, registry_root_path, checkpoint_root_path, manifest_root_path, rating_root_path, force, event_tables, elo_tables)
+
+    checkpoint = EloCheckpoint.load(checkpoint_root_path, sport)
+    checkpoint.bootstrap(elo_root_path, sport, season - 1)
+    manifest = Manifest.load(manifest_root_path, 'elo', sport)
+    fingerprint = get_elo_fingerprint(manifest, event_root_path, sport, season, checkpoint.get_previous_elos(season))
+    if not force and manifest.is_unchanged(str(season), fingerprint):
+        print(f'Skipping Elo for {sport.value} - {season} (inputs unchanged)')
+        build_missing_rating_index(elo_root_path, rating_root_path, sport, season)
+        return {'skipped': 1, 'processed': 0}
+
+    print(f'Updating Elo for {sport.value} - {season}')
+    registry = TeamRegistry.load(registry_root_path, sport)
+    events_df = get_event_dataframe(event_root_path, sport, season, event_tables)
+
+    elo_cols = ['str_event_id', 'season', 'date', 'neutral_site', 'home_team_id', 'home_team_score', 'away_team_id', 'away_team_score']
+    rated_cols = elo_cols + ['home_elo_pre', 'away_elo_pre', 'home_elo_prob', 'away_elo_prob', 'home_elo_post', 'away_elo_post']
+    rated_df = elo_df.loc[((elo_df.home_team_score.notnull()) & (elo_df.away_team_score.notnull()))]
+    er = EloRunner(
+        df=rated_df[rated_cols].rename(columns={'home_team_id': 'home_team_name', 'away_team_id': 'away_team_name'}),
+        allow_future=True,
+        k=ELO_HYPERPARAMETERS[sport]['k'],
+        mean_elo=1505,
+        home_field_advantage=ELO_HYPERPARAMETERS[sport]['hfa'],
+        width=800,
+        previous_elos=checkpoint.get_previous_elos(season),
+        engine='array',
+        registry=registry
+    )
+
+    # New or corrected finished events plus every scheduled event (to re-project them)
+    scored_df = pd.merge(events_df[['str_event_id', 'home_team_score', 'away_team_score']], rated_df[['str_event_id', 'home_team_score', 'away_team_score']], on='str_event_id', how='left', suffixes=('', '_rated'))
+    unchanged_ids = scored_df.loc[(
+            (scored_df.home_team_score.notnull()) &
+            (scored_df.home_team_score == scored_df.home_team_score_rated) &
+            (scored_df.away_team_score == scored_df.away_team_score_rated)
+    ).fillna(False)].str_event_id
+    new_events_df = events_df.loc[~events_df.str_event_id.isin(unchanged_ids)]
+    print(f'    Applying {int(new_events_df.home_team_score.notnull().sum())} finished and {int(new_events_df.home_team_score.isnull().sum())} scheduled events...')
+    try:
+        applied_df = er.apply_events(new_events_df[elo_cols].rename(columns={'home_team_id': 'home_team_name', 'away_team_id': 'away_team_name'}))
+    except Exception as e:
+        print(f'    Issue with incremental update ({e}). Handling as refresh for Season...')
+        return run_elo_for_sport(event_root_path, elo_root_path, sport, registry_root_path, checkpoint_root_path, manifest_root_path, rating_root_path, force=True, event_tables=event_tables, elo_tables=elo_tables)
+
+    applied_df = applied_df.rename(columns={'home_team_name': 'home_team_id', 'away_team_name': 'away_team_id'})
+    applied_df = pd.merge(applied_df, events_df[['id', 'str_event_id', 'home_team_name', 'away_team_name', 'is_postseason', 'tournament_id', 'is_finished', 'datetime']], on=['str_event_id'])
+    kept_df = rated_df.loc[(rated_df.str_event_id.isin(events_df.str_event_id)) & (~rated_df.str_event_id.isin(applied_df.str_event_id))]
+    elo_df = pd.concat([kept_df, applied_df[kept_df.columns]], ignore_index=True)
+    elo_df['date'] = pd.to_datetime(elo_df['date'])
+    elo_df = elo_df.sort_values(['season', 'date'], kind='stable').reset_index(drop=True)
+    table = put_dataframe(elo_df, elo_path, ELO_ARROW_SCHEMA)
+    if elo_tables is not None:
+        elo_tables[season] = table
+    rating_path = RatingIndex.write_season(rating_root_path, sport, season, elo_df)
+    checkpoint.update(season, elo_df)
+    checkpoint.save(checkpoint_root_path, sport)
+    manifest.record(str(season), fingerprint, [elo_path, rating_path])
+    manifest.save(manifest_root_path, 'elo', sport)
+    registry.save(registry_root_path, sport)
+    return {'skipped': 0, 'processed': 1}
+
+
+def main(workers: int = 1, incremental: bool = False, force: bool = False, cprofile: bool = False):
     """
     Main function to run Elo calculations for specified sports.
 
+    Args:
+        workers (int): Number of sports to run in parallel worker processes (default is 1).
+        incremental (bool): Only apply events that finished since the last run (default is False).
+        force (bool): Rerun seasons even if their inputs are unchanged (default is False).
+        cprofile (bool): Also write cProfile stats per sport to ./data/profiles/elo/cprofile (default is False).
+
     Returns:
         None
     """
     sports = [sport for sport in ESPNSportTypes if sport != ESPNSportTypes.SOCCER_EPL]
-    status_reports = {}
-    for sport in sports:
-        start = time.time()
-        try:
-            run_elo_for_sport(event_root_path='./data/events', elo_root_path='./data/elo', sport=sport)
-            status_reports[sport] = {
-                'status': True,
-                'execution_time': round(time.time() - start, 2),
-                'end_datetime': datetime.datetime.utcnow()
-            }
-        except Exception as e:
-            print('FAILURE')
-            print(e)
-            status_reports[sport] = {
-                'status': False,
-                'execution_time': round(time.time() - start, 2),
-                'end_datetime': datetime.datetime.utcnow()
-            }
-    print('')
-    print('Elo Pump Status Report')
-    print('-' * 110)
-    duration = 0
-    for key, report in status_reports.items():
-        duration = duration + report['execution_time']
-        print(f"    {key}: {'PASSED' if report['status'] else 'FAILED'} -- took {report['execution_time']} sec, finished at ({report['end_datetime']}) ")
-    print('')
-    print(f'Pump took {duration} sec')
-    print('-' * 110)
+    start = time.time()
+    job = update_elo_for_sport if incremental else run_elo_for_sport
+    status_reports = run_sport_jobs(job, sports, workers=workers, profile_path='./data/profiles/elo', cprofile_path='./data/profiles/elo/cprofile' if cprofile else None, event_root_path='./data/events', elo_root_path='./data/elo', registry_root_path='./data/teams', checkpoint_root_path='./data/checkpoints', manifest_root_path='./data/manifests', rating_root_path='./data/ratings', force=force)
+    print_status_report('Elo Pump Status Report', status_reports, time.time() - start)
+
+
+def parse_args():
+    """
+    Parse command line arguments.
+
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=1, help='Number of sports to run in parallel worker processes')
+    parser.add_argument('--incremental', action='store_true', help='Only apply events that finished since the last run')
+    parser.add_argument('--force', action='store_true', help='Rerun seasons even if their inputs are unchanged')
+    parser.add_argument('--cprofile', action='store_true', help='Write cProfile stats per sport to ./data/profiles/elo/cprofile')
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(workers=args.workers, incremental=args.incremental, force=args.force, cprofile=args.cprofile)
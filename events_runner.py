@@ -1,50 +1,49 @@
+import argparse
 import time
 
 import pandas as pd
 import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
 from src.consts import ESPNSportTypes, SEASON_GROUPS
-from src.utils import create_dataframe, put_dataframe, get_dataframe, get_seasons_to_update, known_missed_date
-from src.sport import ESPNSport
-from src.event import ESPNEventsAPI
+from src.utils import put_dataframe, get_dataframe, get_seasons_to_update, known_missed_date, run_sport_jobs, print_status_report
+from src.season_calendar import SeasonCalendarRegistry, get_active_sports
+from src.response_cache import ResponseCache
+from src.event import ESPNEventsAPI, EloEventColumns
+from src.ingestion_ledger import IngestionLedger
+from src.profiling import carry_collectors, stage
+from src.team_roster import SeasonRosterRegistry
 
 
-def get_active_sports():
+def fetch_events_for_dates(espn_events_api: ESPNEventsAPI, sport: ESPNSportTypes, dates: List[datetime.datetime], groups=None, concurrency: int = 1) -> list:
     """
-    Get a list of active ESPN sports based on their current status.
-
-    Returns:
-        List: List of active sports.
-    """
-    espn_sports = []
-    for sport in ESPNSportTypes:
-        sport_api = ESPNSport(sport)
-        espn_sports.append(sport_api)
-    return [espn_sport.sport for espn_sport in espn_sports if espn_sport.is_active and espn_sport.sport != ESPNSportTypes.SOCCER_EPL] + [ESPNSportTypes.NFL, ESPNSportTypes.COLLEGE_FOOTBALL]
-    #return [espn_sport.sport for espn_sport in espn_sports if espn_sport.sport != ESPNSportTypes.SOCCER_EPL]
-
-
-def get_valid_team_ids_for_sport_season(sport: ESPNSportTypes, season: int, espn_events_api: ESPNEventsAPI):
-    """
-    Get valid team IDs for a specific sport and season.
+    Fetch Elo events for each date as column buffers, concurrently when concurrency > 1.
 
     Args:
+        espn_events_api (ESPNEventsAPI): ESPN Events API object (its rate limiter is shared by every thread).
         sport (ESPNSportTypes): Type of sport.
-        season (int): Season year.
-        espn_events_api (ESPNEventsAPI): ESPN Events API object.
+        dates (List[datetime.datetime]): Dates to fetch.
+        groups: Groups for events.
+        concurrency (int): Maximum number of dates fetched at the same time.
 
     Returns:
-        List: List of valid team IDs.
+        list: (date, events, error) tuples in date order, events as EloEventColumns. error is None if the date was
+            fetched.
     """
-    team_ids = []
-    core_sport = sport.value.split('/')[0] + '/leagues/' + sport.value.split('/')[1]
-    url = f'http://sports.core.api.espn.com/v2/sports/{core_sport}/seasons/{season}/teams'
-    res = espn_events_api.api_request(url + '?limit=750')
-    for item in res['items']:
-        team_ids.append(int(item['$ref'].replace(url + '/', '').split('?')[0]))
-    return team_ids
+    def fetch(date):
+        try:
+            return date, espn_events_api.get_event_columns_for_elo(sport, date.strftime('%Y%m%d'), groups=groups), None
+        except Exception as e:
+            return date, None, e
 
+    with stage('events_fetch', rows=len(dates)):
+        if concurrency <= 1 or len(dates) <= 1:
+            return [fetch(date) for date in dates]
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(carry_collectors(fetch), dates))
 
-def run_events_for_sport(root_path: str, sport: ESPNSportTypes, espn_events_api: ESPNEventsAPI):
+
+def run_events_for_sport(root_path: str, sport: ESPNSportTypes, espn_events_api: ESPNEventsAPI, concurrency: int = 1, calendar_registry: SeasonCalendarRegistry = None, ledger_root_path: str = './data/ledgers', roster_registry: SeasonRosterRegistry = None, event_tables: dict = None):
     """
     Run events retrieval process for a specific sport.
 
@@ -52,22 +51,38 @@ def run_events_for_sport(root_path: str, sport: ESPNSportTypes, espn_events_api:
         root_path (str): Root path for event data.
         sport (ESPNSportTypes): Type of sport.
         espn_events_api (ESPNEventsAPI): ESPN Events API object.
+        concurrency (int): Maximum number of on-days fetched at the same time (default is 1).
+        calendar_registry (SeasonCalendarRegistry): Registry the season calendars are resolved from (default is None
+            for a registry on './data/calendars').
+        ledger_root_path (str): Root path for the ingestion ledgers (default is './data/ledgers').
+        roster_registry (SeasonRosterRegistry): Registry the valid team ids of each season are resolved from (default
+            is None for a registry on './data/rosters').
+        event_tables (dict): Filled with the written events table of every updated season, keyed by season, to hand
+            the events on in memory (default is None).
 
     Returns:
-        None
+        dict: On-days of the rescan windows the ledger skipped (skipped) and on-days fetched (processed).
     """
     seasons = get_seasons_to_update(root_path, sport)
+    ledger = IngestionLedger.load(ledger_root_path, sport)
+    saved = 0
+    processed = 0
+    if calendar_registry is None:
+        calendar_registry = SeasonCalendarRegistry(cache=espn_events_api.cache)
+    if roster_registry is None:
+        roster_registry = SeasonRosterRegistry()
 
     print(f'Starting Runner for {sport.value} ({seasons[0]}-{seasons[-1]})...')
     for season in seasons:
-        team_ids = get_valid_team_ids_for_sport_season(sport, season, espn_events_api)
-        espn_sport_obj = ESPNSport(sport=sport, season=season)
+        roster = roster_registry.get(sport, season, espn_events_api)
+        espn_sport_obj = calendar_registry.get(sport, season)
         on_days = espn_sport_obj.ondays
         groups = SEASON_GROUPS[sport]
         if groups is not None:
             groups = groups['di']
         if espn_sport_obj.start_date is None:
             print(f'No Data for {sport.value} - {season}...')
+            roster_registry.commit(sport, season)
             continue
 
         print(f'Getting Events for {sport.value} - {season}')
@@ -75,39 +90,57 @@ def run_events_for_sport(root_path: str, sport: ESPNSportTypes, espn_events_api:
         end_date = espn_sport_obj.end_date.strftime('%Y%m%d')
 
         fs_df = get_dataframe(f'{root_path}/{sport.value}/{season}.parquet')
+        if len(roster.added) > 0 and fs_df.shape[0] > 0:
+            # Events of the teams that just joined the roster were dropped so far, refetching picks them up
+            print(f'    {len(roster.added)} teams joined the {season} roster. Handling as refresh for Season...')
+            fs_df = pd.DataFrame()
         # If the file does not exist refresh else update the dataset with the new data
         if fs_df.shape[0] == 0:
             fs_df = pd.DataFrame()
+            ledger.reset(season)
             dates = f"{start_date}-{end_date}"
             print(f'    Refreshing data from {dates}...')
         else:
-            # Upsert will be shifted back two days to make sure we do not miss any games
+            # Upsert will be shifted back seven days to make sure we do not miss any games
             try:
                 start_date = pd.Timestamp(pd.Timestamp(fs_df.loc[fs_df['is_finished'] == 1].datetime.max()).to_pydatetime() - datetime.timedelta(days=7)).strftime('%Y%m%d')
-                dates = f"{start_date}-{end_date}"
-                print(f'    Updating data from {dates}...')
-                on_days = [day for day in on_days if pd.Timestamp(start_date).to_pydatetime() <= day <= pd.Timestamp(end_date).to_pydatetime()]
-
-                fs_df = fs_df.loc[((fs_df.season == season) & (fs_df.is_finished == True) & (fs_df.datetime <= fs_df.loc[fs_df['is_finished'] == True].datetime.max()))]
+                rescan_days = [day for day in on_days if pd.Timestamp(start_date).to_pydatetime() <= day <= pd.Timestamp(end_date).to_pydatetime()]
+                if ledger.has_season(season):
+                    # Only on-days that are still open or changed recently are refetched, the stored events of the
+                    # other on-days are kept as they are
+                    selected_days = ledger.select(season, on_days)
+                    skipped_days = len(set(rescan_days) - set(selected_days))
+                    print(f'    Updating {len(selected_days)} open or recently changed on-days (ledger skipped {skipped_days} of {len(rescan_days)} on-days from {start_date})...')
+                    saved = saved + skipped_days
+                    on_days = selected_days
+                else:
+                    dates = f"{start_date}-{end_date}"
+                    print(f'    Updating data from {dates}...')
+                    # On-days before the rescan window are settled, the ledger tracks the season from now on
+                    ledger.settle(season, [day for day in on_days if day not in rescan_days])
+                    on_days = rescan_days
+                    fs_df = fs_df.loc[((fs_df.season == season) & (fs_df.is_finished == True) & (fs_df.datetime <= fs_df.loc[fs_df['is_finished'] == True].datetime.max()))]
 
             except Exception as e:
                 print(f'Issue with Upsert for {sport.value} - {season}. Handling as refresh for Season...')
                 fs_df = pd.DataFrame()
+                ledger.reset(season)
                 dates = f"{start_date}-{end_date}"
 
         # Collect all event payloads from api
         events = []
         if len(on_days) == 0:
             print('    No Events Need Updating')
+            roster_registry.commit(sport, season)
             continue
 
 
         missed_dates = []
-        for date in on_days:
-            try:
-                res = espn_events_api.get_events_for_elo(sport, date.strftime('%Y%m%d'), groups=groups)
-                events.extend(res)
-            except Exception as e:
+        fetched = []
+        for date, res, error in fetch_events_for_dates(espn_events_api, sport, on_days, groups, concurrency):
+            if error is None:
+                fetched.append((date, res))
+            else:
                 print(f"    -- Missed Date {date.strftime('%Y%m%d')} --")
                 if date > datetime.datetime.utcnow():
                     print(f'        Missed Date is future date. Scrape will be run up to {date - datetime.timedelta(days=1)}')
@@ -115,59 +148,83 @@ def run_events_for_sport(root_path: str, sport: ESPNSportTypes, espn_events_api:
                 if not known_missed_date(sport, date):
                     missed_dates.append(date)
         # Add second pass (api timesout on a specific date sometimes. Finishing on_dates and re running missed dates results in less errors)
-        for date in missed_dates:
-            res = espn_events_api.get_events_for_elo(sport, date.strftime('%Y%m%d'), groups=groups)
-            events.extend(res)
-        df = create_dataframe(events, espn_events_api.SCHEMA)
-
-        df = df.loc[((df.away_team_id.isin(team_ids)) & (df.home_team_id.isin(team_ids)))].copy()
+        for date, res, error in fetch_events_for_dates(espn_events_api, sport, missed_dates, groups, concurrency):
+            if error is not None:
+                raise error
+            fetched.append((date, res))
+        processed = processed + len(fetched)
+        if fs_df.shape[0] > 0:
+            # Fetched on-days replace every event last recorded for them (moved or canceled events disappear)
+            fs_df = fs_df.loc[~fs_df.id.isin(ledger.event_ids(season, [date for date, res in fetched]))]
+        for date, res in fetched:
+            ledger.record(season, date, res)
+            events.append(res)
+        events = EloEventColumns.concat(events)
+        with stage('events_parse', rows=len(events)):
+            df = events.to_dataframe()
+
+        valid = roster.contains(df.home_team_id) & roster.contains(df.away_team_id)
+        if not valid.all():
+            outside = df.loc[~valid, ['home_team_id', 'away_team_id']].to_numpy(dtype='int64').ravel()
+            outside = set(outside[~roster.contains(outside)].tolist())
+            print(f'    Dropped {int((~valid).sum())} events of {len(outside)} teams outside the {season} roster')
+        df = df.loc[valid].copy()
 
         df = pd.concat([fs_df, df], ignore_index=True).drop_duplicates(['str_event_id'], keep='last')
+        # A rescheduled event gets a new str_event_id, only its latest scheduled row is kept
+        df = df.loc[(df.is_finished == 1) | ~df.duplicated('id', keep='last')]
         df = df.sort_values(['datetime'])
 
         if season != seasons[-1]:
             df = df.loc[((df.home_team_score.notnull()) & (df.away_team_score.notnull()))].copy()
         df = df.loc[df.season == season].copy()
-        put_dataframe(df, f'{root_path}/{sport.value}/{season}.parquet', espn_events_api.SCHEMA)
+        table = put_dataframe(df, f'{root_path}/{sport.value}/{season}.parquet', espn_events_api.ARROW_SCHEMA)
+        if event_tables is not None:
+            event_tables[season] = table
+        ledger.save(ledger_root_path, sport)
+        # The events of teams that joined the roster are stored now
+        roster_registry.commit(sport, season)
+    ledger.save(ledger_root_path, sport)
+    return {'skipped': saved, 'processed': processed}
 
 
-def main():
+def main(workers: int = 1, concurrency: int = 1, requests_per_second: float = None, cprofile: bool = False):
     """
     Main function to run events retrieval for specified sports.
 
+    Args:
+        workers (int): Number of sports to run in parallel worker processes (default is 1).
+        concurrency (int): Maximum number of on-days fetched at the same time per sport (default is 1).
+        requests_per_second (float): Maximum ESPN request rate per worker (default is None for no limit).
+        cprofile (bool): Also write cProfile stats per sport to ./data/profiles/events/cprofile (default is False).
+
     Returns:
         None
     """
-    sports = get_active_sports()
-    status_reports = {}
-    for sport in sports:
-        start = time.time()
-        try:
-            run_events_for_sport(root_path='./data/events', sport=sport, espn_events_api=ESPNEventsAPI())
-            status_reports[sport] = {
-                'status': True,
-                'execution_time': round(time.time() - start, 2),
-                'end_datetime': datetime.datetime.utcnow()
-            }
-        except Exception as e:
-            print('FAILURE')
-            print(e)
-            status_reports[sport] = {
-                'status': False,
-                'execution_time': round(time.time() - start, 2),
-                'end_datetime': datetime.datetime.utcnow()
-            }
-    print('')
-    print('Events Pump Status Report')
-    print('-' * 110)
-    duration = 0
-    for key, report in status_reports.items():
-        duration = duration + report['execution_time']
-        print(f"    {key}: {'PASSED' if report['status'] else 'FAILED'} -- took {report['execution_time']} sec, finished at ({report['end_datetime']}) ")
-    print('')
-    print(f'Pump took {duration} sec')
-    print('-' * 110)
+    cache = ResponseCache('./data/cache')
+    calendar_registry = SeasonCalendarRegistry('./data/calendars', cache=cache)
+    sports = list(dict.fromkeys(get_active_sports(calendar_registry) + [ESPNSportTypes.NFL, ESPNSportTypes.COLLEGE_FOOTBALL]))
+    start = time.time()
+    espn_events_api = ESPNEventsAPI(pool_size=max(10, concurrency), requests_per_second=requests_per_second, cache=cache)
+    status_reports = run_sport_jobs(run_events_for_sport, sports, workers=workers, profile_path='./data/profiles/events', cprofile_path='./data/profiles/events/cprofile' if cprofile else None, root_path='./data/events', espn_events_api=espn_events_api, concurrency=concurrency, calendar_registry=calendar_registry, roster_registry=SeasonRosterRegistry('./data/rosters'))
+    print_status_report('Events Pump Status Report', status_reports, time.time() - start)
+
+
+def parse_args():
+    """
+    Parse command line arguments.
+
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=1, help='Number of sports to run in parallel worker processes')
+    parser.add_argument('--concurrency', type=int, default=1, help='Number of on-days fetched at the same time per sport')
+    parser.add_argument('--requests-per-second', type=float, default=None, help='Maximum ESPN request rate per worker')
+    parser.add_argument('--cprofile', action='store_true', help='Write cProfile stats per sport to ./data/profiles/events/cprofile')
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(workers=args.workers, concurrency=args.concurrency, requests_per_second=args.requests_per_second, cprofile=args.cprofile)
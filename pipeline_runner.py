@@ -0,0 +1,140 @@
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from src.consts import ESPNSportTypes
+from src.event import ESPNEventsAPI
+from src.response_cache import ResponseCache
+from src.season_calendar import SeasonCalendarRegistry, get_active_sports
+from src.team_roster import SeasonRosterRegistry
+from src.utils import run_sport_job, print_status_report
+from events_runner import run_events_for_sport
+from elo_runner import run_elo_for_sport, update_elo_for_sport
+from report_runner import run_reports_for_sport
+
+
+def run_ratings_for_sport(sport: ESPNSportTypes, event_tables: dict = None, incremental: bool = False, force: bool = False, compact: bool = False, precompress: bool = False, simulations: int = 10000, cprofile: bool = False) -> tuple:
+    """
+    Run the Elo and report stages of a sport. The events fetched in this run and the Elo ratings written by the
+    Elo stage are handed on in memory, every other season is read from disk.
+
+    Args:
+        sport (ESPNSportTypes): Type of sport.
+        event_tables (dict): Events tables by season written by the events stage (default is None for none).
+        incremental (bool): Only apply events that finished since the last run (default is False).
+        force (bool): Rerun Elo and regenerate reports even if their inputs are unchanged (default is False).
+        compact (bool): Write the reports without indentation (default is False).
+        precompress (bool): Also write gzip compressed copies of the reports (default is False).
+        simulations (int): Number of simulated seasons for the rest of season simulation (default is 10000).
+        cprofile (bool): Also write cProfile stats per sport and stage to ./data/profiles (default is False).
+
+    Returns:
+        tuple: Status reports of the Elo stage and of the report stage.
+    """
+    elo_tables = {}
+    elo_job = update_elo_for_sport if incremental else run_elo_for_sport
+    elo_status_report = run_sport_job(elo_job, sport, {
+        'event_root_path': './data/events',
+        'elo_root_path': './data/elo',
+        'registry_root_path': './data/teams',
+        'checkpoint_root_path': './data/checkpoints',
+        'manifest_root_path': './data/manifests',
+        'rating_root_path': './data/ratings',
+        'force': force,
+        'event_tables': event_tables,
+        'elo_tables': elo_tables,
+    }, './data/profiles/elo', './data/profiles/elo/cprofile' if cprofile else None)
+    reports_status_report = run_sport_job(run_reports_for_sport, sport, {
+        'elo_root_path': './data/elo',
+        'report_root_path': './data/reports',
+        'manifest_root_path': './data/manifests',
+        'force': force,
+        'spread_root_path': './data/spreads',
+        'compact': compact,
+        'precompress': precompress,
+        'simulations': simulations,
+        'elo_tables': elo_tables,
+    }, './data/profiles/reports', './data/profiles/reports/cprofile' if cprofile else None)
+    return elo_status_report, reports_status_report
+
+
+def main(workers: int = 1, concurrency: int = 1, requests_per_second: float = None, incremental: bool = False, force: bool = False, compact: bool = False, precompress: bool = False, simulations: int = 10000, cprofile: bool = False):
+    """
+    Run the events, Elo and report stages in one process, pipelined across sports.
+
+    Sports are fetched one after another in this process while the Elo and report stages of the sports already
+    fetched run in the background (a thread, or a process pool when workers > 1), so a sport is fetching while
+    the previous one is rated. Sports without new events are rated straight away.
+
+    Args:
+        workers (int): Number of worker processes rating sports in parallel (default is 1 for one background
+            thread).
+        concurrency (int): Maximum number of on-days fetched at the same time per sport (default is 1).
+        requests_per_second (float): Maximum ESPN request rate (default is None for no limit).
+        incremental (bool): Only apply events that finished since the last run (default is False).
+        force (bool): Rerun Elo and regenerate reports even if their inputs are unchanged (default is False).
+        compact (bool): Write the reports without indentation (default is False).
+        precompress (bool): Also write gzip compressed copies of the reports (default is False).
+        simulations (int): Number of simulated seasons for the rest of season simulation (default is 10000).
+        cprofile (bool): Also write cProfile stats per sport and stage to ./data/profiles (default is False).
+
+    Returns:
+        None
+    """
+    cache = ResponseCache('./data/cache')
+    calendar_registry = SeasonCalendarRegistry('./data/calendars', cache=cache)
+    roster_registry = SeasonRosterRegistry('./data/rosters')
+    fetch_sports = list(dict.fromkeys(get_active_sports(calendar_registry) + [ESPNSportTypes.NFL, ESPNSportTypes.COLLEGE_FOOTBALL]))
+    sports = [sport for sport in ESPNSportTypes if sport != ESPNSportTypes.SOCCER_EPL]
+    rating_kwargs = {'incremental': incremental, 'force': force, 'compact': compact, 'precompress': precompress, 'simulations': simulations, 'cprofile': cprofile}
+    start = time.time()
+    espn_events_api = ESPNEventsAPI(pool_size=max(10, concurrency), requests_per_second=requests_per_second, cache=cache)
+    events_status_reports = {}
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else ThreadPoolExecutor(max_workers=1)
+    with executor:
+        futures = {sport: executor.submit(run_ratings_for_sport, sport, None, **rating_kwargs) for sport in sports if sport not in fetch_sports}
+        for sport in fetch_sports:
+            event_tables = {}
+            events_status_reports[sport] = run_sport_job(run_events_for_sport, sport, {
+                'root_path': './data/events',
+                'espn_events_api': espn_events_api,
+                'concurrency': concurrency,
+                'calendar_registry': calendar_registry,
+                'roster_registry': roster_registry,
+                'event_tables': event_tables,
+            }, './data/profiles/events', './data/profiles/events/cprofile' if cprofile else None)
+            if sport in sports:
+                futures[sport] = executor.submit(run_ratings_for_sport, sport, event_tables, **rating_kwargs)
+        fetch_time = time.time() - start
+        elo_status_reports = {}
+        reports_status_reports = {}
+        for sport in sports:
+            elo_status_reports[sport], reports_status_reports[sport] = futures[sport].result()
+    print_status_report('Events Pump Status Report', events_status_reports, fetch_time)
+    print_status_report('Elo Pump Status Report', elo_status_reports, time.time() - start)
+    print_status_report('Reports Pump Status Report', reports_status_reports, time.time() - start)
+
+
+def parse_args():
+    """
+    Parse command line arguments.
+
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=1, help='Number of worker processes rating sports in parallel')
+    parser.add_argument('--concurrency', type=int, default=1, help='Number of on-days fetched at the same time per sport')
+    parser.add_argument('--requests-per-second', type=float, default=None, help='Maximum ESPN request rate')
+    parser.add_argument('--incremental', action='store_true', help='Only apply events that finished since the last run')
+    parser.add_argument('--force', action='store_true', help='Rerun Elo and regenerate reports even if their inputs are unchanged')
+    parser.add_argument('--compact', action='store_true', help='Write the reports without indentation')
+    parser.add_argument('--precompress', action='store_true', help='Also write gzip compressed copies (.json.gz) of the reports')
+    parser.add_argument('--simulations', type=int, default=10000, help='Number of simulated seasons for the rest of season simulation')
+    parser.add_argument('--cprofile', action='store_true', help='Write cProfile stats per sport and stage to ./data/profiles')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(workers=args.workers, concurrency=args.concurrency, requests_per_second=args.requests_per_second, incremental=args.incremental, force=args.force, compact=args.compact, precompress=args.precompress, simulations=args.simulations, cprofile=args.cprofile)
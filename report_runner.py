@@ -1,153 +1,27 @@
-import json
+import argparse
 import os
 import time
 import pandas as pd
 import numpy as np
 import datetime
 
-from scipy.stats import gamma
-
 from src.consts import ESPNSportTypes, ELO_HYPERPARAMETERS, START_SEASONS
-from src.utils import get_dataframe, find_year_for_season, df_rename_fold
-from src.sport import ESPNSport
-from sklearn.metrics import brier_score_loss, log_loss, accuracy_score, precision_score, recall_score, f1_score, roc_auc_score, mean_squared_error, mean_absolute_error, mean_absolute_percentage_error, r2_score
-
-
-def get_active_sports():
-    """
-    Get a list of active ESPN sports based on their current status.
-
-    Returns:
-        List: List of active sports.
-    """
-    espn_sports = []
-    for sport in ESPNSportTypes:
-        sport_api = ESPNSport(sport)
-        espn_sports.append(sport_api)
-    return [espn_sport.sport for espn_sport in espn_sports if espn_sport.is_active and espn_sport.sport != ESPNSportTypes.SOCCER_EPL]
-
-
-def classification_evaluation(y_true: np.ndarray, y_pred: np.ndarray) -> dict:
-    """
-    Evaluate classification metrics for binary or multiclass classification.
-
-    Parameters:
-    - y_true (numpy.ndarray): True labels.
-    - y_pred (numpy.ndarray): Predicted probabilities or class labels.
-
-    Returns:
-    dict: Dictionary containing classification metrics.
-    """
-    y_true = np.array(y_true).ravel()
-    if set(y_true) == {0, 1} or len(list(set(y_true))) <= 2:
-        # Binary classification
-        y_true_binary = y_true.astype(bool)
-        brier_score = brier_score_loss(y_true_binary, y_pred)
-        y_pred_binary = (y_pred > 0.5).astype(int)
-        accuracy = accuracy_score(y_true_binary, y_pred_binary)
-        precision = precision_score(y_true_binary, y_pred_binary)
-        recall = recall_score(y_true_binary, y_pred_binary)
-        f1 = f1_score(y_true_binary, y_pred_binary)
-        if len(list(set(y_true))) < 2:
-            roc_auc = None
-            log_loss_score = None
-        else:
-            roc_auc = roc_auc_score(y_true_binary, y_pred_binary)
-            log_loss_score = log_loss(y_true_binary, y_pred)
-        error = y_pred.round(2) - y_true_binary
-        my_score = ((25 - (100 * error)).sum() / len(y_true_binary)).round(2)
-    else:
-        # Multiclass classification
-        y_true_multiclass = y_true
-        log_loss_score = log_loss(y_true_multiclass, y_pred)
-        y_pred_multiclass = np.argmax(y_pred, axis=1)
-        accuracy = accuracy_score(y_true_multiclass, y_pred_multiclass)
-        precision = precision_score(y_true_multiclass, y_pred_multiclass, average='weighted')
-        recall = recall_score(y_true_multiclass, y_pred_multiclass, average='weighted')
-        f1 = f1_score(y_true_multiclass, y_pred_multiclass, average='weighted')
-        roc_auc = None
-        brier_score = None
-        my_score = None
-
-    return {
-        'system_accuracy': accuracy,
-        'system_precision': precision,
-        'system_recall': recall,
-        'system_f1': f1,
-        'system_auc': roc_auc,
-        'system_brier_score': brier_score,
-        'system_log_loss': log_loss_score,
-        'system_score': my_score,
-        'system_records': len(y_true),
-    }
-
-
-def regression_evaluation(y_pred, y_true) -> dict:
-    """
-    Evaluate regression metrics.
-
-    Parameters:
-    - y_true (numpy.ndarray): True value.
-    - y_pred (numpy.ndarray): Predicted value.
-
-    Returns:
-    dict: Dictionary containing regression metrics.
-    """
-    mse = mean_squared_error(y_true, y_pred)
-    mae = mean_absolute_error(y_true, y_pred)
-    mape = mean_absolute_percentage_error(y_true, y_pred)
-    r2 = r2_score(y_true, y_pred)
-    return {
-        'system_mse': mse,
-        'system_mae': mae,
-        'system_mape': mape,
-        'system_r2': r2,
-        'system_records': len(y_true),
-    }
-
-
-def trim_outliers(data):
-    # Remove Outliers
-    q1 = np.percentile(data, 25)
-    q3 = np.percentile(data, 75)
-    iqr = q3 - q1
-    lower_bound = q1 - 1.5 * iqr
-    upper_bound = q3 + 1.5 * iqr
-    return data[(data >= lower_bound) & (data <= upper_bound)]
-
-
-def generate_gamma_distribution(elo_df):
-    '''
-    Generate gamma distribution of historical point differentials.
-    We trim outliers in the point difs, take the absolute value of the
-    point difs and fit the points to a gamma distribution.
-    :param elo_df:
-    :return:
-    '''
-    scores = elo_df.loc[((elo_df.is_finished == 1))]
-    records = scores.shape[0] if scores.shape[0] < 10000 else 10000
-    scores = scores[-records:][['away_team_score', 'home_team_score']]
-    dif_scores = scores.away_team_score - scores.home_team_score
-    dif_scores_no_outliers = trim_outliers(dif_scores)
-    dif_scores_no_outliers = dif_scores_no_outliers.abs()
-    shape, loc, scale = gamma.fit(dif_scores_no_outliers)
-    return shape, loc, scale
-
-
-def calculate_spread_from_probability(prob, shape, loc, scale):
-    '''
-    Function to convert a probability to a given spread based on the fit gamma
-    distribution hyperparameters
-    :param prob:
-    :param shape:
-    :param loc:
-    :param scale:
-    :return:
-    '''
-    probability = abs(0.50 - prob) * 2
-    ppf_value = gamma.ppf(probability, shape, loc, scale)
-    adjusted_ppf_value = (ppf_value - 1) * 2
-    return -adjusted_ppf_value if prob > 0.5 else adjusted_ppf_value
+from src.evaluation import SystemEvaluation
+from src.manifest import Manifest, hash_object
+from src.profiling import stage
+from src.rating_index import RatingIndex
+from src.report_writer import JSONRecords, get_report_paths, write_json_report
+from src.simulation import PLAYOFF_SPOTS, SeasonSimulator
+from src.spread import GammaSpreadModel
+from src.storage import read_sport_dataframe, get_season_paths
+from src.team_names import TeamNames
+from src.utils import find_year_for_season, df_rename_fold, run_sport_jobs, print_status_report
+
+REPORT_COLUMNS = [
+    'id', 'str_event_id', 'season', 'datetime', 'is_postseason', 'tournament_id', 'is_finished', 'neutral_site',
+    'home_team_id', 'home_team_name', 'home_team_score', 'away_team_id', 'away_team_name', 'away_team_score',
+    'home_elo_pre', 'away_elo_pre', 'home_elo_prob', 'away_elo_prob', 'home_elo_post', 'away_elo_post'
+]
 
 
 def generate_system_settings(elo_df: pd.DataFrame, sport: ESPNSportTypes) -> dict:
@@ -173,59 +47,30 @@ def generate_system_settings(elo_df: pd.DataFrame, sport: ESPNSportTypes) -> dic
     return system_settings
 
 
-def generate_system_evaluation(eval_df: pd.DataFrame, sport: ESPNSportTypes, season='ALL'):
+def generate_system_evaluation(eval_df: pd.DataFrame, sport: ESPNSportTypes, season='ALL', evaluation: SystemEvaluation = None):
     """
     Generate system evaluation metrics based on evaluation DataFrame and season.
 
     Parameters:
     - eval_df (pd.DataFrame): DataFrame containing evaluation data.
     - season (str | int): Season identifier.
+    - evaluation (SystemEvaluation): Evaluation engine already reduced over eval_df (built if None).
 
     Returns:
     dict: System evaluation metrics.
     """
-    if season != 'ALL':
-        eval_df = eval_df.loc[eval_df.season == season].copy()
-
-    if eval_df.shape[0] == 0:
+    if evaluation is None:
+        evaluation = SystemEvaluation(eval_df)
+    metrics = evaluation.evaluate(season)
+    if metrics is None:
         print(f'No Records for {sport.value}-{season} for Evaluation')
-        return None
-
-    # Classification Evaluation
-    y_true = eval_df['result']
-    y_pred = eval_df['home_elo_prob']
-    classification_metrics = classification_evaluation(y_true, y_pred)
-
-    # Regression Evaluation
-    y_true = eval_df['point_dif']
-    y_pred = eval_df['elo_spread']
-    regression_metrics = regression_evaluation(y_true, y_pred)
-    metrics = {
-        **classification_metrics,
-        **regression_metrics
-    }
-
-    folded_df = df_rename_fold(eval_df[['season', 'home_team_name', 'home_team_score', 'away_team_name', 'away_team_score']], 'away_', 'home_')
-    num_games = folded_df.groupby(['team_name', 'season']).agg({
-        'team_score': 'count'  # Count number of attribute
-    })
-    metrics['avg_number_of_games_played'] = num_games.reset_index().groupby('season')['team_score'].mean().mean()
-    avg_score = folded_df.groupby(['team_name', 'season']).agg({
-        'team_score': 'mean'  # Avg number of attribute
-    })
-    metrics['avg_points_per_game'] = avg_score.reset_index().groupby('season')['team_score'].mean().mean()
-
-    hw = eval_df.loc[eval_df.neutral_site == 0].copy()
-    hw['home_is_winner'] = hw['home_team_score'] > hw['away_team_score']
-    hw = hw.groupby(['season']).agg({'home_is_winner': 'sum', 'id': 'count'}).reset_index()
-    hw['perc'] = hw['home_is_winner'] / hw['id']
-    metrics['home_win_percentage'] = hw['perc'].mean()
     return metrics
 
 
 def generate_system_evaluations(eval_df: pd.DataFrame, sport: ESPNSportTypes, season) -> dict:
     """
-    Generate system evaluations for multiple seasons.
+    Generate system evaluations for multiple seasons. The events are reduced once and every season slice is
+    evaluated from the per season sums.
 
     Parameters:
     - eval_df (pd.DataFrame): DataFrame containing evaluation data.
@@ -235,9 +80,10 @@ def generate_system_evaluations(eval_df: pd.DataFrame, sport: ESPNSportTypes, se
     dict: System evaluations for different seasons.
     """
     eval_seasons = ['ALL', season, season - 1, season - 2]
+    evaluation = SystemEvaluation(eval_df)
     evals = {}
     for eval_season in eval_seasons:
-        evals[eval_season] = generate_system_evaluation(eval_df, sport, eval_season)
+        evals[eval_season] = generate_system_evaluation(eval_df, sport, eval_season, evaluation)
     return {
         'evaluations': evals,
         'lastupdated': datetime.datetime.utcnow().isoformat(),
@@ -270,7 +116,7 @@ def generate_event_rating(elo_df: pd.DataFrame, sport: ESPNSportTypes, short_shi
     - sport (str): Sport identifier.
 
     Returns:
-    list: List of event ratings.
+    JSONRecords: Event ratings.
     """
     report_cols = [
         'id',
@@ -309,7 +155,7 @@ def generate_event_rating(elo_df: pd.DataFrame, sport: ESPNSportTypes, short_shi
             upcoming_elo_df = upcoming_elo_df.loc[upcoming_elo_df.datetime <= cutoff_datetime]
             if upcoming_elo_df.shape[0] == 0:
                 return None
-    return json.loads(upcoming_elo_df[report_cols].to_json(orient='records', date_format='iso'))
+    return JSONRecords.from_frame(upcoming_elo_df, report_cols)
 
 
 def generate_event_ratings(elo_df: pd.DataFrame, sport: ESPNSportTypes) -> dict:
@@ -365,64 +211,184 @@ def generate_previous_events_ratings(elo_df: pd.DataFrame, sport: ESPNSportTypes
     return event_ratings
 
 
-def generate_team_rating(folded_elo_df: pd.DataFrame) -> list:
+def generate_team_rating(rating_index: RatingIndex, team_names: TeamNames) -> JSONRecords:
     """
-    Generate team ratings based on folded Elo DataFrame.
+    Generate team ratings from the latest rating of each team in the rating index.
 
     Parameters:
-    - folded_elo_df (pd.DataFrame): Folded DataFrame containing Elo ratings.
+    - rating_index (RatingIndex): Point in time rating index of the finished events.
+    - team_names (TeamNames): Canonical team name <-> id mapping, teams are only listed under their canonical id.
 
     Returns:
-    list: List of team ratings.
+    JSONRecords: Team ratings.
     """
-    current_ratings_df = folded_elo_df.loc[folded_elo_df.is_finished == 1].groupby('team_id').nth(-1).sort_values(['elo_post'], ascending=False)
-    current_ratings_df = current_ratings_df.drop(columns=['is_finished', 'elo_pre']).rename(columns={'elo_post': 'elo_rating', 'datetime': 'lastupdated'})
-    current_ratings_df = current_ratings_df.drop_duplicates('team_name')  # Sometimes ESPN has multiple ids for one team so check name too
+    current_ratings_df = rating_index.latest()
+    # Sometimes ESPN has multiple ids for one team, only the id that used the name last is kept
+    current_ratings_df = current_ratings_df.loc[team_names.canonical_ids(current_ratings_df.team_id) == current_ratings_df.team_id.to_numpy()]
+    current_ratings_df = current_ratings_df.sort_values(['elo_post'], ascending=False)
+    current_ratings_df = current_ratings_df.rename(columns={'elo_post': 'elo_rating', 'datetime': 'lastupdated'})
     current_ratings_df = current_ratings_df.loc[current_ratings_df.season >= current_ratings_df.season.max() - 1]
     current_ratings_df['rank'] = [i + 1 for i in range(current_ratings_df.shape[0])]
-    return json.loads(current_ratings_df[['id', 'team_name', 'rank', 'elo_rating', 'season', 'lastupdated']].to_json(orient='records', date_format='iso'))
+    return JSONRecords.from_frame(current_ratings_df, ['id', 'team_name', 'rank', 'elo_rating', 'season', 'lastupdated'])
 
 
-def generate_team_ratings(folded_elo_df: pd.DataFrame) -> dict:
+def generate_team_ratings(rating_index: RatingIndex, team_names: TeamNames) -> dict:
     """
-    Generate team ratings based on folded Elo DataFrame.
+    Generate team ratings from the latest rating of each team in the rating index.
 
     Parameters:
-    - folded_elo_df (pd.DataFrame): Folded DataFrame containing Elo ratings.
+    - rating_index (RatingIndex): Point in time rating index of the finished events.
+    - team_names (TeamNames): Canonical team name <-> id mapping.
 
     Returns:
     dict: Team ratings.
     """
     team_ratings = {
-        'teams': generate_team_rating(folded_elo_df),
+        'teams': generate_team_rating(rating_index, team_names),
         'lastupdated': datetime.datetime.utcnow().isoformat(),
     }
     return team_ratings
 
 
-def run_reports_for_sport(elo_root_path: str, report_root_path: str, sport: ESPNSportTypes):
+def generate_season_simulation(elo_df: pd.DataFrame, sport: ESPNSportTypes, season: int, simulations: int = 10000, seed: int = 0) -> dict:
+    """
+    Generate the rest of season simulation: win distributions, playoff and seed odds per team and simulated
+    probabilities per remaining event.
+
+    Parameters:
+    - elo_df (pd.DataFrame): DataFrame containing Elo ratings.
+    - sport (str): Sport identifier.
+    - season (int): Season to simulate.
+    - simulations (int): Number of simulated seasons.
+    - seed (int): Seed of the random generator.
+
+    Returns:
+    dict: Season simulation.
     """
-    Run Elo calculations for a specific sport and update Elo ratings.
+    season_simulation = {
+        'season': season,
+        'simulations': simulations,
+        'playoff_spots': PLAYOFF_SPOTS.get(sport),
+        'teams': None,
+        'events': None,
+        'lastupdated': datetime.datetime.utcnow().isoformat(),
+    }
+    season_df = elo_df.loc[elo_df.season == season]
+    if (season_df.is_finished == 0).sum() == 0:
+        return season_simulation
+    simulator = SeasonSimulator(season_df, k=ELO_HYPERPARAMETERS[sport]['k'], hfa=ELO_HYPERPARAMETERS[sport]['hfa'], width=800, mean_elo=1505)
+    outcomes = simulator.simulate(simulations=simulations, seed=seed)
+
+    wins = outcomes['wins']
+    n_teams = len(simulator.team_ids)
+    projected_wins = wins.mean(axis=1)
+    percentiles = np.percentile(wins, [5, 25, 50, 75, 95], axis=1)
+    distribution = np.bincount((np.arange(n_teams)[:, np.newaxis] * (wins.max() + 1) + wins).ravel(), minlength=n_teams * (wins.max() + 1)).reshape(n_teams, wins.max() + 1) / simulations
+    spots = season_simulation['playoff_spots']
+    seed_odds = simulator.seed_odds(outcomes, spots) if spots is not None else None
+    projected_ratings = outcomes['ratings'].mean(axis=1)
+
+    teams = []
+    for i in np.argsort(-projected_wins, kind='stable').tolist():
+        teams.append({
+            'team_id': int(simulator.team_ids[i]),
+            'team_name': simulator.team_names[i],
+            'elo_rating': float(simulator.ratings[i]),
+            'projected_elo_rating': float(projected_ratings[i]),
+            'wins': int(simulator.wins[i]),
+            'losses': int(simulator.losses[i]),
+            'projected_wins': float(projected_wins[i]),
+            'projected_losses': float(simulator.losses[i] + simulator.remaining_games[i] - (projected_wins[i] - simulator.wins[i])),
+            'win_percentiles': {f'p{q}': float(value) for q, value in zip([5, 25, 50, 75, 95], percentiles[:, i])},
+            'win_distribution': {str(w): float(prob) for w, prob in enumerate(distribution[i].tolist()) if prob > 0},
+            'playoff_odds': float(seed_odds[i].sum()) if seed_odds is not None else None,
+            'seed_odds': seed_odds[i].tolist() if seed_odds is not None else None,
+        })
+    events_df = simulator.remaining_df.copy()
+    events_df['sim_home_win_prob'] = outcomes['home_win_prob']
+    events_df['sim_home_elo_prob'] = outcomes['home_elo_prob']
+    season_simulation['teams'] = teams
+    season_simulation['events'] = JSONRecords.from_frame(events_df, [
+        'id', 'str_event_id', 'datetime', 'is_postseason', 'neutral_site', 'home_team_name', 'home_team_id',
+        'away_team_name', 'away_team_id', 'home_elo_prob', 'sim_home_win_prob', 'sim_home_elo_prob'
+    ])
+    return season_simulation
+
+
+def get_report_window_key(elo_root_path: str, sport: ESPNSportTypes, seasons: list, elo_tables: dict = None) -> dict:
+    """
+    Get the date dependent inputs of the reports: the events inside the upcoming and previous event windows.
 
     Args:
-        event_root_path (str): Root path for event data.
         elo_root_path (str): Root path for Elo data.
         sport (ESPNSportTypes): Type of sport.
+        seasons (list): Seasons of the reports.
+        elo_tables (dict): Elo tables by season used instead of the stored files (default is None).
 
     Returns:
-        None
+        dict: Event ids inside the previous and upcoming windows.
+    """
+    window_df = read_sport_dataframe(elo_root_path, sport, seasons, columns=['str_event_id', 'is_finished', 'datetime'], tables=elo_tables)
+    if window_df.shape[0] == 0:
+        return {'previous': [], 'upcoming': []}
+    shift = datetime.timedelta(days=get_upcoming_short_shift_for_sport(sport))
+    previous_cutoff = pd.Timestamp(datetime.datetime.utcnow() - shift).strftime('%Y-%m-%d')
+    upcoming_cutoff = pd.Timestamp(datetime.datetime.utcnow() + shift).strftime('%Y-%m-%d')
+    previous_df = window_df.loc[(window_df.is_finished == True) & (window_df.datetime >= previous_cutoff)]
+    upcoming_df = window_df.loc[(window_df.is_finished == False) & (window_df.datetime <= upcoming_cutoff)]
+    return {
+        'previous': sorted(previous_df.str_event_id.astype(str).tolist()),
+        'upcoming': sorted(upcoming_df.str_event_id.astype(str).tolist()),
+    }
+
+
+def run_reports_for_sport(elo_root_path: str, report_root_path: str, sport: ESPNSportTypes, manifest_root_path: str = './data/manifests', force: bool = False, spread_root_path: str = './data/spreads', compact: bool = False, precompress: bool = False, simulations: int = 10000, seed: int = 0, elo_tables: dict = None):
+    """
+    Generate the report endpoints of a sport. Skipped when the Elo files, hyperparameters and the events inside
+    the date windows are identical to the last run.
+
+    Args:
+        elo_root_path (str): Root path for Elo data.
+        report_root_path (str): Root path for reports.
+        sport (ESPNSportTypes): Type of sport.
+        manifest_root_path (str): Root path for the stage manifests.
+        force (bool): Regenerate even if the inputs are unchanged (default is False).
+        spread_root_path (str): Root path for the cached gamma spread models.
+        compact (bool): Write the reports without indentation (default is False).
+        precompress (bool): Also write gzip compressed copies of the reports (default is False).
+        simulations (int): Number of simulated seasons for the rest of season simulation (default is 10000).
+        seed (int): Seed of the rest of season simulation (default is 0).
+        elo_tables (dict): Elo tables by season kept in memory by the Elo stage, read instead of the stored files
+            (default is None).
+
+    Returns:
+        dict: Number of skipped and processed units.
     """
     current_season = find_year_for_season(sport)
     seasons = list(range(START_SEASONS[sport], current_season + 1))
-    elo_df = pd.concat([get_dataframe(f'{elo_root_path}/{sport.value}/{season}.parquet') for season in seasons], ignore_index=True)
+    endpoint_names = ['system_settings', 'team_ratings', 'restofseason_event_ratings', 'upcoming_event_ratings', 'previous_event_ratings', 'system_evaluation', 'restofseason_simulation']
+    endpoint_paths = [path for endpoint_name in endpoint_names for path in get_report_paths(f'{report_root_path}/{sport.value}/{endpoint_name}.json', precompress)]
+    manifest = Manifest.load(manifest_root_path, 'reports', sport)
+    fingerprint = manifest.fingerprint(list(get_season_paths(elo_root_path, sport, seasons).values()), {
+        'current_season': current_season,
+        'hyperparameters': ELO_HYPERPARAMETERS[sport],
+        'window': hash_object(get_report_window_key(elo_root_path, sport, seasons, elo_tables)),
+        'format': {'compact': compact, 'precompress': precompress},
+        'simulation': {'simulations': simulations, 'seed': seed},
+    })
+    if not force and manifest.is_unchanged('reports', fingerprint):
+        print(f'Skipping Reports for {sport.value} (inputs unchanged)')
+        return {'skipped': 1, 'processed': 0}
+
+    elo_df = read_sport_dataframe(elo_root_path, sport, seasons, columns=REPORT_COLUMNS, tables=elo_tables)
     elo_df['result'] = elo_df['home_team_score'] > elo_df['away_team_score']
     elo_df['point_dif'] = elo_df.away_team_score - elo_df.home_team_score
 
     # Generate Gamma Distribution for calculating spreads from probabilities
     elo_df['elo_diff'] = (elo_df['home_elo_pre'] + (elo_df['neutral_site'] == 0) * ELO_HYPERPARAMETERS[sport]['hfa']) - elo_df['away_elo_pre']
     if sport in [ESPNSportTypes.SOCCER_EPL]:
-        shape, loc, scale = generate_gamma_distribution(elo_df.loc[elo_df.is_finished == 1].sort_values(['datetime']))
-        elo_df['elo_spread'] = [calculate_spread_from_probability(prob, shape, loc, scale) for prob in elo_df.home_elo_prob.values]
+        spread_model = GammaSpreadModel.load_or_fit(spread_root_path, sport, elo_df.loc[elo_df.is_finished == 1].sort_values(['datetime']))
+        elo_df['elo_spread'] = spread_model.spreads(elo_df.home_elo_prob.to_numpy(dtype=np.float64, na_value=np.nan))
     else:
         if sport == ESPNSportTypes.COLLEGE_LACROSSE:
             adj_k = ELO_HYPERPARAMETERS[sport]['k'] * 1.75
@@ -441,19 +407,27 @@ def run_reports_for_sport(elo_root_path: str, report_root_path: str, sport: ESPN
 
         elo_df['elo_spread'] = - elo_df['elo_diff'] / adj_k
 
-    event_ratings = generate_event_ratings(elo_df, sport)
-    upcoming_event_ratings = generate_upcoming_events_ratings(elo_df, sport)
-    previous_event_ratings = generate_previous_events_ratings(elo_df, sport)
+    with stage('report.restofseason_event_ratings'):
+        event_ratings = generate_event_ratings(elo_df, sport)
+    with stage('report.upcoming_event_ratings'):
+        upcoming_event_ratings = generate_upcoming_events_ratings(elo_df, sport)
+    with stage('report.previous_event_ratings'):
+        previous_event_ratings = generate_previous_events_ratings(elo_df, sport)
+    with stage('report.restofseason_simulation'):
+        season_simulation = generate_season_simulation(elo_df, sport, current_season, simulations=simulations, seed=seed)
     shift = 2 if len(seasons) > 5 else 0
     eval_df = elo_df.loc[((elo_df.is_finished == 1) & (elo_df.season >= START_SEASONS[sport] + shift))].copy()
     del elo_df
 
-    evaluations = generate_system_evaluations(eval_df, sport, current_season)
+    with stage('report.system_evaluation', rows=eval_df.shape[0]):
+        evaluations = generate_system_evaluations(eval_df, sport, current_season)
 
     folded_elo_df = df_rename_fold(eval_df[['id', 'season', 'datetime', 'is_finished', 'neutral_site', 'home_team_name', 'away_team_name', 'home_team_id', 'away_team_id', 'home_elo_pre', 'away_elo_pre', 'home_elo_post', 'away_elo_post']], 'away_', 'home_').sort_values('datetime')
-    team_ratings = generate_team_ratings(folded_elo_df)
+    with stage('report.team_ratings'):
+        team_ratings = generate_team_ratings(RatingIndex.from_frame(eval_df, columns=['id', 'season', 'team_name']), TeamNames.from_events(eval_df))
 
-    system_settings = generate_system_settings(folded_elo_df, sport)
+    with stage('report.system_settings'):
+        system_settings = generate_system_settings(folded_elo_df, sport)
 
     endpoints = {
         'system_settings': system_settings,
@@ -462,6 +436,7 @@ def run_reports_for_sport(elo_root_path: str, report_root_path: str, sport: ESPN
         'upcoming_event_ratings': upcoming_event_ratings,
         'previous_event_ratings': previous_event_ratings,
         'system_evaluation': evaluations,
+        'restofseason_simulation': season_simulation,
     }
 
     # Create the directory if it doesn't exist
@@ -469,47 +444,51 @@ def run_reports_for_sport(elo_root_path: str, report_root_path: str, sport: ESPN
 
     # Write JSON files for each endpoint
     for endpoint_name, data in endpoints.items():
-        with open(f'{report_root_path}/{sport.value}/{endpoint_name}.json', 'w') as json_file:
-            json.dump(data, json_file, indent=2)
+        with stage(f'report_write.{endpoint_name}'):
+            write_json_report(f'{report_root_path}/{sport.value}/{endpoint_name}.json', data, compact=compact, precompress=precompress)
+    manifest.record('reports', fingerprint, endpoint_paths)
+    manifest.save(manifest_root_path, 'reports', sport)
+    return {'skipped': 0, 'processed': 1}
 
 
-def main():
+def main(workers: int = 1, force: bool = False, compact: bool = False, precompress: bool = False, simulations: int = 10000, cprofile: bool = False):
     """
     Main function to run Elo calculations for specified sports.
 
+    Args:
+        workers (int): Number of sports to run in parallel worker processes (default is 1).
+        force (bool): Regenerate reports even if their inputs are unchanged (default is False).
+        compact (bool): Write the reports without indentation (default is False).
+        precompress (bool): Also write gzip compressed copies of the reports (default is False).
+        simulations (int): Number of simulated seasons for the rest of season simulation (default is 10000).
+        cprofile (bool): Also write cProfile stats per sport to ./data/profiles/reports/cprofile (default is False).
+
     Returns:
         None
     """
     sports = [sport for sport in ESPNSportTypes if sport != ESPNSportTypes.SOCCER_EPL]
-    status_reports = {}
-    for sport in sports:
-        start = time.time()
-        try:
-            run_reports_for_sport(elo_root_path='./data/elo', report_root_path='./data/reports', sport=sport)
-            status_reports[sport] = {
-                'status': True,
-                'execution_time': round(time.time() - start, 2),
-                'end_datetime': datetime.datetime.utcnow()
-            }
-        except Exception as e:
-            print('FAILURE')
-            print(e)
-            status_reports[sport] = {
-                'status': False,
-                'execution_time': round(time.time() - start, 2),
-                'end_datetime': datetime.datetime.utcnow()
-            }
-    print('')
-    print('Elo Pump Status Report')
-    print('-' * 110)
-    duration = 0
-    for key, report in status_reports.items():
-        duration = duration + report['execution_time']
-        print(f"    {key}: {'PASSED' if report['status'] else 'FAILED'} -- took {report['execution_time']} sec, finished at ({report['end_datetime']}) ")
-    print('')
-    print(f'Pump took {duration} sec')
-    print('-' * 110)
+    start = time.time()
+    status_reports = run_sport_jobs(run_reports_for_sport, sports, workers=workers, profile_path='./data/profiles/reports', cprofile_path='./data/profiles/reports/cprofile' if cprofile else None, elo_root_path='./data/elo', report_root_path='./data/reports', manifest_root_path='./data/manifests', force=force, spread_root_path='./data/spreads', compact=compact, precompress=precompress, simulations=simulations)
+    print_status_report('Reports Pump Status Report', status_reports, time.time() - start)
+
+
+def parse_args():
+    """
+    Parse command line arguments.
+
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=1, help='Number of sports to run in parallel worker processes')
+    parser.add_argument('--force', action='store_true', help='Regenerate reports even if their inputs are unchanged')
+    parser.add_argument('--compact', action='store_true', help='Write the reports without indentation')
+    parser.add_argument('--precompress', action='store_true', help='Also write gzip compressed copies (.json.gz) of the reports')
+    parser.add_argument('--simulations', type=int, default=10000, help='Number of simulated seasons for the rest of season simulation')
+    parser.add_argument('--cprofile', action='store_true', help='Write cProfile stats per sport to ./data/profiles/reports/cprofile')
+    return parser.parse_args()
 
 
 if __name__ == "__main__":
-    main()
+    args = parse_args()
+    main(workers=args.workers, force=args.force, compact=args.compact, precompress=args.precompress, simulations=args.simulations, cprofile=args.cprofile)
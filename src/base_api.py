@@ -1,80 +1,217 @@
+import random
+import threading
 import time
 
 import requests
+from requests.adapters import HTTPAdapter
+
+from src.profiling import record_request
+from src.response_cache import ResponseCache
+from src.transport import create_transport, FixtureNotFoundError
+
+
+class ESPNFloodedError(Exception):
+    """
+    Raised when ESPN responds with the 2502 "Flooded" code (too many requests).
+    """
+
+
+class RateLimiter:
+    """
+    Thread safe limiter spacing requests evenly to at most a number of requests per second.
+
+    Attributes:
+        requests_per_second (float): Maximum request rate.
+
+    Methods:
+        acquire(): Block until the next request is allowed.
+    """
+
+    def __init__(self, requests_per_second: float):
+        """
+        Initialize RateLimiter.
+
+        Args:
+            requests_per_second (float): Maximum request rate.
+        """
+        if requests_per_second <= 0:
+            raise ValueError('requests_per_second must be positive')
+        self.requests_per_second = requests_per_second
+        self._interval = 1.0 / requests_per_second
+        self._next_time = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Block until the next request is allowed.
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next_time - now
+            self._next_time = max(now, self._next_time) + self._interval
+        if wait > 0:
+            time.sleep(wait)
+
+    def __getstate__(self):
+        # Locks cannot be pickled, worker processes get their own limiter
+        return {'requests_per_second': self.requests_per_second}
+
+    def __setstate__(self, state):
+        self.__init__(state['requests_per_second'])
 
 
 class ESPNBaseAPI:
     """
     ESPNBaseAPI class for making API requests to ESPN's sports data endpoints.
 
+    Requests go through a keep-alive session owned by the API object, so connections are pooled and reused
+    across calls instead of paying a new TCP+TLS handshake per request.
+
     Attributes:
         _base_url (str): The base URL for ESPN's public API.
         _core_url (str): The base URL for ESPN's core API.
+        session (requests.Session): Pooled keep-alive session used for every live request.
+        transport: Transport the requests are sent through (live, record or replay, see create_transport).
+        max_retries (int): Number of retries after a failed request.
+        backoff (float): Base delay in seconds of the exponential backoff between retries.
+        flooded_backoff (float): Base delay in seconds used after a 2502 "Flooded" response.
+        timeout (float): Request timeout in seconds.
+        rate_limiter (RateLimiter): Limiter shared by every request of this object (None for no limit).
+        cache (ResponseCache): On-disk response cache (None to always hit the network).
 
     Methods:
-        api_request(url: str, retry_count: int = 0) -> dict or None:
+        api_request(url: str, retry_count: int = 0, cache_ttl: float = 0) -> dict or None:
             Makes an API request to the specified URL.
 
             Args:
                 url (str): The complete URL for the API request.
-                retry_count (int): The number of times to retry the request in case of failure. Default is 0.
+                retry_count (int): The number of retries already spent on this request. Default is 0.
+                cache_ttl (float): Seconds a cached response stays fresh (None forever, 0 bypasses the cache).
 
             Returns:
                 dict or None: The JSON response from the API, or None if the request was unsuccessful.
                 If the response indicates a 404 status code or an error, None is returned.
 
             Raises:
-                Exception: Raises an exception if the request encounters an error after multiple retries.
-                This is typically used when the request limit is exceeded (error code 2502).
+                Exception: Raises the last exception if the request still fails after max_retries retries.
+                ESPNFloodedError is raised when the request limit is exceeded (error code 2502).
+                FixtureNotFoundError is raised without retries when replaying a URL that was never recorded.
     """
 
-    def __init__(self):
+    def __init__(self, pool_size: int = 10, max_retries: int = 3, backoff: float = 1.0, flooded_backoff: float = 15.0, timeout: float = 30.0, requests_per_second: float = None, cache: ResponseCache = None, transport=None):
         """
         Initializes an instance of the ESPNBaseAPI class.
 
-        Attributes:
-            _base_url (str): The base URL for ESPN's public API.
-            _core_url (str): The base URL for ESPN's core API.
+        Args:
+            pool_size (int): Maximum number of pooled keep-alive connections per host.
+            max_retries (int): Number of retries after a failed request.
+            backoff (float): Base delay in seconds of the exponential backoff between retries.
+            flooded_backoff (float): Base delay in seconds used after a 2502 "Flooded" response.
+            timeout (float): Request timeout in seconds.
+            requests_per_second (float): Maximum request rate across threads (default is None for no limit).
+            cache (ResponseCache): On-disk response cache (default is None to always hit the network).
+            transport: Transport for the requests (default is None to create one from the ESPN_TRANSPORT_MODE environment).
         """
         self._base_url = 'https://site.api.espn.com/apis/site/v2/sports'
         self._core_url = 'https://sports.core.api.espn.com/v2/sports'
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.flooded_backoff = flooded_backoff
+        self.timeout = timeout
+        self.session = self._create_session(pool_size)
+        self.transport = transport if transport is not None else create_transport(self.session, timeout)
+        self.rate_limiter = RateLimiter(requests_per_second) if requests_per_second is not None else None
+        self.cache = cache
+
+    @staticmethod
+    def _create_session(pool_size: int) -> requests.Session:
+        """
+        Create a keep-alive session with a connection pool per host.
+
+        Args:
+            pool_size (int): Maximum number of pooled connections per host.
+
+        Returns:
+            requests.Session: Configured session.
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update({
+            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36'
+        })
+        return session
+
+    def _retry_delay(self, retry_count: int, flooded: bool = False) -> float:
+        """
+        Exponential backoff with full jitter.
+
+        Args:
+            retry_count (int): The number of retries already spent on this request.
+            flooded (bool): True if the last response was a 2502 "Flooded" response.
 
-    def api_request(self, url: str, retry_count: int = 0) -> dict or None:
+        Returns:
+            float: Seconds to wait before the next retry.
+        """
+        base = self.flooded_backoff if flooded else self.backoff
+        return random.uniform(0, base * (2 ** retry_count))
+
+    def api_request(self, url: str, retry_count: int = 0, cache_ttl: float = 0) -> dict or None:
         """
         Makes an API request to the specified URL.
 
         Args:
             url (str): The complete URL for the API request.
-            retry_count (int): The number of times to retry the request in case of failure. Default is 0.
+            retry_count (int): The number of retries already spent on this request. Default is 0.
+            cache_ttl (float): Seconds a cached response stays fresh (None caches forever, 0 bypasses the cache).
+                Only successful responses are cached. Default is 0.
 
         Returns:
             dict or None: The JSON response from the API, or None if the request was unsuccessful.
             If the response indicates a 404 status code or an error, None is returned.
 
         Raises:
-            Exception: Raises an exception if the request encounters an error after multiple retries.
-            This is typically used when the request limit is exceeded (error code 2502).
+            Exception: Raises the last exception if the request still fails after max_retries retries.
+            ESPNFloodedError is raised when the request limit is exceeded (error code 2502).
+            FixtureNotFoundError is raised without retries when replaying a URL that was never recorded.
         """
-        try:
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/58.0.3029.110 Safari/537.36'
-            }
-            resp = requests.get(url=url, headers=headers)
-            if resp.status_code == 404:
-                return None
-            res = resp.json()
-            if 'error' in res:
-                if res['error']['code'] == 404:  # No data
-                    return None
-            if 'code' in res:
-                if res['code'] == 2502:
-                    raise Exception('Flooded')  # Too many requests
-                if res['code'] == 400:  # Data cant be found (wrong endpoint/wrong request)
+        use_cache = self.cache is not None and cache_ttl != 0 and getattr(self.transport, 'use_response_cache', True)
+        if use_cache:
+            found, res = self.cache.get(url, cache_ttl)
+            if found:
+                return res
+        while True:
+            try:
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire()
+                request_start = time.perf_counter()
+                try:
+                    resp = self.transport.get(url)
+                    size = len(resp.content) if hasattr(resp, 'content') else len(resp.text.encode('utf-8'))
+                except Exception as e:
+                    record_request(time.perf_counter() - request_start, 0, error=True)
+                    raise e
+                record_request(time.perf_counter() - request_start, size)
+                if resp.status_code == 404:
                     return None
-            return res
-        except Exception as e:
-            if retry_count >= 3:
+                res = resp.json()
+                if 'error' in res:
+                    if res['error']['code'] == 404:  # No data
+                        return None
+                if 'code' in res:
+                    if res['code'] == 2502:
+                        raise ESPNFloodedError('Flooded')  # Too many requests
+                    if res['code'] == 400:  # Data cant be found (wrong endpoint/wrong request)
+                        return None
+                if use_cache:
+                    self.cache.put(url, res)
+                return res
+            except FixtureNotFoundError as e:
                 raise e
-            time.sleep(5)
-            print(f'URL error for {url}')
-            self.api_request(url, retry_count=retry_count + 1)
+            except Exception as e:
+                if retry_count >= self.max_retries:
+                    raise e
+                print(f'URL error for {url}')
+                time.sleep(self._retry_delay(retry_count, flooded=isinstance(e, ESPNFloodedError)))
+                retry_count = retry_count + 1
@@ -0,0 +1,171 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from src.consts import ESPNSportTypes, START_SEASONS
+from src.utils import get_dataframe
+
+
+class EloCheckpoint:
+    """
+    End of season rating snapshots for a sport.
+
+    Each season entry holds the latest post game rating of every team rated up to and including that season
+    (teams that sat out a season keep their last rating), plus the last processed event of the season as a
+    watermark. The ratings are the state EloRunner upserts from, so a season can be run from the previous entry
+    instead of re-reading every prior season. The watermark and last_event_id are only recorded for inspection,
+    nothing reads them back: which events still need a rating is decided from the stored Elo seasons.
+
+    Attributes:
+        seasons (dict): Season entries keyed by season with watermark, last_event_id (both informational, None
+            if the season has no finished games) and elos (empty until a season has finished games).
+
+    Methods:
+        get_elos(season): Ratings at the end of a season.
+        get_previous_elos(season): Ratings carried into a season.
+        update(season, elo_df): Record the end of season ratings from a season of Elo results.
+        bootstrap(elo_root_path, sport, season): Build missing entries from stored Elo seasons.
+        load(root_path, sport): Load the checkpoint for a sport.
+        save(root_path, sport): Persist the checkpoint for a sport.
+    """
+
+    def __init__(self, seasons: dict = None):
+        """
+        Initialize EloCheckpoint.
+
+        Args:
+            seasons (dict): Season entries keyed by season (default is None).
+        """
+        self.seasons = seasons if seasons is not None else {}
+
+    def get_elos(self, season: int):
+        """
+        Ratings at the end of a season.
+
+        Args:
+            season (int): Season year.
+
+        Returns:
+            dict or None: Ratings keyed by team id, or None if the season has not been checkpointed.
+        """
+        if season not in self.seasons:
+            return None
+        return dict(self.seasons[season]['elos'])
+
+    def get_previous_elos(self, season: int):
+        """
+        Ratings carried into a season (end of the latest checkpointed season before it).
+
+        Args:
+            season (int): Season year.
+
+        Returns:
+            dict or None: Ratings keyed by team id, or None if no earlier season has been checkpointed.
+        """
+        previous_seasons = [checkpoint_season for checkpoint_season in self.seasons if checkpoint_season < season]
+        if len(previous_seasons) == 0:
+            return None
+        return self.get_elos(max(previous_seasons))
+
+    def update(self, season: int, elo_df: pd.DataFrame):
+        """
+        Record the end of season ratings from a season of Elo results. Entries for later seasons are dropped
+        since they were built on top of the replaced season.
+
+        Args:
+            season (int): Season year.
+            elo_df (pd.DataFrame): Elo results for the season in the order they were run.
+        """
+        elos = self.get_previous_elos(season) or {}
+        finished_df = elo_df.loc[(
+                (elo_df.season == season) &
+                (elo_df.home_team_score.notnull()) &
+                (elo_df.away_team_score.notnull()) &
+                (elo_df.home_elo_post.notnull()) &
+                (elo_df.away_elo_post.notnull())
+        )]
+        watermark = None
+        last_event_id = None
+        if finished_df.shape[0] > 0:
+            position = np.arange(finished_df.shape[0])
+            latest_df = pd.DataFrame({
+                'position': np.concatenate([position, position]),
+                'team_id': np.concatenate([finished_df.home_team_id.to_numpy(dtype=np.int64), finished_df.away_team_id.to_numpy(dtype=np.int64)]),
+                'elo_post': np.concatenate([finished_df.home_elo_post.to_numpy(dtype=np.float64), finished_df.away_elo_post.to_numpy(dtype=np.float64)]),
+            }).sort_values('position', kind='stable').drop_duplicates('team_id', keep='last')
+            elos = {**elos, **dict(zip(latest_df.team_id.tolist(), latest_df.elo_post.tolist()))}
+            watermark = pd.Timestamp(finished_df.date.values[-1]).isoformat()
+            last_event_id = str(finished_df.str_event_id.values[-1])
+        self.seasons = {checkpoint_season: entry for checkpoint_season, entry in self.seasons.items() if checkpoint_season < season}
+        self.seasons[season] = {
+            'watermark': watermark,
+            'last_event_id': last_event_id,
+            'elos': elos,
+        }
+
+    def bootstrap(self, elo_root_path: str, sport: ESPNSportTypes, season: int):
+        """
+        Build missing entries from stored Elo seasons up to and including a season. Each stored season is
+        read once, after which updates only need the checkpoint.
+
+        Args:
+            elo_root_path (str): Root path for Elo data.
+            sport (ESPNSportTypes): Type of sport.
+            season (int): Last season to checkpoint.
+        """
+        columns = ['str_event_id', 'season', 'date', 'home_team_id', 'home_team_score', 'away_team_id', 'away_team_score', 'home_elo_post', 'away_elo_post']
+        for elo_season in range(START_SEASONS[sport], season + 1):
+            if elo_season in self.seasons:
+                continue
+            path = f'{elo_root_path}/{sport.value}/{elo_season}.parquet'
+            if not os.path.exists(path):
+                continue
+            elo_df = get_dataframe(path, columns=columns)
+            if elo_df.shape[0] == 0:
+                continue
+            self.update(elo_season, elo_df.sort_values(['season', 'date'], kind='stable'))
+
+    @staticmethod
+    def _path(root_path: str, sport: ESPNSportTypes) -> str:
+        return f'{root_path}/{sport.value}.json'
+
+    @classmethod
+    def load(cls, root_path: str, sport: ESPNSportTypes):
+        """
+        Load the checkpoint for a sport. A missing checkpoint loads as an empty one.
+
+        Args:
+            root_path (str): Root path for checkpoint data.
+            sport (ESPNSportTypes): Type of sport.
+
+        Returns:
+            EloCheckpoint: Loaded checkpoint.
+        """
+        path = cls._path(root_path, sport)
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r') as json_file:
+            data = json.load(json_file)
+        return cls({
+            int(season): {
+                'watermark': entry['watermark'],
+                'last_event_id': entry['last_event_id'],
+                'elos': {int(team_id): elo for team_id, elo in entry['elos'].items()},
+            }
+            for season, entry in data['seasons'].items()
+        })
+
+    def save(self, root_path: str, sport: ESPNSportTypes):
+        """
+        Persist the checkpoint for a sport.
+
+        Args:
+            root_path (str): Root path for checkpoint data.
+            sport (ESPNSportTypes): Type of sport.
+        """
+        path = self._path(root_path, sport)
+        os.makedirs(path.rsplit('/', 1)[0], exist_ok=True)
+        with open(path, 'w') as json_file:
+            json.dump({'seasons': {str(season): entry for season, entry in sorted(self.seasons.items())}}, json_file)
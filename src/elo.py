@@ -3,7 +3,10 @@ import math
 import numpy as np
 import pandas as pd
 
-from src.utils import df_rename_fold, is_pandas_none
+from src.profiling import stage
+from src.rating_index import RatingIndex
+from src.team_registry import TeamRegistry
+from src.utils import is_pandas_none, to_arrow_schema
 
 initial_load_columns = ['str_event_id', 'season', 'date', 'neutral_site', 'home_team_name', 'home_team_score', 'away_team_name', 'away_team_score']
 upsert_load_columns = initial_load_columns + ['home_elo_pre', 'away_elo_pre', 'home_elo_prob', 'away_elo_prob', 'home_elo_post', 'away_elo_post']
@@ -26,6 +29,110 @@ ELO_SCHEMA = {
     'home_elo_post': np.float64,
     'away_elo_post': np.float64
 }
+ELO_ARROW_SCHEMA = to_arrow_schema(ELO_SCHEMA)
+
+
+def elo_kernel(
+        home_idx: np.ndarray,
+        away_idx: np.ndarray,
+        home_score: np.ndarray,
+        away_score: np.ndarray,
+        neutral_site: np.ndarray,
+        season: np.ndarray,
+        elos: np.ndarray,
+        k: float = 20,
+        hfa: float = 100,
+        width: float = 400,
+        mean_elo: float = 1500,
+        revert_percentage: float = 1.0 / 3,
+        allow_future: bool = False
+):
+    """
+    Array backed Elo loop. Mirrors EloGame.update_elo for every event in one pass.
+
+    Events must already be sorted chronologically. Team ratings in elos are updated in place and regressed
+    towards the mean whenever the season changes.
+
+    Args:
+        home_idx (np.ndarray): Integer index into elos for the home team of each event.
+        away_idx (np.ndarray): Integer index into elos for the away team of each event.
+        home_score (np.ndarray): Home team scores (NaN for events without a score).
+        away_score (np.ndarray): Away team scores (NaN for events without a score).
+        neutral_site (np.ndarray): 1 if the event is played at a neutral site.
+        season (np.ndarray): Season of each event.
+        elos (np.ndarray): float64 rating state indexed by team.
+        k (float): K Factor. Higher K = higher rating change.
+        hfa (float): Home team advantage in Elo ratings.
+        width (float): Lower and upper bounds of Elo ratings (mean_elo - width, mean_elo + width).
+        mean_elo (float): Average rating score of the system.
+        revert_percentage (float): Percentage of regression towards the mean at each new season.
+        allow_future (bool): Flag to include future events in simulation.
+
+    Returns:
+        Tuple: home_elo_pre, away_elo_pre, home_elo_prob, away_elo_prob, home_elo_post, away_elo_post arrays.
+    """
+    n = len(home_idx)
+    home_elo_pre = np.empty(n, dtype=np.float64)
+    away_elo_pre = np.empty(n, dtype=np.float64)
+    home_elo_prob = np.empty(n, dtype=np.float64)
+    away_elo_prob = np.empty(n, dtype=np.float64)
+    home_elo_post = np.full(n, np.nan, dtype=np.float64)
+    away_elo_post = np.full(n, np.nan, dtype=np.float64)
+    if n == 0:
+        return home_elo_pre, away_elo_pre, home_elo_prob, away_elo_prob, home_elo_post, away_elo_post
+
+    state = elos.tolist()
+    current_season = season[0]
+    rows = zip(
+        np.asarray(home_idx).tolist(),
+        np.asarray(away_idx).tolist(),
+        np.asarray(home_score, dtype=np.float64).tolist(),
+        np.asarray(away_score, dtype=np.float64).tolist(),
+        np.asarray(neutral_site).tolist(),
+        np.asarray(season).tolist()
+    )
+    for i, (h, a, hs, aws, neutral, row_season) in enumerate(rows):
+        if row_season != current_season:
+            reset = np.array(state)
+            reset -= (reset - mean_elo) * revert_percentage
+            state = reset.tolist()
+            current_season = row_season
+        h_pre = state[h]
+        a_pre = state[a]
+        elo_diff = h_pre - a_pre + (0 if neutral == 1 else hfa)
+        expected_home_shift = 1.0 / (math.pow(10.0, (-elo_diff / width)) + 1.0)
+        expected_away_shift = 1.0 / (math.pow(10.0, (elo_diff / width)) + 1.0)
+        home_elo_pre[i] = h_pre
+        away_elo_pre[i] = a_pre
+        home_elo_prob[i] = expected_home_shift
+        away_elo_prob[i] = expected_away_shift
+
+        if hs != hs or aws != aws:
+            if not allow_future:
+                continue
+            margin = expected_home_shift - expected_away_shift
+        else:
+            margin = hs - aws
+
+        if margin > 0:
+            true_res = 1
+        elif margin < 0:
+            true_res = 0
+        else:
+            true_res = 0.5
+
+        abs_margin = abs(margin)
+        mult = math.log(max(abs_margin, 1) + 1.0) * (2.2 / (1.0 if true_res == 0.5 else ((elo_diff if true_res == 1.0 else -elo_diff) * 0.001 + 2.2)))
+        shift = (k * mult) * (true_res - expected_home_shift)
+        h_post = h_pre + shift
+        a_post = a_pre - shift
+        home_elo_post[i] = h_post
+        away_elo_post[i] = a_post
+        state[h] = h_post
+        state[a] = a_post
+
+    elos[:] = state
+    return home_elo_pre, away_elo_pre, home_elo_prob, away_elo_prob, home_elo_post, away_elo_post
 
 
 class EloRunner:
@@ -34,7 +141,10 @@ class EloRunner:
 
     Attributes:
         runner_df (pd.DataFrame): DataFrame for the EloRunner.
-        current_elos (dict): Dictionary containing current Elo ratings for teams.
+        registry (TeamRegistry): Maps team keys to dense indices into elos.
+        elos (np.ndarray): Contiguous float64 rating state indexed by registry index.
+        applied_df (pd.DataFrame): Finished events the rating state includes, in the order they were applied (upsert mode).
+        current_season (int): Season of the latest event the rating state includes.
         games (list): List to store EloGame simulation results.
         mode (str): Mode of the EloRunner ('refresh' or 'upsert').
         allow_future (bool): Flag to include future events in the simulation.
@@ -44,11 +154,15 @@ class EloRunner:
         _width (int): Lower and upper bounds of Elo ratings (mean_elo - width, mean_elo + width).
         _revert_percentage (float): Percentage of regression towards the mean. (common is 1/3 revert back to mean)
         preloaded_elos (dict): Dictionary of preloaded Elo ratings.
+        previous_elos (dict): Ratings at the end of the previous season, regressed towards the mean before the first event.
+        engine (str): Simulation engine ('python' for per row EloGame objects or 'array' for elo_kernel).
 
     Methods:
-        _load_state(df, preloaded_elos=None): Load initial or upsert state and preloaded Elo ratings.
+        _load_state(df, preloaded_elos=None, previous_elos=None): Load initial or upsert state and preloaded Elo ratings.
         run_to_date(): Run Elo simulations for each event up to the current date.
+        apply_events(events): Incrementally apply new or corrected events to the rating state.
         rating_reset(): Regression towards the mean for team ratings.
+        get_elo(team): Current Elo rating of a team.
     """
 
     def __init__(
@@ -60,7 +174,10 @@ class EloRunner:
             home_field_advantage: int = 100,
             width: int = 400,
             revert_percentage: float = 1.0 / 3,
-            preloaded_elos=None
+            preloaded_elos=None,
+            previous_elos=None,
+            engine: str = 'python',
+            registry: TeamRegistry = None
     ):
         """
         Initialize EloRunner.
@@ -75,9 +192,15 @@ class EloRunner:
             width (int): Lower and upper bounds of Elo ratings (mean_elo - width, mean_elo + width).
             revert_percentage (float): Percentage of regression towards the mean. (common is 1/3 revert back to mean)
             preloaded_elos (dict): Dictionary of preloaded Elo ratings.
+            previous_elos (dict): Ratings at the end of the previous season (see EloCheckpoint).
+            engine (str): Simulation engine ('python' or 'array'). Both produce identical ratings.
+            registry (TeamRegistry): Team index registry to share or persist (default is a new registry).
         """
         self.runner_df = pd.DataFrame()
-        self.current_elos = {}
+        self.registry = registry if registry is not None else TeamRegistry()
+        self.elos = np.empty(0, dtype=np.float64)
+        self.applied_df = pd.DataFrame(columns=upsert_load_columns + ['home_team_idx', 'away_team_idx'])
+        self.current_season = None
         self.games = []
         self.mode = mode
         self.allow_future = allow_future
@@ -88,16 +211,66 @@ class EloRunner:
         if revert_percentage > 1 or revert_percentage < 0:
             raise Exception('Invalid revert percentage')
         self._revert_percentage = revert_percentage
+        if engine not in ['python', 'array']:
+            raise Exception('Invalid engine')
+        self.engine = engine
+
+        self._load_state(df.copy(), preloaded_elos=preloaded_elos, previous_elos=previous_elos)
+
+    @property
+    def current_elos(self) -> dict:
+        """
+        Current Elo ratings keyed by team.
+
+        Returns:
+            dict: Dictionary containing current Elo ratings for teams.
+        """
+        return dict(zip(self.registry.team_ids, self.elos.tolist()))
+
+    def get_elo(self, team) -> float:
+        """
+        Current Elo rating of a team.
+
+        Args:
+            team: Team key.
+
+        Returns:
+            float: Elo rating (mean elo for teams that have not been rated).
+        """
+        if team not in self.registry:
+            return float(self._mean_elo)
+        return float(self.elos[self.registry.index_of(team)])
 
-        self._load_state(df.copy(), preloaded_elos=preloaded_elos)
+    def _team_indices(self, teams) -> np.ndarray:
+        """
+        Map team keys to registry indices, growing the rating state for newly registered teams.
+
+        Args:
+            teams: Array like of team keys.
 
-    def _load_state(self, df, preloaded_elos=None):
+        Returns:
+            np.ndarray: Dense indices aligned with teams.
+        """
+        indices = self.registry.indices_of(teams)
+        if len(self.registry) > len(self.elos):
+            self.elos = np.concatenate([self.elos, np.full(len(self.registry) - len(self.elos), self._mean_elo, dtype=np.float64)])
+        return indices
+
+    def _set_elos(self, elos: dict):
+        # Checkpoints of seasons without finished games (and before any rated season) hold no ratings
+        if len(elos) == 0:
+            return
+        teams, values = zip(*elos.items())
+        self.elos[self._team_indices(teams)] = values
+
+    def _load_state(self, df, preloaded_elos=None, previous_elos=None):
         """
         Load initial or upsert state and preloaded Elo ratings.
 
         Args:
             df (pd.DataFrame): DataFrame for EloRunner.
             preloaded_elos (dict): Dictionary of preloaded Elo ratings.
+            previous_elos (dict): Ratings at the end of the previous season.
         """
         if len(df.columns) == len(initial_load_columns):
             df = df[initial_load_columns].copy()
@@ -121,36 +294,40 @@ class EloRunner:
         df['date'] = pd.to_datetime(df['date'])
         df['neutral_site'] = df['neutral_site'].astype(int)
 
-        unique_teams = list(set(list(df.home_team_name.values) + list(df.away_team_name.values)))
-        self.current_elos = dict(zip(unique_teams, [self._mean_elo for _ in unique_teams]))
+        # Every team starts at the mean, including teams a shared registry already knows about
+        df['home_team_idx'] = self._team_indices(df.home_team_name.values)
+        df['away_team_idx'] = self._team_indices(df.away_team_name.values)
+        self.elos[:] = self._mean_elo
         df = df.sort_values(['season', 'date'])
 
         if preloaded_elos is not None:
-            self.current_elos = {**self.current_elos, **preloaded_elos}
+            self._set_elos(preloaded_elos)
             self.runner_df = df
+        elif previous_elos is not None and self.mode != 'upsert':
+            # Same state an upsert over every previous season would load, without needing those seasons
+            self._set_elos(previous_elos)
+            self.runner_df = df
+            self.rating_reset()
         elif self.mode == 'upsert':
-            # Save default elos in case there are teams that do not have a previous elo rating (new team during update)
-            default_elos = self.current_elos
+            if previous_elos is not None:
+                # Ratings carried into the first upserted season
+                self._set_elos(previous_elos)
+                self.rating_reset()
             # Determine games we need to run and save that subset as the runner_df
-            latest_df = df.loc[(
-                    (df.home_team_score.notnull()) &
-                    (df.away_team_score.notnull()) &
-                    (df.away_elo_pre.notnull()) &
-                    (df.home_elo_pre.notnull())
-            )]
-            # Get latest elo for each team
-            latest_df = df_rename_fold(latest_df, 'away_', 'home_')
-            team_latest_elos = latest_df.sort_values('date').groupby('team_name')['elo_post'].last().reset_index()
-            latest_elos = dict(zip(list(team_latest_elos.team_name.values), list(team_latest_elos.elo_post.values)))
-            self.current_elos = {**default_elos, **latest_elos}
-            df = df.sort_values(['season', 'date'])
-            self.runner_df = df.loc[~(
+            rated_mask = (
                     (df.home_team_score.notnull()) &
                     (df.away_team_score.notnull()) &
                     (df.away_elo_pre.notnull()) &
                     (df.home_elo_pre.notnull())
-            )]
-            if self.runner_df.season.min() != latest_df.season.min():
+            )
+            self.applied_df = df.loc[rated_mask].reset_index(drop=True)
+            # Get latest elo for each team. Teams without a previous elo rating (new team during update) keep the default
+            team_latest_elos = RatingIndex.from_frame(self.applied_df, key='team_idx', time='date').latest()
+            self.elos[team_latest_elos.team_idx.values.astype(np.int64)] = team_latest_elos.elo_post.values
+            self.runner_df = df.loc[~rated_mask]
+            if self.applied_df.shape[0] > 0:
+                self.current_season = self.applied_df.season.max()
+            if self.runner_df.shape[0] > 0 and self.runner_df.season.min() != self.applied_df.season.min():
                 self.rating_reset()
         else:
             self.runner_df = df
@@ -159,6 +336,18 @@ class EloRunner:
         """
         Run Elo simulations for each event up to the current date.
 
+        Returns:
+            pd.DataFrame: DataFrame containing Elo simulation results.
+        """
+        with stage('elo_run_to_date', rows=self.runner_df.shape[0]):
+            if self.engine == 'array':
+                return self._run_to_date_array()
+            return self._run_to_date_rows()
+
+    def _run_to_date_rows(self):
+        """
+        Run Elo simulations for each event up to the current date, one EloGame per event.
+
         Returns:
             pd.DataFrame: DataFrame containing Elo simulation results.
         """
@@ -176,10 +365,10 @@ class EloRunner:
                 'home_team_score': row.home_team_score,
                 'away_team_name': row.away_team_name,
                 'away_team_score': row.away_team_score,
-                'home_elo_pre': self.current_elos[row.home_team_name],
+                'home_elo_pre': self.elos[row.home_team_idx],
                 'home_elo_prob': row.home_elo_prob,
                 'home_elo_post': row.home_elo_post,
-                'away_elo_pre': self.current_elos[row.away_team_name],
+                'away_elo_pre': self.elos[row.away_team_idx],
                 'away_elo_prob': row.away_elo_prob,
                 'away_elo_post': row.away_elo_post,
             }
@@ -191,19 +380,181 @@ class EloRunner:
                 allow_future=self.allow_future
             )
             if res['home_elo_post'] is not None and res['away_elo_post'] is not None:
-                self.current_elos[row.home_team_name] = res['home_elo_post']
-                self.current_elos[row.away_team_name] = res['away_elo_post']
+                self.elos[row.home_team_idx] = res['home_elo_post']
+                self.elos[row.away_team_idx] = res['away_elo_post']
             self.games.append(res)
-        return pd.DataFrame(self.games)[upsert_load_columns]
+        self.current_season = current_season
+        return pd.DataFrame(self.games, columns=upsert_load_columns)
+
+    def _run_to_date_array(self):
+        """
+        Run Elo simulations for each event up to the current date with the array backed elo_kernel.
+
+        Returns:
+            pd.DataFrame: DataFrame containing Elo simulation results.
+        """
+        df = self.runner_df.reset_index(drop=True)
+        games_df = self._run_events(df, self.elos, allow_future=self.allow_future)
+        if df.shape[0] > 0:
+            self.current_season = df.season.values[-1]
+        return games_df[upsert_load_columns]
+
+    def _normalize_events(self, events) -> pd.DataFrame:
+        """
+        Build a runner frame (sorted, with team indices) from event records.
+
+        Args:
+            events: Iterable of event dicts or a DataFrame with the initial load columns.
+
+        Returns:
+            pd.DataFrame: Events ready to be run.
+        """
+        df = events if isinstance(events, pd.DataFrame) else pd.DataFrame(list(events), columns=initial_load_columns)
+        df = df[initial_load_columns].copy()
+        df['date'] = pd.to_datetime(df['date'])
+        df['neutral_site'] = df['neutral_site'].astype(int)
+        df['home_team_idx'] = self._team_indices(df.home_team_name.values)
+        df['away_team_idx'] = self._team_indices(df.away_team_name.values)
+        return df.sort_values(['season', 'date'], kind='stable').reset_index(drop=True)
+
+    def _run_events(self, df: pd.DataFrame, elos: np.ndarray, allow_future: bool) -> pd.DataFrame:
+        """
+        Run sorted events through elo_kernel against a rating state.
+
+        Args:
+            df (pd.DataFrame): Normalized events.
+            elos (np.ndarray): Rating state to update in place.
+            allow_future (bool): Flag to include future events in simulation.
+
+        Returns:
+            pd.DataFrame: Events with Elo results and team indices.
+        """
+        home_elo_pre, away_elo_pre, home_elo_prob, away_elo_prob, home_elo_post, away_elo_post = elo_kernel(
+            home_idx=df.home_team_idx.values,
+            away_idx=df.away_team_idx.values,
+            home_score=pd.to_numeric(df.home_team_score).astype('Float64').to_numpy(dtype=np.float64, na_value=np.nan),
+            away_score=pd.to_numeric(df.away_team_score).astype('Float64').to_numpy(dtype=np.float64, na_value=np.nan),
+            neutral_site=df.neutral_site.to_numpy(dtype=np.int64),
+            season=df.season.to_numpy(dtype=np.int64),
+            elos=elos,
+            k=self._k,
+            hfa=self._hfa,
+            width=self._width,
+            mean_elo=self._mean_elo,
+            revert_percentage=self._revert_percentage,
+            allow_future=allow_future
+        )
+        df = df.copy()
+        df['home_elo_pre'] = home_elo_pre
+        df['away_elo_pre'] = away_elo_pre
+        df['home_elo_prob'] = home_elo_prob
+        df['away_elo_prob'] = away_elo_prob
+        df['home_elo_post'] = home_elo_post
+        df['away_elo_post'] = away_elo_post
+        return df
+
+    def _rollback(self, position: int) -> pd.DataFrame:
+        """
+        Rewind the rating state to just before an applied event.
+
+        Every team that played from that event onwards gets back the pre game rating of its first event
+        since then. Only events of the current season can be rewound since season resets are not replayed.
+
+        Args:
+            position (int): Position of the event in applied_df.
+
+        Returns:
+            pd.DataFrame: The rewound events (removed from applied_df).
+        """
+        rewound_df = self.applied_df.iloc[position:]
+        if (rewound_df.season != self.current_season).any():
+            raise Exception('Replay crosses a season boundary, refresh the season instead')
+        rewound_position = np.arange(rewound_df.shape[0])
+        first_df = pd.DataFrame({
+            'position': np.concatenate([rewound_position, rewound_position]),
+            'team_idx': np.concatenate([rewound_df.home_team_idx.to_numpy(dtype=np.int64), rewound_df.away_team_idx.to_numpy(dtype=np.int64)]),
+            'elo_pre': np.concatenate([rewound_df.home_elo_pre.to_numpy(dtype=np.float64), rewound_df.away_elo_pre.to_numpy(dtype=np.float64)]),
+        }).sort_values('position', kind='stable').drop_duplicates('team_idx', keep='first')
+        self.elos[first_df.team_idx.values] = first_df.elo_pre.values
+        self.applied_df = self.applied_df.iloc[:position].reset_index(drop=True)
+        return rewound_df[initial_load_columns + ['home_team_idx', 'away_team_idx']]
+
+    def apply_events(self, events) -> pd.DataFrame:
+        """
+        Incrementally apply new or corrected events to the rating state.
+
+        Finished events are applied in chronological order and become part of the rating state. A finished
+        event whose score differs from the applied one, or that is older than the latest applied event,
+        rewinds the state to that point and replays every later event. When allow_future is set, scheduled
+        events are projected against a copy of the state so they never move the committed ratings.
+
+        Args:
+            events: Iterable of event dicts or a DataFrame with the initial load columns.
+
+        Returns:
+            pd.DataFrame: Elo results for every applied, replayed and projected event.
+        """
+        events_df = self._normalize_events(events)
+        finished_mask = (events_df.home_team_score.notnull()) & (events_df.away_team_score.notnull())
+        finished_df = events_df.loc[finished_mask]
+        scheduled_df = events_df.loc[~finished_mask]
+
+        replay_from = None
+        if finished_df.shape[0] > 0 and self.applied_df.shape[0] > 0:
+            applied_df = self.applied_df.reset_index(drop=True)
+            known_df = pd.merge(
+                finished_df[['str_event_id', 'home_team_score', 'away_team_score']],
+                applied_df[['str_event_id', 'home_team_score', 'away_team_score']].reset_index().rename(columns={'index': 'position'}),
+                on='str_event_id',
+                suffixes=('', '_applied')
+            )
+            unchanged_mask = (
+                    (known_df.home_team_score.astype(float) == known_df.home_team_score_applied.astype(float)) &
+                    (known_df.away_team_score.astype(float) == known_df.away_team_score_applied.astype(float))
+            )
+            finished_df = finished_df.loc[~finished_df.str_event_id.isin(known_df.loc[unchanged_mask].str_event_id)]
+            corrected_positions = known_df.loc[~unchanged_mask].position.values
+            if len(corrected_positions) > 0:
+                replay_from = int(corrected_positions.min())
+            new_df = finished_df.loc[~finished_df.str_event_id.isin(known_df.str_event_id)]
+            if new_df.shape[0] > 0:
+                # Late arriving events are replayed from the first applied event after them
+                earliest = (new_df.season.values[0], new_df.date.values[0])
+                later_mask = (applied_df.season.values > earliest[0]) | ((applied_df.season.values == earliest[0]) & (applied_df.date.values > earliest[1]))
+                if later_mask.any():
+                    late_position = int(np.argmax(later_mask))
+                    replay_from = late_position if replay_from is None else min(replay_from, late_position)
+
+        if replay_from is not None:
+            rewound_df = self._rollback(replay_from)
+            rewound_df = rewound_df.loc[~rewound_df.str_event_id.isin(finished_df.str_event_id)]
+            finished_df = pd.concat([rewound_df, finished_df]).sort_values(['season', 'date'], kind='stable').reset_index(drop=True)
+
+        results = []
+        if finished_df.shape[0] > 0:
+            if self.current_season is not None and finished_df.season.values[0] != self.current_season:
+                self.rating_reset()
+            applied_df = self._run_events(finished_df, self.elos, allow_future=False)
+            self.current_season = finished_df.season.values[-1]
+            self.applied_df = pd.concat([self.applied_df, applied_df[upsert_load_columns + ['home_team_idx', 'away_team_idx']]], ignore_index=True)
+            results.append(applied_df)
+
+        if self.allow_future and scheduled_df.shape[0] > 0:
+            projected_elos = self.elos.copy()
+            if self.current_season is not None and scheduled_df.season.values[0] != self.current_season:
+                projected_elos -= (projected_elos - self._mean_elo) * self._revert_percentage
+            results.append(self._run_events(scheduled_df, projected_elos, allow_future=True))
+
+        if len(results) == 0:
+            return pd.DataFrame(columns=upsert_load_columns)
+        return pd.concat(results, ignore_index=True)[upsert_load_columns]
 
     def rating_reset(self):
         """
         Regression towards the mean for team ratings.
         """
-        team_names, elos = zip(*self.current_elos.items())
-        diff_from_mean = np.array(elos) - self._mean_elo  # Default mean or actual list mean?
-        elos -= diff_from_mean * (self._revert_percentage)
-        self.current_elos = dict(zip(team_names, elos))
+        diff_from_mean = self.elos - self._mean_elo  # Default mean or actual list mean?
+        self.elos -= diff_from_mean * (self._revert_percentage)
 
 
 class EloGame:
@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+
+EPS = np.finfo(np.float64).eps
+
+
+def _season_sums(boundaries: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Sum season sorted values per season.
+
+    Args:
+        boundaries (np.ndarray): Start position of each season in the sorted values.
+        values (np.ndarray): Values sorted by season.
+
+    Returns:
+        np.ndarray: Sum per season (0 for an empty array).
+    """
+    if values.shape[0] == 0:
+        return np.zeros(boundaries.shape[0], dtype=np.float64)
+    return np.add.reduceat(values, boundaries)
+
+
+def _nanmean(values: np.ndarray) -> float:
+    """
+    Mean skipping NaN (like pandas), NaN if every value is NaN.
+    """
+    values = values[~np.isnan(values)]
+    return float(values.mean()) if values.shape[0] > 0 else float('nan')
+
+
+class SystemEvaluation:
+    """
+    One pass evaluation engine for the system evaluation report.
+
+    The events are sorted by season once and every additive statistic (squared errors, log losses, confusion
+    counts, regression errors, per team game counts and scores, home wins) is reduced per season in a single
+    grouped NumPy pass. Any season slice ('ALL' or a single season) is then evaluated from the per season sums
+    without touching the events again, with the same metrics as the sklearn based evaluation:
+
+        - Classification on result vs home_elo_prob: accuracy, precision, recall, f1 and AUC of the 0.5
+          thresholded prediction, brier score, log loss (clipped by machine epsilon) and the system score.
+        - Regression of point_dif vs elo_spread: mse, mae, mape and r2 with elo_spread as the reference
+          values (matching the argument order the report has always used).
+        - Average games played and points per game per team (mean over teams, then over seasons) and the
+          home win percentage of non neutral site events (mean over seasons).
+
+    Attributes:
+        seasons (np.ndarray): Seasons present in the evaluation events, ascending.
+
+    Methods:
+        evaluate(season='ALL'): Metrics of a season slice in the system_evaluation.json shape.
+    """
+
+    def __init__(self, eval_df: pd.DataFrame):
+        """
+        Initialize SystemEvaluation and reduce the per season statistics.
+
+        Args:
+            eval_df (pd.DataFrame): Finished events with season, result, home_elo_prob, point_dif, elo_spread,
+                neutral_site, id, home_team_name, home_team_score, away_team_name and away_team_score columns.
+        """
+        eval_df = eval_df.sort_values('season', kind='stable')
+        season = eval_df.season.to_numpy(dtype=np.int64)
+        self.seasons, boundaries = np.unique(season, return_index=True)
+
+        # Classification
+        y = eval_df.result.to_numpy(dtype=np.float64, na_value=np.nan)
+        prob = eval_df.home_elo_prob.to_numpy(dtype=np.float64, na_value=np.nan)
+        pred = (prob > 0.5).astype(np.float64)
+        clipped = np.clip(prob, EPS, 1 - EPS)
+        total = (1 - clipped) + clipped
+        loss = -np.where(y == 1, np.log(clipped / total), np.log((1 - clipped) / total))
+        error = np.round(prob, 2) - y
+        self._records = _season_sums(boundaries, np.ones(season.shape[0]))
+        self._positives = _season_sums(boundaries, y)
+        self._brier = _season_sums(boundaries, (prob - y) ** 2)
+        self._log_loss = _season_sums(boundaries, loss)
+        self._tp = _season_sums(boundaries, pred * y)
+        self._fp = _season_sums(boundaries, pred * (1 - y))
+        self._fn = _season_sums(boundaries, (1 - pred) * y)
+        self._score = _season_sums(boundaries, 25 - 100 * error)
+
+        # Regression (elo_spread is the reference value)
+        reference = eval_df.elo_spread.to_numpy(dtype=np.float64, na_value=np.nan)
+        estimate = eval_df.point_dif.to_numpy(dtype=np.float64, na_value=np.nan)
+        residual = reference - estimate
+        self._squared_error = _season_sums(boundaries, residual ** 2)
+        self._absolute_error = _season_sums(boundaries, np.abs(residual))
+        self._percentage_error = _season_sums(boundaries, np.abs(residual) / np.maximum(np.abs(reference), EPS))
+        self._reference_sum = _season_sums(boundaries, reference)
+        reference_mean = np.repeat(self._reference_sum / np.maximum(self._records, 1), np.diff(np.append(boundaries, season.shape[0])))
+        self._reference_ss = _season_sums(boundaries, (reference - reference_mean) ** 2)
+
+        # Games played and points per game per team, averaged over teams per season
+        team_names = np.concatenate([eval_df.home_team_name.to_numpy(dtype=object, na_value=None), eval_df.away_team_name.to_numpy(dtype=object, na_value=None)])
+        team_scores = np.concatenate([eval_df.home_team_score.to_numpy(dtype=np.float64, na_value=np.nan), eval_df.away_team_score.to_numpy(dtype=np.float64, na_value=np.nan)])
+        team_seasons = np.concatenate([season, season])
+        team_codes, team_uniques = pd.factorize(team_names)
+        named = team_codes >= 0
+        # Dense (season, team) cells, counted without sorting
+        cells = np.searchsorted(self.seasons, team_seasons[named]) * len(team_uniques) + team_codes[named]
+        scored = ~np.isnan(team_scores[named])
+        shape = (self.seasons.shape[0], len(team_uniques))
+        rows = np.bincount(cells, minlength=shape[0] * shape[1]).reshape(shape)
+        games = np.bincount(cells, weights=scored, minlength=shape[0] * shape[1]).reshape(shape)
+        points = np.bincount(cells, weights=np.where(scored, team_scores[named], 0), minlength=shape[0] * shape[1]).reshape(shape)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self._avg_games = games.sum(axis=1, where=rows > 0) / (rows > 0).sum(axis=1)
+            self._avg_points = (points / games).sum(axis=1, where=games > 0) / (games > 0).sum(axis=1)
+
+        # Home win percentage of non neutral site events
+        home = eval_df.neutral_site.to_numpy(dtype=np.int64) == 0
+        home_win = eval_df.home_team_score.to_numpy(dtype=np.float64, na_value=np.nan) > eval_df.away_team_score.to_numpy(dtype=np.float64, na_value=np.nan)
+        has_id = eval_df.id.notnull().to_numpy()
+        home_games = _season_sums(boundaries, (home & has_id).astype(np.float64))
+        home_wins = _season_sums(boundaries, (home & home_win).astype(np.float64))
+        self._has_home_games = _season_sums(boundaries, home.astype(np.float64)) > 0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self._home_win_percentage = home_wins / home_games
+
+    def _slice(self, season) -> np.ndarray:
+        if season == 'ALL':
+            return np.ones(self.seasons.shape[0], dtype=bool)
+        return self.seasons == season
+
+    def evaluate(self, season='ALL'):
+        """
+        Metrics of a season slice in the system_evaluation.json shape.
+
+        Args:
+            season (str | int): 'ALL' or a season.
+
+        Returns:
+            dict or None: System evaluation metrics, None if the slice has no events.
+        """
+        in_slice = self._slice(season)
+        n = self._records[in_slice].sum()
+        if n == 0:
+            return None
+        positives = self._positives[in_slice].sum()
+        tp = self._tp[in_slice].sum()
+        fp = self._fp[in_slice].sum()
+        fn = self._fn[in_slice].sum()
+        tn = n - tp - fp - fn
+        single_class = positives == 0 or positives == n
+        tpr = tp / (tp + fn) if tp + fn > 0 else 0.0
+        fpr = fp / (fp + tn) if fp + tn > 0 else 0.0
+
+        reference_mean = self._reference_sum[in_slice].sum() / n
+        season_means = self._reference_sum[in_slice] / np.maximum(self._records[in_slice], 1)
+        reference_ss = (self._reference_ss[in_slice] + self._records[in_slice] * (season_means - reference_mean) ** 2).sum()
+        squared_error = self._squared_error[in_slice].sum()
+        if n < 2:
+            r2 = float('nan')
+        elif reference_ss == 0:
+            r2 = 1.0 if squared_error == 0 else 0.0
+        else:
+            r2 = 1 - squared_error / reference_ss
+
+        avg_games = self._avg_games[in_slice]
+        avg_points = self._avg_points[in_slice]
+        home_win_percentage = self._home_win_percentage[in_slice & self._has_home_games]
+        return {
+            'system_accuracy': float((tp + tn) / n),
+            'system_precision': float(tp / (tp + fp)) if tp + fp > 0 else 0.0,
+            'system_recall': float(tp / (tp + fn)) if tp + fn > 0 else 0.0,
+            'system_f1': float(2 * tp / (2 * tp + fp + fn)) if tp + fp + fn > 0 else 0.0,
+            'system_auc': None if single_class else float((tpr - fpr + 1) / 2),
+            'system_brier_score': float(self._brier[in_slice].sum() / n),
+            'system_log_loss': None if single_class else float(self._log_loss[in_slice].sum() / n),
+            'system_score': float(np.round(self._score[in_slice].sum() / n, 2)),
+            'system_records': int(n),
+            'system_mse': float(squared_error / n),
+            'system_mae': float(self._absolute_error[in_slice].sum() / n),
+            'system_mape': float(self._percentage_error[in_slice].sum() / n),
+            'system_r2': float(r2),
+            'avg_number_of_games_played': _nanmean(avg_games),
+            'avg_points_per_game': _nanmean(avg_points),
+            'home_win_percentage': _nanmean(home_win_percentage),
+        }
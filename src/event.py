@@ -5,7 +5,264 @@ import pandas as pd
 
 from src.base_api import ESPNBaseAPI
 from src.consts import ESPNSportTypes, ESPNSportSeasonTypes, ESPNEventStatusTypes
-from src.utils import name_filter
+from src.manifest import hash_object
+from src.response_cache import scoreboard_ttl
+from src.utils import name_filter, to_arrow_schema
+
+EVENTS_SCHEMA = {
+    'id':np.int64,
+    'season':np.int32,
+    'is_postseason': np.int8,
+    'tournament_id':'Int32',
+    'is_finished': np.int8,
+    'neutral_site': np.int8,
+    'home_team_id':np.int32,
+    'home_team_score':'Int32',
+    'away_team_id':np.int32,
+    'away_team_score':'Int32',
+}
+EVENTS_ARROW_SCHEMA = to_arrow_schema(EVENTS_SCHEMA)
+EVENTS_COLUMNS = [
+    'id', 'str_event_id', 'season', 'is_postseason', 'tournament_id', 'is_finished', 'neutral_site', 'date', 'datetime',
+    'home_team_id', 'home_team_name', 'home_team_score', 'away_team_id', 'away_team_name', 'away_team_score',
+]
+
+
+def validate_team_name(name):
+    """
+    Validate and filter team names.
+
+    Args:
+        name: Team name.
+
+    Returns:
+        str: Validated and filtered team name.
+    """
+    if name[0] == '[' and name[-1] == ']':
+        name = name[1:].split(',')[0]
+    return name_filter(name)
+
+
+def get_name_type(sport: ESPNSportTypes) -> str:
+    """
+    Team name field of the scoreboard competitors used for a sport.
+
+    Args:
+        sport (ESPNSportTypes): Type of sport.
+
+    Returns:
+        str: Competitor team name field.
+    """
+    if sport == ESPNSportTypes.COLLEGE_HOCKEY:
+        return 'displayName'
+    elif sport == ESPNSportTypes.COLLEGE_LACROSSE:
+        return 'abbreviation'
+    return 'shortDisplayName'
+
+
+class EloEventColumns:
+    """
+    Column builders for Elo events parsed in batch from scoreboard responses.
+
+    Scoreboard events are walked once and their raw fields appended straight to per column buffers (no record
+    dictionary, timestamp or string formatting per event). to_dataframe then parses every timestamp in one
+    vectorized call, filters each distinct team name once and builds typed columns, so the result has the columns
+    and dtypes of create_dataframe(records, EVENTS_SCHEMA) over _collect_elo_payload records and is ready for
+    put_dataframe with EVENTS_ARROW_SCHEMA.
+
+    Methods:
+        append_events(events, sport, name_type): Append the Elo events of a scoreboard response.
+        event_ids(): ESPN ids of the events.
+        is_final(): Whether every event is final.
+        fingerprint(): Content hash of the buffered events.
+        concat(batches): Concatenate batches in order.
+        to_dataframe(): Typed events DataFrame.
+    """
+    _BUFFERS = [
+        'id', 'season', 'is_postseason', 'tournament_id', 'status_finished', 'neutral_site', 'date',
+        'home_team_id', 'home_team_name', 'home_team_score', 'away_team_id', 'away_team_name', 'away_team_score',
+    ]
+
+    def __init__(self):
+        """
+        Initialize empty EloEventColumns.
+        """
+        self._buffers = {name: [] for name in self._BUFFERS}
+        self._open_events = 0
+
+    def __len__(self):
+        return len(self._buffers['id'])
+
+    def append_events(self, events: list, sport: ESPNSportTypes, name_type: str = 'shortDisplayName'):
+        """
+        Append the regular and post season events that are scheduled or final (same selection as
+        _collect_elo_payload).
+
+        Args:
+            events (list): Events of a scoreboard response.
+            sport (ESPNSportTypes): Type of sport.
+            name_type (str): Competitor team name field.
+        """
+        season_types = [ESPNSportSeasonTypes.REG.value, ESPNSportSeasonTypes.POST.value]
+        status_types = [ESPNEventStatusTypes.SCHEDULED.value, ESPNEventStatusTypes.FINAL.value]
+        open_types = [ESPNEventStatusTypes.SCHEDULED.value, ESPNEventStatusTypes.IN_PROGRESS.value]
+        buffers = self._buffers
+        for event in events:
+            try:
+                season_type = event['season']['type']
+                # Select only regular and post season games
+                if season_type not in season_types and sport != ESPNSportTypes.SOCCER_EPL:
+                    continue
+                if 'status' not in event:
+                    self._open_events = self._open_events + 1
+                    print('-' * 30)
+                    print(f"Missing Status: {event['id']}")
+                    print(event)
+                    print('-' * 30)
+                    status_finished = None  # Resolved from the event date in to_dataframe
+                else:
+                    # Select games that are scheduled or final
+                    status_id = int(event['status']['type']['id'])
+                    if status_id in open_types:
+                        self._open_events = self._open_events + 1
+                    if status_id not in status_types:
+                        continue
+                    status_finished = status_id == ESPNEventStatusTypes.FINAL.value
+                competition = event['competitions'][0]
+                home_team = competition['competitors'][0]
+                away_team = competition['competitors'][1]
+                try:
+                    home_score = int(home_team['score']) if home_team['score'] is not None else None
+                    away_score = int(away_team['score']) if away_team['score'] is not None else None
+                except Exception:
+                    home_score = None
+                    away_score = None
+                row = (
+                    event['id'], event['season']['year'], int(season_type) == ESPNSportSeasonTypes.POST.value,
+                    competition.get('tournamentId'), status_finished, competition['neutralSite'], event['date'],
+                    home_team['id'], home_team['team'][name_type], home_score,
+                    away_team['id'], away_team['team'][name_type], away_score,
+                )
+            except Exception as e:
+                print(f"Event Parsing Error: {event.get('id')}")
+                print(e)
+                continue
+            for name, value in zip(self._BUFFERS, row):
+                buffers[name].append(value)
+
+    def event_ids(self) -> list:
+        """
+        ESPN ids of the events.
+
+        Returns:
+            list: Event ids as int.
+        """
+        return [int(event_id) for event_id in self._buffers['id']]
+
+    def is_final(self) -> bool:
+        """
+        Whether every appended event is settled: no scheduled, in progress or status-less event was seen (canceled
+        and postponed events are settled on their original date).
+
+        Returns:
+            bool: True if there are events and none of them is open.
+        """
+        return len(self) > 0 and self._open_events == 0
+
+    def fingerprint(self) -> str:
+        """
+        Content hash of the buffered events.
+
+        Returns:
+            str: sha256 hex digest.
+        """
+        return hash_object(self._buffers)
+
+    @classmethod
+    def concat(cls, batches: list):
+        """
+        Concatenate batches in order.
+
+        Args:
+            batches (list): EloEventColumns to concatenate.
+
+        Returns:
+            EloEventColumns: Events of every batch.
+        """
+        columns = cls()
+        for batch in batches:
+            for name in cls._BUFFERS:
+                columns._buffers[name].extend(batch._buffers[name])
+            columns._open_events = columns._open_events + batch._open_events
+        return columns
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """
+        Typed events DataFrame (EVENTS_COLUMNS with the EVENTS_SCHEMA dtypes).
+
+        Returns:
+            pd.DataFrame: Events, without those whose date or team names cannot be parsed.
+        """
+        buffers = self._buffers
+        # Each distinct team name is filtered once, events with a name that fails are dropped like in
+        # _collect_elo_payload
+        names = {}
+        errors = {}
+        for name in set(buffers['home_team_name']) | set(buffers['away_team_name']):
+            try:
+                names[name] = validate_team_name(name)
+            except Exception as e:
+                errors[name] = e
+        datetimes = pd.to_datetime(pd.Series(buffers['date'], dtype=object), utc=True, errors='coerce', format='ISO8601')
+        valid = datetimes.notnull().to_numpy()
+        if len(errors) > 0 or not valid.all():
+            for i, (event_id, home, away) in enumerate(zip(buffers['id'], buffers['home_team_name'], buffers['away_team_name'])):
+                error = errors.get(home, errors.get(away))
+                if error is not None or not valid[i]:
+                    valid[i] = False
+                    print(f'Event Parsing Error: {event_id}')
+                    if error is not None:
+                        print(error)
+        datetimes = datetimes[valid].reset_index(drop=True)
+
+        def column(name, dtype=object):
+            values = np.asarray(buffers[name], dtype=object)[valid]
+            return values if dtype is object else values.astype(dtype)
+
+        days = np.datetime_as_string(datetimes.dt.tz_localize(None).to_numpy(dtype='datetime64[D]'), unit='D').astype(object)
+        status_finished = column('status_finished')
+        # Events without a status are finished once they started
+        unknown = np.array([value is None for value in status_finished.tolist()], dtype=bool)
+        is_finished = np.where(unknown, (datetimes < pd.Timestamp.now(tz='UTC')).to_numpy(), status_finished.astype(bool))
+
+        home_team_name = column('home_team_name')
+        away_team_name = column('away_team_name')
+        home_team_name = np.array([names[name] for name in home_team_name.tolist()], dtype=object)
+        away_team_name = np.array([names[name] for name in away_team_name.tolist()], dtype=object)
+
+        def scores(name):
+            values = column(name)
+            values[~is_finished] = None
+            return pd.array(values.tolist(), dtype=EVENTS_SCHEMA[name])
+
+        df = pd.DataFrame({
+            'id': column('id').astype(str).astype(EVENTS_SCHEMA['id']),
+            'str_event_id': np.array([f"{day.replace('-', '')}_{home}_{away}" for day, home, away in zip(days.tolist(), home_team_name.tolist(), away_team_name.tolist())], dtype=object),
+            'season': column('season', EVENTS_SCHEMA['season']),
+            'is_postseason': column('is_postseason', EVENTS_SCHEMA['is_postseason']),
+            'tournament_id': pd.array(column('tournament_id').tolist(), dtype=EVENTS_SCHEMA['tournament_id']),
+            'is_finished': is_finished.astype(EVENTS_SCHEMA['is_finished']),
+            'neutral_site': column('neutral_site', EVENTS_SCHEMA['neutral_site']),
+            'date': days,
+            'datetime': datetimes,
+            'home_team_id': column('home_team_id').astype(str).astype(EVENTS_SCHEMA['home_team_id']),
+            'home_team_name': home_team_name,
+            'home_team_score': scores('home_team_score'),
+            'away_team_id': column('away_team_id').astype(str).astype(EVENTS_SCHEMA['away_team_id']),
+            'away_team_name': away_team_name,
+            'away_team_score': scores('away_team_score'),
+        })
+        return df[EVENTS_COLUMNS]
 
 
 class ESPNEventsAPI(ESPNBaseAPI):
@@ -14,36 +271,32 @@ class ESPNEventsAPI(ESPNBaseAPI):
 
     Attributes:
         SCHEMA (dict): Dictionary defining the data schema for events.
+        ARROW_SCHEMA (pa.Schema): Declared Arrow schema of SCHEMA used when storing events.
 
     Methods:
         get_scoreboard(sport, dates, limit=1000, groups=None): Retrieve scoreboard data for a specific sport.
         get_events(sport, dates, limit=1000, groups=None): Retrieve events data for a specific sport.
         get_events_for_elo(sport, dates, limit=1000, groups=None): Retrieve events data suitable for Elo calculations.
+        get_event_columns_for_elo(sport, dates, limit=1000, groups=None): Same events as column buffers.
         _collect_elo_payload(event, name_type='shortDisplayName'): Collect Elo payload for a given event.
         _team_name_validator(name): Validate and filter team names.
 
     """
-    def __init__(self):
+    def __init__(self, **kwargs):
         """
         Initialize ESPNEventsAPI.
+
+        Args:
+            **kwargs: Transport settings passed to ESPNBaseAPI (pool_size, max_retries, requests_per_second, ...).
         """
-        super().__init__()
-        self.SCHEMA = {
-            'id':np.int64,
-            'season':np.int32,
-            'is_postseason': np.int8,
-            'tournament_id':'Int32',
-            'is_finished': np.int8,
-            'neutral_site': np.int8,
-            'home_team_id':np.int32,
-            'home_team_score':'Int32',
-            'away_team_id':np.int32,
-            'away_team_score':'Int32',
-        }
+        super().__init__(**kwargs)
+        self.SCHEMA = EVENTS_SCHEMA
+        self.ARROW_SCHEMA = EVENTS_ARROW_SCHEMA
 
     def get_scoreboard(self, sport: ESPNSportTypes, dates, limit=1000, groups=None):
         """
-        Retrieve scoreboard data for a specific sport.
+        Retrieve scoreboard data for a specific sport. Scoreboards of settled dates are cached forever,
+        recent ones only for a few minutes.
 
         Args:
             sport (ESPNSportTypes): Type of sport.
@@ -57,7 +310,7 @@ class ESPNEventsAPI(ESPNBaseAPI):
         url = f"{self._base_url}/{sport.value}/scoreboard?dates={dates}&limit={limit}"
         if groups is not None:
             url=f"{url}&groups={groups}"
-        return self.api_request(url)
+        return self.api_request(url, cache_ttl=scoreboard_ttl(dates))
 
     def get_events(self, sport: ESPNSportTypes, dates, limit=1000, groups=None):
         """
@@ -92,18 +345,29 @@ class ESPNEventsAPI(ESPNBaseAPI):
         """
         events = self.get_events(sport, dates, limit, groups)
         elos = []
-        if sport == ESPNSportTypes.COLLEGE_HOCKEY:
-            name_type = 'displayName'
-        elif sport == ESPNSportTypes.COLLEGE_LACROSSE:
-            name_type = 'abbreviation'
-        else:
-            name_type = 'shortDisplayName'
+        name_type = get_name_type(sport)
         for event in events:
             elo = self._collect_elo_payload(event,sport,name_type)
             if elo is not None:
                 elos.append(elo)
         return elos
 
+    def get_event_columns_for_elo(self, sport: ESPNSportTypes, dates, limit=1000, groups=None) -> EloEventColumns:
+        """
+        Retrieve events data suitable for Elo calculations as column buffers (see EloEventColumns).
+
+        Args:
+            sport (ESPNSportTypes): Type of sport.
+            dates: Dates for events.
+            limit (int): Limit of events to retrieve.
+            groups: Groups for events.
+
+        Returns:
+            EloEventColumns: Events data suitable for Elo calculations.
+        """
+        columns = EloEventColumns()
+        columns.append_events(self.get_events(sport, dates, limit, groups), sport, get_name_type(sport))
+        return columns
 
     def _collect_elo_payload(self,event,sport:ESPNSportTypes, name_type='shortDisplayName'):
         """
@@ -193,8 +457,6 @@ class ESPNEventsAPI(ESPNBaseAPI):
         Returns:
             str: Validated and filtered team name.
         """
-        if name[0] == '[' and name[-1] == ']':
-            name = name[1:].split(',')[0]
-        return name_filter(name)
+        return validate_team_name(name)
 
 
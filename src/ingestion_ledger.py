@@ -0,0 +1,197 @@
+import datetime
+import json
+import os
+import time
+
+from src.consts import ESPNSportTypes
+
+# A closed on-day (every event final) is still refetched until its payload has been unchanged this long, so late
+# score corrections are picked up
+LEDGER_RECHECK_SECONDS = 2 * 24 * 60 * 60
+# On-days further ahead than this are only refetched once their entry is this old (schedules rarely change)
+LEDGER_FUTURE_DAYS = 7
+
+
+class IngestionLedger:
+    """
+    Per sport ledger of the fetched scoreboard on-days, used to only refetch on-days that can still change.
+
+    Every fetched on-day is recorded per season with its fetch time, event count, whether all of its events were
+    final, a hash of the parsed events and their ESPN ids. An on-day is refetched when it was never fetched, is
+    still open (scheduled or in progress events) and not far in the future, or changed within the recheck window.
+    Stored as one JSON file per sport.
+
+    Attributes:
+        seasons (dict): On-day entries (keyed by 'YYYYMMDD') keyed by season.
+
+    Methods:
+        has_season(season): Whether the ledger has entries for a season.
+        needs_fetch(season, day, now): Whether an on-day has to be refetched.
+        select(season, days, now): On-days of a season that have to be refetched.
+        event_ids(season, days): ESPN ids last fetched for on-days.
+        record(season, day, events, now): Record a fetched on-day.
+        settle(season, days, now): Record on-days as closed without fetching them.
+        reset(season): Drop the entries of a season.
+        load(root_path, sport): Load the ledger of a sport.
+        save(root_path, sport): Persist the ledger of a sport.
+    """
+
+    def __init__(self, seasons: dict = None):
+        """
+        Initialize IngestionLedger.
+
+        Args:
+            seasons (dict): On-day entries keyed by season (default is None).
+        """
+        self.seasons = seasons if seasons is not None else {}
+
+    @staticmethod
+    def _key(day: datetime.datetime) -> str:
+        return day.strftime('%Y%m%d')
+
+    def has_season(self, season: int) -> bool:
+        """
+        Whether the ledger has entries for a season.
+
+        Args:
+            season (int): Season year.
+
+        Returns:
+            bool: True if at least one on-day of the season is recorded.
+        """
+        return len(self.seasons.get(season, {})) > 0
+
+    def needs_fetch(self, season: int, day: datetime.datetime, now: float = None) -> bool:
+        """
+        Whether an on-day has to be refetched.
+
+        Args:
+            season (int): Season year.
+            day (datetime.datetime): On-day.
+            now (float): Current unix time (default is None for time.time()).
+
+        Returns:
+            bool: True if the on-day was never fetched, is open or changed recently.
+        """
+        now = time.time() if now is None else now
+        entry = self.seasons.get(season, {}).get(self._key(day))
+        if entry is None:
+            return True
+        today = datetime.datetime.utcfromtimestamp(now).date()
+        if day.date() > today + datetime.timedelta(days=LEDGER_FUTURE_DAYS):
+            return now - entry['fetched_at'] >= LEDGER_FUTURE_DAYS * 24 * 60 * 60
+        # Past on-days without events are closed once the recheck window has passed
+        closed = entry['final'] or (entry['events'] == 0 and day.date() < today - datetime.timedelta(seconds=LEDGER_RECHECK_SECONDS))
+        return not closed or now - entry['changed_at'] < LEDGER_RECHECK_SECONDS
+
+    def select(self, season: int, days: list, now: float = None) -> list:
+        """
+        On-days of a season that have to be refetched.
+
+        Args:
+            season (int): Season year.
+            days (list): On-days of the season.
+            now (float): Current unix time (default is None for time.time()).
+
+        Returns:
+            list: On-days to fetch, in order.
+        """
+        return [day for day in days if self.needs_fetch(season, day, now)]
+
+    def event_ids(self, season: int, days: list) -> list:
+        """
+        ESPN ids of the events last fetched for on-days.
+
+        Args:
+            season (int): Season year.
+            days (list): On-days.
+
+        Returns:
+            list: Event ids.
+        """
+        entries = self.seasons.get(season, {})
+        return [event_id for day in days for event_id in entries.get(self._key(day), {}).get('ids', [])]
+
+    def record(self, season: int, day: datetime.datetime, events, now: float = None):
+        """
+        Record a fetched on-day.
+
+        Args:
+            season (int): Season year.
+            day (datetime.datetime): On-day.
+            events (EloEventColumns): Events fetched for the on-day.
+            now (float): Current unix time (default is None for time.time()).
+        """
+        now = time.time() if now is None else now
+        entries = self.seasons.setdefault(season, {})
+        previous = entries.get(self._key(day))
+        payload_hash = events.fingerprint()
+        entries[self._key(day)] = {
+            'fetched_at': now,
+            'changed_at': previous['changed_at'] if previous is not None and previous['hash'] == payload_hash else now,
+            'events': len(events),
+            'final': events.is_final(),
+            'hash': payload_hash,
+            'ids': events.event_ids(),
+        }
+
+    def settle(self, season: int, days: list, now: float = None):
+        """
+        Record on-days as closed without fetching them (their events are already stored).
+
+        Args:
+            season (int): Season year.
+            days (list): On-days.
+            now (float): Current unix time (default is None for time.time()).
+        """
+        now = time.time() if now is None else now
+        entries = self.seasons.setdefault(season, {})
+        for day in days:
+            if self._key(day) not in entries:
+                entries[self._key(day)] = {'fetched_at': now, 'changed_at': 0.0, 'events': None, 'final': True, 'hash': None, 'ids': []}
+
+    def reset(self, season: int):
+        """
+        Drop the entries of a season.
+
+        Args:
+            season (int): Season year.
+        """
+        self.seasons.pop(season, None)
+
+    @staticmethod
+    def _path(root_path: str, sport: ESPNSportTypes) -> str:
+        return f'{root_path}/{sport.value}.json'
+
+    @classmethod
+    def load(cls, root_path: str, sport: ESPNSportTypes):
+        """
+        Load the ledger of a sport. A missing ledger loads as an empty one.
+
+        Args:
+            root_path (str): Root path for ledgers (one JSON file per sport).
+            sport (ESPNSportTypes): Type of sport.
+
+        Returns:
+            IngestionLedger: Loaded ledger.
+        """
+        path = cls._path(root_path, sport)
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r') as json_file:
+            return cls({int(season): entries for season, entries in json.load(json_file).items()})
+
+    def save(self, root_path: str, sport: ESPNSportTypes):
+        """
+        Persist the ledger of a sport.
+
+        Args:
+            root_path (str): Root path for ledgers (one JSON file per sport).
+            sport (ESPNSportTypes): Type of sport.
+        """
+        path = self._path(root_path, sport)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as json_file:
+            json.dump({str(season): dict(sorted(entries.items())) for season, entries in sorted(self.seasons.items())}, json_file)
+        os.replace(tmp_path, path)
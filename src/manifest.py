@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+
+from src.consts import ESPNSportTypes
+
+
+def hash_object(obj) -> str:
+    """
+    Content hash of a JSON serializable object (hyperparameters, ratings, window keys).
+
+    Args:
+        obj: Object to hash. Dictionaries are hashed with sorted keys.
+
+    Returns:
+        str: sha256 hex digest.
+    """
+    return hashlib.sha256(json.dumps(obj, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+class Manifest:
+    """
+    Record of the inputs and outputs of the last run of a pipeline stage for a sport.
+
+    Each unit of work (a season, or the reports of a sport) is stored under a key with a fingerprint of its
+    inputs (content hashes of the input files plus the hyperparameters used) and the content hashes of the
+    outputs it wrote. A unit can be skipped when its inputs are byte-identical to the last run and its outputs
+    were not changed since. File hashes are reused while a file's size and mtime are unchanged, so an unchanged
+    tree is not re-read.
+
+    Attributes:
+        entries (dict): Entries keyed by unit with fingerprint and outputs.
+        files (dict): Known file hashes keyed by path with size, mtime_ns and sha256.
+
+    Methods:
+        file_hash(path): Content hash of a file.
+        fingerprint(paths, params): Fingerprint of the input files and parameters of a unit.
+        is_unchanged(key, fingerprint): Check whether a unit can be skipped.
+        record(key, fingerprint, output_paths): Record a completed unit.
+        load(root_path, stage, sport): Load the manifest of a stage for a sport.
+        save(root_path, stage, sport): Persist the manifest of a stage for a sport.
+    """
+
+    def __init__(self, entries: dict = None, files: dict = None):
+        """
+        Initialize Manifest.
+
+        Args:
+            entries (dict): Entries keyed by unit (default is None).
+            files (dict): Known file hashes keyed by path (default is None).
+        """
+        self.entries = entries if entries is not None else {}
+        self.files = files if files is not None else {}
+
+    def file_hash(self, path: str):
+        """
+        Content hash of a file.
+
+        Args:
+            path (str): File path.
+
+        Returns:
+            str or None: sha256 hex digest, None if the file does not exist.
+        """
+        if not os.path.exists(path):
+            return None
+        stat = os.stat(path)
+        known = self.files.get(path)
+        if known is not None and known['size'] == stat.st_size and known['mtime_ns'] == stat.st_mtime_ns:
+            return known['sha256']
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                digest.update(chunk)
+        self.files[path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest.hexdigest()}
+        return digest.hexdigest()
+
+    def fingerprint(self, paths: list, params: dict) -> str:
+        """
+        Fingerprint of the input files and parameters of a unit.
+
+        Args:
+            paths (list): Input file paths.
+            params (dict): Hyperparameters and any other inputs that change the output.
+
+        Returns:
+            str: sha256 hex digest.
+        """
+        return hash_object({
+            'files': {path: self.file_hash(path) for path in paths},
+            'params': params,
+        })
+
+    def is_unchanged(self, key: str, fingerprint: str) -> bool:
+        """
+        Check whether a unit can be skipped: same input fingerprint as the last run and outputs untouched since.
+
+        Args:
+            key (str): Unit key.
+            fingerprint (str): Input fingerprint of the unit.
+
+        Returns:
+            bool: True if the unit can be skipped.
+        """
+        entry = self.entries.get(key)
+        if entry is None or entry['fingerprint'] != fingerprint:
+            return False
+        return all(self.file_hash(path) == output_hash for path, output_hash in entry['outputs'].items())
+
+    def record(self, key: str, fingerprint: str, output_paths: list):
+        """
+        Record a completed unit.
+
+        Args:
+            key (str): Unit key.
+            fingerprint (str): Input fingerprint of the unit.
+            output_paths (list): Files written by the unit.
+        """
+        self.entries[key] = {
+            'fingerprint': fingerprint,
+            'outputs': {path: self.file_hash(path) for path in output_paths},
+        }
+
+    @staticmethod
+    def _path(root_path: str, stage: str, sport: ESPNSportTypes) -> str:
+        return f'{root_path}/{stage}/{sport.value}.json'
+
+    @classmethod
+    def load(cls, root_path: str, stage: str, sport: ESPNSportTypes):
+        """
+        Load the manifest of a stage for a sport. A missing manifest loads as an empty one.
+
+        Args:
+            root_path (str): Root path for manifests.
+            stage (str): Pipeline stage (e.g. 'elo', 'reports').
+            sport (ESPNSportTypes): Type of sport.
+
+        Returns:
+            Manifest: Loaded manifest.
+        """
+        path = cls._path(root_path, stage, sport)
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r') as json_file:
+            data = json.load(json_file)
+        return cls(data['entries'], data['files'])
+
+    def save(self, root_path: str, stage: str, sport: ESPNSportTypes):
+        """
+        Persist the manifest of a stage for a sport.
+
+        Args:
+            root_path (str): Root path for manifests.
+            stage (str): Pipeline stage (e.g. 'elo', 'reports').
+            sport (ESPNSportTypes): Type of sport.
+        """
+        path = self._path(root_path, stage, sport)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as json_file:
+            json.dump({'entries': self.entries, 'files': self.files}, json_file, indent=2, sort_keys=True)
@@ -0,0 +1,214 @@
+import contextlib
+import contextvars
+import cProfile
+import json
+import os
+import threading
+import time
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+_stats_lock = threading.Lock()
+
+
+def _new_counters() -> dict:
+    return {'stages': {}, 'network': {'requests': 0, 'bytes': 0, 'seconds': 0.0, 'errors': 0}, 'cache': {'hits': 0, 'misses': 0}}
+
+
+# Counters of the jobs the current thread is working for, see collect
+_collectors = contextvars.ContextVar('profile_collectors', default=())
+
+
+class StageTimer:
+    """
+    Timer of one run of an instrumented stage, see stage.
+
+    Attributes:
+        name (str): Stage name.
+        rows (int): Rows processed by the stage (None if not reported).
+        seconds (float): Elapsed seconds, set when the stage ends.
+    """
+
+    def __init__(self, name: str, rows: int = None):
+        """
+        Initialize StageTimer.
+
+        Args:
+            name (str): Stage name.
+            rows (int): Rows processed by the stage (default is None, can be set while the stage runs).
+        """
+        self.name = name
+        self.rows = rows
+        self.seconds = 0.0
+
+
+@contextlib.contextmanager
+def stage(name: str, rows: int = None):
+    """
+    Time a stage and add it to the stage counters of the active collectors (see collect).
+
+    Stages with the same name accumulate their calls, seconds and rows, nested stages are counted in their own
+    and in every enclosing stage.
+
+    Args:
+        name (str): Stage name (e.g. 'parquet_read' or 'report.team_ratings').
+        rows (int): Rows processed by the stage (default is None, can be set on the yielded timer).
+
+    Yields:
+        StageTimer: Timer of this run of the stage.
+    """
+    timer = StageTimer(name, rows)
+    start = time.perf_counter()
+    try:
+        yield timer
+    finally:
+        timer.seconds = time.perf_counter() - start
+        with _stats_lock:
+            for target in _collectors.get():
+                counters = target['stages'].setdefault(name, {'calls': 0, 'seconds': 0.0, 'rows': 0})
+                counters['calls'] = counters['calls'] + 1
+                counters['seconds'] = counters['seconds'] + timer.seconds
+                if timer.rows is not None:
+                    counters['rows'] = counters['rows'] + int(timer.rows)
+
+
+def record_request(seconds: float, size: int, error: bool = False):
+    """
+    Count a network request to the ESPN API.
+
+    Args:
+        seconds (float): Time spent on the request (including reading the body).
+        size (int): Bytes of the response body.
+        error (bool): Whether the request raised (default is False).
+    """
+    with _stats_lock:
+        for target in _collectors.get():
+            network = target['network']
+            network['requests'] = network['requests'] + 1
+            network['bytes'] = network['bytes'] + size
+            network['seconds'] = network['seconds'] + seconds
+            network['errors'] = network['errors'] + int(error)
+
+
+def record_cache(key: str):
+    """
+    Count a response cache lookup.
+
+    Args:
+        key (str): 'hits' or 'misses'.
+    """
+    with _stats_lock:
+        for target in _collectors.get():
+            target['cache'][key] = target['cache'][key] + 1
+
+
+@contextlib.contextmanager
+def collect():
+    """
+    Collect the counters of the enclosed code only. Counters are scoped to the current context, so jobs running
+    in other threads of the process are not counted; threads the enclosed code starts are only counted if their
+    work is wrapped with carry_collectors.
+
+    Yields:
+        dict: Counters with stages, network and cache, updated while the enclosed code runs.
+    """
+    counters = _new_counters()
+    token = _collectors.set(_collectors.get() + (counters,))
+    try:
+        yield counters
+    finally:
+        _collectors.reset(token)
+
+
+def carry_collectors(fn):
+    """
+    Wrap a function so it counts towards the collectors active where it was wrapped, when it runs on another
+    thread (e.g. a ThreadPoolExecutor worker).
+
+    Args:
+        fn (callable): Function to wrap.
+
+    Returns:
+        callable: Wrapped function.
+    """
+    collectors = _collectors.get()
+
+    def run(*args, **kwargs):
+        token = _collectors.set(collectors)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _collectors.reset(token)
+    return run
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of this process so far (not per job: jobs running in threads of one process share it).
+
+    Returns:
+        float: Peak RSS in MB, None if the platform does not report it.
+    """
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+def profile_summary(counters: dict) -> dict:
+    """
+    Summarize collected counters for a run profile.
+
+    Args:
+        counters (dict): Counters yielded by collect.
+
+    Returns:
+        dict: Stages (sorted by seconds, descending) and network counters, seconds rounded to ms.
+    """
+    with _stats_lock:
+        stages = {name: {**stage_counters, 'seconds': round(stage_counters['seconds'], 3)} for name, stage_counters in counters['stages'].items()}
+        network = dict(counters['network'])
+    network['seconds'] = round(network['seconds'], 3)
+    return {
+        'stages': dict(sorted(stages.items(), key=lambda item: -item[1]['seconds'])),
+        'network': network,
+    }
+
+
+@contextlib.contextmanager
+def cprofile(path: str = None):
+    """
+    Run the enclosed code under cProfile and dump the stats (readable with pstats or snakeviz).
+
+    Args:
+        path (str): Stats file path (default is None to not profile).
+    """
+    if path is None:
+        yield
+        return
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        profiler.dump_stats(path)
+
+
+def write_profile(path: str, profile: dict):
+    """
+    Write a run profile as JSON. The file is written to a temporary file and renamed into place.
+
+    Args:
+        path (str): Profile file path.
+        profile (dict): JSON serializable run profile.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'w') as json_file:
+        json.dump(profile, json_file, indent=2, default=str)
+    os.replace(tmp_path, path)
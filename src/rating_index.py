@@ -0,0 +1,253 @@
+import numpy as np
+import pandas as pd
+
+from src.consts import ESPNSportTypes
+from src.storage import read_sport_dataframe
+from src.utils import put_dataframe, to_arrow_schema
+
+RATING_INDEX_SCHEMA = {
+    'team_id': np.int64,
+    'datetime': 'datetime64[ns, UTC]',
+    'id': np.int64,
+    'str_event_id': 'string',
+    'season': np.int32,
+    'team_name': 'string',
+    'elo_pre': np.float64,
+    'elo_post': np.float64,
+}
+RATING_INDEX_ARROW_SCHEMA = to_arrow_schema({column: dtype for column, dtype in RATING_INDEX_SCHEMA.items() if column not in ['datetime', 'str_event_id', 'team_name']})
+
+
+def _to_epoch_ns(values) -> np.ndarray:
+    # Nanoseconds since epoch, naive dates are taken as UTC
+    return pd.DatetimeIndex(pd.to_datetime(values, utc=True)).asi8
+
+
+def _column_values(series: pd.Series) -> np.ndarray:
+    # Nullable columns without missing values become plain numpy arrays
+    if isinstance(series.dtype, pd.StringDtype):
+        return series.to_numpy(dtype=object, na_value=None)
+    if pd.api.types.is_float_dtype(series.dtype):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return series.to_numpy()
+
+
+class RatingIndex:
+    """
+    Point in time index of the post game ratings of every team.
+
+    Rows (one per team and finished event) are stored column-wise sorted by team and then by date, with the
+    start offset of every team, so the rating of a team at a date or over a date range is a binary search in
+    the team's slice instead of a fold and filter over every season. The index is persisted as one parquet file
+    per season (data/ratings/<sport>/<season>.parquet), which the Elo stage rewrites only for the seasons it runs.
+
+    Attributes:
+        teams (np.ndarray): Indexed team keys, ascending.
+        columns (dict): Column arrays in index order (team key, datetime in ns since epoch, elo_post and any
+            extra columns).
+
+    Methods:
+        rating_at(team, date): Rating of a team after its last event at or before a date.
+        ratings_at(teams, dates): Vectorized rating_at.
+        history(team, start, end): Rating history of a team over a date range.
+        latest(): Latest row of every team.
+        from_frame(elo_df, key, time, columns): Build an index from Elo results.
+        write_season(root_path, sport, season, elo_df): Persist the index of a season.
+        load(root_path, sport, seasons): Load the persisted index of a sport.
+    """
+
+    def __init__(self, columns: dict, key: str = 'team_id', time: str = 'datetime', tz: str = 'UTC', order: str = None):
+        """
+        Initialize RatingIndex.
+
+        Args:
+            columns (dict): Column arrays (any order) with the team key, time (ns since epoch) and elo_post columns.
+            key (str): Team key column (default is 'team_id').
+            time (str): Date column (default is 'datetime').
+            tz (str): Timezone of returned dates, None for naive UTC dates (default is 'UTC').
+            order (str): Application order column breaking ties between events of a team at the same time
+                (default is None to keep the order of the columns).
+        """
+        self._key = key
+        self._time = time
+        self._tz = tz
+        # lexsort is stable and sorts by its last key first
+        sort_keys = (columns[time], columns[key]) if order is None else (columns[order], columns[time], columns[key])
+        order = np.lexsort(sort_keys)
+        self.columns = {column: np.asarray(values)[order] for column, values in columns.items()}
+        self.teams, starts = np.unique(self.columns[key], return_index=True)
+        self._starts = np.append(starts, len(order))
+        self._composite = None
+
+    def __len__(self):
+        return len(self.columns[self._key])
+
+    def _team_slice(self, team):
+        i = np.searchsorted(self.teams, team)
+        if i == len(self.teams) or self.teams[i] != team:
+            return 0, 0
+        return self._starts[i], self._starts[i + 1]
+
+    def rating_at(self, team, date):
+        """
+        Rating of a team after its last event at or before a date.
+
+        Args:
+            team: Team key.
+            date: Date (naive dates are taken as UTC).
+
+        Returns:
+            float or None: Post game rating, None if the team has no event at or before the date.
+        """
+        start, end = self._team_slice(team)
+        position = start + np.searchsorted(self.columns[self._time][start:end], _to_epoch_ns([date])[0], side='right') - 1
+        if position < start:
+            return None
+        return float(self.columns['elo_post'][position])
+
+    def ratings_at(self, teams, dates) -> np.ndarray:
+        """
+        Ratings of many teams at many dates, one binary search over the whole index.
+
+        Args:
+            teams: Array like of team keys.
+            dates: Array like of dates aligned with teams.
+
+        Returns:
+            np.ndarray: Post game ratings, NaN where a team has no event at or before its date.
+        """
+        teams = np.asarray(teams)
+        times = _to_epoch_ns(dates)
+        if self._composite is None:
+            # (team position, time) packed into one sorted int64 key: times in seconds after the first event
+            self._origin = self.columns[self._time].min() // 10 ** 9 if len(self) > 0 else 0
+            self._span = (self.columns[self._time].max() // 10 ** 9 - self._origin + 2) if len(self) > 0 else 1
+            codes = np.repeat(np.arange(len(self.teams)), np.diff(self._starts))
+            self._composite = codes * self._span + (self.columns[self._time] // 10 ** 9 - self._origin)
+        codes = np.searchsorted(self.teams, teams)
+        known = codes < len(self.teams)
+        known[known] = self.teams[codes[known]] == teams[known]
+        seconds = np.clip(times // 10 ** 9 - self._origin, -1, self._span - 1)
+        positions = np.searchsorted(self._composite, np.where(known, codes, 0) * self._span + seconds, side='right') - 1
+        starts = self._starts[np.where(known, codes, 0)]
+        found = known & (positions >= starts)
+        return np.where(found, self.columns['elo_post'][np.maximum(positions, 0)], np.nan)
+
+    def history(self, team, start=None, end=None) -> pd.DataFrame:
+        """
+        Rating history of a team over a date range.
+
+        Args:
+            team: Team key.
+            start: First date of the range, inclusive (default is None for the first event).
+            end: Last date of the range, inclusive (default is None for the last event).
+
+        Returns:
+            pd.DataFrame: Rows of the team in date order.
+        """
+        team_start, team_end = self._team_slice(team)
+        times = self.columns[self._time][team_start:team_end]
+        first = team_start + (np.searchsorted(times, _to_epoch_ns([start])[0], side='left') if start is not None else 0)
+        last = team_start + (np.searchsorted(times, _to_epoch_ns([end])[0], side='right') if end is not None else len(times))
+        return self._frame(np.arange(first, last))
+
+    def latest(self) -> pd.DataFrame:
+        """
+        Latest row of every team.
+
+        Returns:
+            pd.DataFrame: One row per team, in team order.
+        """
+        return self._frame(self._starts[1:] - 1)
+
+    def _frame(self, positions: np.ndarray) -> pd.DataFrame:
+        df = pd.DataFrame({column: values[positions] for column, values in self.columns.items()})
+        df[self._time] = pd.to_datetime(df[self._time], utc=True)
+        if self._tz is None:
+            df[self._time] = df[self._time].dt.tz_localize(None)
+        elif self._tz != 'UTC':
+            df[self._time] = df[self._time].dt.tz_convert(self._tz)
+        return df
+
+    @classmethod
+    def from_frame(cls, elo_df: pd.DataFrame, key: str = 'team_id', time: str = 'datetime', columns: list = None):
+        """
+        Build an index from Elo results (events with both post game ratings). Home and away prefixed columns are
+        folded into one row per team and event. Events of a team at the same time (e.g. day granular dates) are
+        ordered by their row position in elo_df, which has to be the order the ratings were applied in.
+
+        Args:
+            elo_df (pd.DataFrame): Elo results.
+            key (str): Team key column without prefix (default is 'team_id').
+            time (str): Date column (default is 'datetime').
+            columns (list): Event columns to keep; prefixed names are folded (default is None for none).
+
+        Returns:
+            RatingIndex: Index of the rated events.
+
+        Example:
+            Team 1 is home in the first and away in the second game of a day, its latest rating is the second game's
+            (regression check, run with python -m doctest src/rating_index.py):
+
+            >>> games_df = pd.DataFrame({
+            ...     'date': pd.to_datetime(['2025-05-01', '2025-05-01']),
+            ...     'home_team_idx': [1, 2], 'away_team_idx': [2, 1],
+            ...     'home_elo_post': [1510.0, 1490.0], 'away_elo_post': [1500.0, 1520.0],
+            ... })
+            >>> RatingIndex.from_frame(games_df, key='team_idx', time='date').latest().elo_post.tolist()
+            [1520.0, 1490.0]
+        """
+        elo_df = elo_df.loc[elo_df.home_elo_post.notnull() & elo_df.away_elo_post.notnull()]
+        folded = {}
+        for column in [key, 'elo_post'] + (columns or []):
+            if f'home_{column}' in elo_df.columns:
+                folded[column] = np.concatenate([_column_values(elo_df[f'home_{column}']), _column_values(elo_df[f'away_{column}'])])
+            else:
+                folded[column] = np.tile(_column_values(elo_df[column]), 2)
+        folded['elo_post'] = folded['elo_post'].astype(np.float64)
+        times = _to_epoch_ns(elo_df[time])
+        folded[time] = np.tile(times, 2)
+        # One position per event, shared by its home and away rows
+        folded['position'] = np.tile(np.arange(elo_df.shape[0], dtype=np.int64), 2)
+        return cls(folded, key=key, time=time, tz=str(elo_df[time].dt.tz) if elo_df[time].dt.tz is not None else None, order='position')
+
+    @staticmethod
+    def write_season(root_path: str, sport: ESPNSportTypes, season: int, elo_df: pd.DataFrame):
+        """
+        Persist the index of a season from its Elo results.
+
+        Args:
+            root_path (str): Root path for rating indexes.
+            sport (ESPNSportTypes): Type of sport.
+            season (int): Season year.
+            elo_df (pd.DataFrame): Elo results of the season.
+
+        Returns:
+            str: Path of the written file.
+        """
+        finished_df = elo_df.loc[(elo_df.season == season) & (elo_df.is_finished == 1)]
+        index = RatingIndex.from_frame(finished_df, columns=['id', 'str_event_id', 'season', 'team_name', 'elo_pre'])
+        df = index._frame(np.arange(len(index)))[list(RATING_INDEX_SCHEMA.keys())]
+        path = f'{root_path}/{sport.value}/{season}.parquet'
+        put_dataframe(df, path, RATING_INDEX_ARROW_SCHEMA)
+        return path
+
+    @classmethod
+    def load(cls, root_path: str, sport: ESPNSportTypes, seasons: list = None):
+        """
+        Load the persisted index of a sport in one scan.
+
+        Args:
+            root_path (str): Root path for rating indexes.
+            sport (ESPNSportTypes): Type of sport.
+            seasons (list): Seasons to include (default is None for every indexed season).
+
+        Returns:
+            RatingIndex: Index over the seasons.
+        """
+        df = read_sport_dataframe(root_path, sport, seasons)
+        if df.shape[0] == 0:
+            df = pd.DataFrame({column: pd.Series(dtype=dtype) for column, dtype in RATING_INDEX_SCHEMA.items()})
+        columns = {column: _column_values(df[column]) for column in df.columns}
+        columns['datetime'] = _to_epoch_ns(df['datetime'])
+        return cls(columns)
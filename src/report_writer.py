@@ -0,0 +1,192 @@
+import gzip
+import json
+import os
+from json.encoder import encode_basestring_ascii
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+# Records are flushed to the output file in chunks of this many rows
+WRITE_CHUNK_ROWS = 1000
+
+
+def _encode_value(value) -> str:
+    if value is None:
+        return 'null'
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if isinstance(value, str):
+        return encode_basestring_ascii(value)
+    # int and float reprs are what json.dump writes
+    return repr(value)
+
+
+def _encode_dates(series: pd.Series) -> List[str]:
+    # ISO dates with millisecond precision as written by to_json(date_format='iso'), timezone aware dates in UTC
+    is_utc = series.dt.tz is not None
+    if is_utc:
+        series = series.dt.tz_convert('UTC').dt.tz_localize(None)
+    dates = np.datetime_as_string(series.to_numpy(dtype='datetime64[ms]'), unit='ms')
+    suffix = 'Z"' if is_utc else '"'
+    return ['null' if date == 'NaT' else f'"{date}{suffix}' for date in dates.tolist()]
+
+
+class JSONRecords:
+    """
+    Columnar list of report records, serialized a column at a time and streamed row by row by write_json_report.
+
+    Every column is converted with pandas' JSON serializer (dates are formatted directly, the same way) so
+    numbers, nulls and ISO dates match to_json(orient='records', date_format='iso'), and kept as encoded JSON
+    values, so records are never built as Python dictionaries.
+
+    Attributes:
+        columns (List[str]): Record keys in order.
+        values (List[List[str]]): Encoded JSON values per column.
+
+    Methods:
+        from_frame(df, columns): Encode the columns of a DataFrame.
+        to_list(): Records as a list of dictionaries.
+    """
+
+    def __init__(self, columns: List[str], values: List[List[str]]):
+        """
+        Initialize JSONRecords.
+
+        Args:
+            columns (List[str]): Record keys in order.
+            values (List[List[str]]): Encoded JSON values per column.
+        """
+        self.columns = columns
+        self.values = values
+
+    def __len__(self):
+        return len(self.values[0]) if len(self.values) > 0 else 0
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, columns: List[str] = None):
+        """
+        Encode the columns of a DataFrame.
+
+        Args:
+            df (pd.DataFrame): Report rows.
+            columns (List[str]): Columns to include in order (default is None for every column).
+
+        Returns:
+            JSONRecords: Encoded records.
+        """
+        columns = list(df.columns) if columns is None else columns
+        values = []
+        for column in columns:
+            if pd.api.types.is_datetime64_any_dtype(df[column].dtype):
+                values.append(_encode_dates(df[column]))
+            else:
+                values.append([_encode_value(value) for value in json.loads(df[column].to_json(orient='values'))])
+        return cls(columns, values)
+
+    def to_list(self) -> list:
+        """
+        Records as a list of dictionaries.
+
+        Returns:
+            list: Records.
+        """
+        return [dict(zip(self.columns, (json.loads(value) for value in row))) for row in zip(*self.values)]
+
+
+def _iter_records(records: JSONRecords, level: int, indent: int):
+    if len(records) == 0:
+        yield '[]'
+        return
+    if indent is None:
+        keys = [f'{encode_basestring_ascii(column)}:' for column in records.columns]
+        rows = (('{' + ','.join(key + value for key, value in zip(keys, row)) + '}') for row in zip(*records.values))
+        separator, opening, closing = ',', '[', ']'
+    else:
+        item_indent = '\n' + ' ' * (indent * (level + 1))
+        field_indent = '\n' + ' ' * (indent * (level + 2))
+        keys = [f'{field_indent}{encode_basestring_ascii(column)}: ' for column in records.columns]
+        rows = (('{' + ','.join(key + value for key, value in zip(keys, row)) + item_indent + '}') for row in zip(*records.values))
+        separator, opening, closing = ',' + item_indent, '[' + item_indent, '\n' + ' ' * (indent * level) + ']'
+    chunk = []
+    yield opening
+    for i, row in enumerate(rows):
+        chunk.append(row)
+        if len(chunk) == WRITE_CHUNK_ROWS:
+            yield (separator if i >= WRITE_CHUNK_ROWS else '') + separator.join(chunk)
+            chunk = []
+    if len(chunk) > 0:
+        yield (separator if len(records) > len(chunk) else '') + separator.join(chunk)
+    yield closing
+
+
+def _iter_json(value, level: int, indent: int):
+    if isinstance(value, JSONRecords):
+        yield from _iter_records(value, level, indent)
+    elif isinstance(value, dict) and len(value) > 0 and any(isinstance(item, (dict, JSONRecords)) for item in value.values()):
+        if indent is None:
+            separator, opening, closing, key_separator = ',', '{', '}', ':'
+        else:
+            item_indent = '\n' + ' ' * (indent * (level + 1))
+            separator, opening, closing, key_separator = ',' + item_indent, '{' + item_indent, '\n' + ' ' * (indent * level) + '}', ': '
+        yield opening
+        for i, (key, item) in enumerate(value.items()):
+            yield (separator if i > 0 else '') + encode_basestring_ascii(str(key)) + key_separator
+            yield from _iter_json(item, level + 1, indent)
+        yield closing
+    elif indent is None:
+        yield json.dumps(value, separators=(',', ':'))
+    else:
+        # Nested lines of a plain value only need the indentation of its level
+        yield json.dumps(value, indent=indent).replace('\n', '\n' + ' ' * (indent * level))
+
+
+def get_report_paths(path: str, precompress: bool = False) -> List[str]:
+    """
+    Files written for a report.
+
+    Args:
+        path (str): Report file path.
+        precompress (bool): Whether a gzip compressed copy is written next to the report (default is False).
+
+    Returns:
+        List[str]: Report file path, followed by the compressed copy if enabled.
+    """
+    return [path, f'{path}.gz'] if precompress else [path]
+
+
+def write_json_report(path: str, report, compact: bool = False, precompress: bool = False):
+    """
+    Stream a report to a JSON file in one pass.
+
+    The output is identical to json.dump(report, indent=2) of the report with its JSONRecords as lists of
+    dictionaries. Files are written atomically.
+
+    Args:
+        path (str): Report file path.
+        report: JSON serializable report, values may be JSONRecords.
+        compact (bool): Write without indentation or whitespace (default is False).
+        precompress (bool): Also write a gzip compressed copy to path + '.gz' for static hosting (default is False).
+    """
+    indent = None if compact else 2
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    tmp_gz_path = f'{path}.gz.{os.getpid()}.tmp'
+    json_file = open(tmp_path, 'w', encoding='ascii')
+    raw_gz_file = open(tmp_gz_path, 'wb') if precompress else None
+    # mtime=0 keeps the compressed bytes identical for identical reports
+    gz_file = gzip.GzipFile(filename='', mode='wb', fileobj=raw_gz_file, mtime=0) if precompress else None
+    try:
+        for chunk in _iter_json(report, 0, indent):
+            json_file.write(chunk)
+            if gz_file is not None:
+                gz_file.write(chunk.encode('ascii'))
+    finally:
+        json_file.close()
+        if gz_file is not None:
+            gz_file.close()
+            raw_gz_file.close()
+    os.replace(tmp_path, path)
+    if precompress:
+        os.replace(tmp_gz_path, f'{path}.gz')
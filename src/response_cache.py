@@ -0,0 +1,160 @@
+import datetime
+import hashlib
+import json
+import os
+import threading
+import time
+
+from src.consts import ESPNSportTypes, SEASON_START_MONTH
+from src.profiling import record_cache
+
+# Cache lifetimes in seconds by ESPN endpoint type (0 bypasses the cache). Settled responses have no entry: their
+# lifetime is the time since they settled, so responses fetched before that are refetched once and kept forever after
+CACHE_TTLS = {
+    'current_calendar': 6 * 60 * 60,
+    'current_teams': 24 * 60 * 60,
+    'recent_scoreboard': 5 * 60,
+}
+# Scoreboards older than this many days are settled (matches the events runner rescan window)
+SCOREBOARD_SETTLED_DAYS = 7
+
+
+def _settled_ttl(settled_at: datetime.datetime, today: datetime.datetime) -> float:
+    # An entry is fresh only if it was fetched after settled_at, at least one second for entries fetched just now
+    return max((today - settled_at).total_seconds(), 1)
+
+
+def season_start(sport: ESPNSportTypes, season: int) -> datetime.datetime:
+    """
+    Get the date a season becomes the current season of a sport (the inverse of find_year_for_season).
+
+    Args:
+        sport (ESPNSportTypes): Type of sport.
+        season (int): Season year.
+
+    Returns:
+        datetime.datetime: First day of the month the season becomes current.
+    """
+    start_month, wrap = SEASON_START_MONTH[sport]['start'], SEASON_START_MONTH[sport]['wrap']
+    if wrap:
+        return datetime.datetime(season - 1, start_month - 1, 1)
+    if start_month == 1:
+        return datetime.datetime(season - 1, 12, 1)
+    return datetime.datetime(season, start_month - 1, 1)
+
+
+def scoreboard_ttl(dates: str, today: datetime.datetime = None):
+    """
+    Get the cache lifetime of a scoreboard request. A scoreboard settles SCOREBOARD_SETTLED_DAYS after its last
+    date; a settled scoreboard is only served from the cache if it was fetched after it settled.
+
+    Args:
+        dates (str): Scoreboard dates parameter (YYYYMMDD or YYYYMMDD-YYYYMMDD).
+        today (datetime.datetime): Reference date (default is None for utcnow).
+
+    Returns:
+        float: Cache lifetime in seconds (0 if dates is not a day or range of days).
+    """
+    today = datetime.datetime.utcnow() if today is None else today
+    try:
+        last_date = datetime.datetime.strptime(str(dates).split('-')[-1], '%Y%m%d')
+    except ValueError:
+        return 0
+    settled_at = last_date + datetime.timedelta(days=SCOREBOARD_SETTLED_DAYS)
+    if settled_at < today:
+        return _settled_ttl(settled_at, today)
+    return CACHE_TTLS['recent_scoreboard']
+
+
+def season_ttl(sport: ESPNSportTypes, season: int, current_season: int, endpoint_type: str = 'current_calendar', today: datetime.datetime = None):
+    """
+    Get the cache lifetime of a season level request (calendars, team lists). A past season settles once the
+    season after the next one has started (seasons become current months before their first game, so a season
+    can still be played after the next one became current); a settled season is only served from the cache if
+    it was fetched after it settled.
+
+    Args:
+        sport (ESPNSportTypes): Type of sport.
+        season (int): Requested season.
+        current_season (int): Current season of the sport.
+        endpoint_type (str): CACHE_TTLS key used until the season settled (default is 'current_calendar').
+        today (datetime.datetime): Reference date (default is None for utcnow).
+
+    Returns:
+        float: Cache lifetime in seconds.
+    """
+    today = datetime.datetime.utcnow() if today is None else today
+    if season < current_season:
+        settled_at = season_start(sport, season + 2)
+        if settled_at < today:
+            return _settled_ttl(settled_at, today)
+    return CACHE_TTLS[endpoint_type]
+
+
+class ResponseCache:
+    """
+    On-disk cache of ESPN JSON responses keyed by URL.
+
+    Each response is stored as its own JSON file with the time it was fetched, so entries can be read with
+    a different lifetime than they were written with. Writes go through a temp file and os.replace, so
+    concurrent threads and worker processes never read a partial entry.
+
+    Attributes:
+        root_path (str): Root path for cached responses.
+
+    Methods:
+        get(url, ttl): Get a cached response that is still fresh.
+        put(url, res): Store a response.
+    """
+
+    def __init__(self, root_path: str = './data/cache'):
+        """
+        Initialize ResponseCache.
+
+        Args:
+            root_path (str): Root path for cached responses (default is './data/cache').
+        """
+        self.root_path = root_path
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return f'{self.root_path}/{key[:2]}/{key}.json'
+
+    def get(self, url: str, ttl=None):
+        """
+        Get a cached response that is still fresh.
+
+        Args:
+            url (str): Request URL.
+            ttl (float): Maximum age of the entry in seconds (default is None to accept any age).
+
+        Returns:
+            tuple: (found, response). found is False on a miss or a stale entry.
+        """
+        path = self._path(url)
+        try:
+            with open(path, 'r') as json_file:
+                entry = json.load(json_file)
+        except (OSError, ValueError):
+            record_cache('misses')
+            return False, None
+        if entry.get('url') != url or (ttl is not None and time.time() - entry['fetched_at'] > ttl):
+            record_cache('misses')
+            return False, None
+        record_cache('hits')
+        return True, entry['response']
+
+    def put(self, url: str, res):
+        """
+        Store a response.
+
+        Args:
+            url (str): Request URL.
+            res (dict): JSON response.
+        """
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w') as json_file:
+            json.dump({'url': url, 'fetched_at': time.time(), 'response': res}, json_file)
+        os.replace(tmp_path, path)
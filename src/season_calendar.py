@@ -0,0 +1,140 @@
+import datetime
+import json
+import os
+import threading
+import time
+
+from src.consts import ESPNSportTypes
+from src.response_cache import ResponseCache, season_ttl
+from src.sport import ESPNSport
+from src.utils import find_year_for_season
+
+
+class SeasonCalendarRegistry:
+    """
+    Resolves and memoizes season calendars (start date, end date and ondays) per sport and season.
+
+    Calendars are looked up in process first, then on disk, and only then retrieved from ESPN. Settled past
+    seasons (see season_ttl) never change and are kept forever; the current season, and a past season until it
+    settled, is refetched once it is older than the current calendar TTL of the response cache.
+
+    Attributes:
+        root_path (str): Root path for the on-disk calendars (one JSON file per sport).
+        cache (ResponseCache): Response cache used when a calendar has to be retrieved (default is None).
+
+    Methods:
+        get(sport, season=None, date=None): Get the ESPNSport of a season with its calendar filled in.
+    """
+
+    def __init__(self, root_path: str = './data/calendars', cache: ResponseCache = None):
+        """
+        Initialize SeasonCalendarRegistry.
+
+        Args:
+            root_path (str): Root path for the on-disk calendars (default is './data/calendars').
+            cache (ResponseCache): Response cache used when a calendar has to be retrieved (default is None).
+        """
+        self.root_path = root_path
+        self.cache = cache
+        self._calendars = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Locks cannot be pickled, worker processes get their own lock (and keep the memoized calendars)
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _path(self, sport: ESPNSportTypes) -> str:
+        return f'{self.root_path}/{sport.value}.json'
+
+    def _load(self, sport: ESPNSportTypes) -> dict:
+        path = self._path(sport)
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r') as json_file:
+            return {int(season): entry for season, entry in json.load(json_file).items()}
+
+    def _save(self, sport: ESPNSportTypes, calendars: dict):
+        path = self._path(sport)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as json_file:
+            json.dump({str(season): entry for season, entry in sorted(calendars.items())}, json_file)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _is_fresh(entry: dict, sport: ESPNSportTypes, season: int, current_season: int) -> bool:
+        return time.time() - entry['fetched_at'] <= season_ttl(sport, season, current_season)
+
+    def _fetch(self, sport: ESPNSportTypes, season: int) -> dict:
+        espn_sport = ESPNSport(sport, season=season, cache=self.cache)
+        return {
+            'start_date': espn_sport.start_date.isoformat() if espn_sport.start_date is not None else None,
+            'end_date': espn_sport.end_date.isoformat() if espn_sport.end_date is not None else None,
+            'is_active': espn_sport.is_active,
+            'ondays': [day.isoformat() for day in espn_sport.ondays] if espn_sport.ondays is not None else None,
+            'fetched_at': time.time(),
+        }
+
+    def _get_entry(self, sport: ESPNSportTypes, season: int) -> dict:
+        current_season = find_year_for_season(sport)
+        with self._lock:
+            entry = self._calendars.get((sport, season))
+            if entry is not None and self._is_fresh(entry, sport, season, current_season):
+                return entry
+            calendars = self._load(sport)
+            entry = calendars.get(season)
+            if entry is None or not self._is_fresh(entry, sport, season, current_season):
+                entry = self._fetch(sport, season)
+                calendars[season] = entry
+                self._save(sport, calendars)
+            self._calendars[(sport, season)] = entry
+            return entry
+
+    def get(self, sport: ESPNSportTypes, season: int = None, date: datetime.datetime = None) -> ESPNSport:
+        """
+        Get the ESPNSport of a season with its calendar filled in from the registry.
+
+        Args:
+            sport (ESPNSportTypes): Type of sport.
+            season (int): Season year (default is None for the current season).
+            date (datetime.datetime): Date is_active is evaluated at (default is None for utcnow).
+
+        Returns:
+            ESPNSport: Sport object with start_date, end_date, is_active and ondays set.
+        """
+        date = datetime.datetime.utcnow() if date is None else date
+        season = find_year_for_season(sport, date) if season is None else season
+        entry = self._get_entry(sport, season)
+        espn_sport = ESPNSport(sport, date=date, season=season, cache=self.cache, fetch_calendar=False)
+        if entry['start_date'] is not None:
+            espn_sport.start_date = datetime.datetime.fromisoformat(entry['start_date'])
+            espn_sport.end_date = datetime.datetime.fromisoformat(entry['end_date'])
+            espn_sport.is_active = espn_sport.start_date <= date <= espn_sport.end_date
+        else:
+            espn_sport.is_active = entry['is_active']
+        if entry['ondays'] is not None:
+            espn_sport.ondays = [datetime.datetime.fromisoformat(day) for day in entry['ondays']]
+        return espn_sport
+
+
+def get_active_sports(calendar_registry: SeasonCalendarRegistry = None):
+    """
+    Get a list of active ESPN sports based on their current status.
+
+    Args:
+        calendar_registry (SeasonCalendarRegistry): Registry the current calendars are resolved from
+            (default is None for a registry on './data/calendars').
+
+    Returns:
+        List: List of active sports.
+    """
+    if calendar_registry is None:
+        calendar_registry = SeasonCalendarRegistry()
+    espn_sports = [calendar_registry.get(sport) for sport in ESPNSportTypes]
+    return [espn_sport.sport for espn_sport in espn_sports if espn_sport.is_active and espn_sport.sport != ESPNSportTypes.SOCCER_EPL]
@@ -0,0 +1,196 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+from src.consts import ESPNSportTypes
+
+# League wide playoff spots used for the playoff and seed odds (teams are seeded by regular season wins with the
+# final rating as tiebreaker since conferences and divisions are not part of the event data)
+PLAYOFF_SPOTS = {
+    ESPNSportTypes.NBA: 16,
+    ESPNSportTypes.NFL: 14,
+    ESPNSportTypes.MLB: 12,
+    ESPNSportTypes.NHL: 16,
+    ESPNSportTypes.PLL: 6,
+}
+
+
+def get_disjoint_blocks(home_idx: np.ndarray, away_idx: np.ndarray) -> list:
+    """
+    Split chronologically sorted games into consecutive blocks in which no team plays twice.
+
+    Games of a block do not depend on each other, so a whole block can be simulated in one array operation
+    without changing the result of simulating its games one by one.
+
+    Args:
+        home_idx (np.ndarray): Team index of the home team of each game.
+        away_idx (np.ndarray): Team index of the away team of each game.
+
+    Returns:
+        list: (start, end) positions of each block.
+    """
+    blocks = []
+    start = 0
+    playing = set()
+    for i, (home, away) in enumerate(zip(home_idx.tolist(), away_idx.tolist())):
+        if home in playing or away in playing:
+            blocks.append((start, i))
+            start = i
+            playing = set()
+        playing.add(home)
+        playing.add(away)
+    if start < len(home_idx):
+        blocks.append((start, len(home_idx)))
+    return blocks
+
+
+def _first_by_team(team_idx: np.ndarray, order: np.ndarray, values: np.ndarray):
+    # Value of the first row of every team when rows are ordered by order
+    rows = np.argsort(order, kind='stable')
+    teams, first = np.unique(team_idx[rows], return_index=True)
+    return teams, values[rows][first]
+
+
+class SeasonSimulator:
+    """
+    Monte Carlo simulator for the rest of a season.
+
+    Every simulation samples the result of each remaining game from the home win probability of the simulated
+    ratings and updates both ratings with the Elo rule of the system, so later games are played with the
+    ratings each simulated season has produced. All simulations run at once on a teams x simulations rating
+    array (each team's simulated ratings are contiguous), one block of games without a repeated team at a time.
+
+    Attributes:
+        team_ids (np.ndarray): Team id of each team index.
+        team_names (np.ndarray): Latest team name of each team index.
+        ratings (np.ndarray): Current rating of each team.
+        wins (np.ndarray): Finished regular season wins of each team.
+        losses (np.ndarray): Finished regular season losses of each team.
+        remaining_games (np.ndarray): Remaining regular season games of each team.
+        remaining_df (pd.DataFrame): Remaining games in chronological order.
+
+    Methods:
+        simulate(simulations, seed): Simulate the rest of the season.
+        seed_odds(outcomes, spots): Odds of every team to finish with each of the top seeds.
+    """
+
+    def __init__(self, season_df: pd.DataFrame, k: float, hfa: float, width: float, mean_elo: float = 1505):
+        """
+        Initialize SeasonSimulator.
+
+        Args:
+            season_df (pd.DataFrame): Events of the season with Elo ratings.
+            k (float): K Factor. Higher K = higher rating change.
+            hfa (float): Home team advantage in Elo ratings.
+            width (float): Lower and upper bounds of Elo ratings (mean_elo - width, mean_elo + width).
+            mean_elo (float): Rating of teams without a rated event (default is 1505).
+        """
+        self._k = k
+        self._width = width
+        season_df = season_df.sort_values('datetime', kind='stable')
+        folded_df = pd.concat([
+            pd.DataFrame({'team_id': season_df.home_team_id, 'team_name': season_df.home_team_name}),
+            pd.DataFrame({'team_id': season_df.away_team_id, 'team_name': season_df.away_team_name}),
+        ])
+        teams_df = folded_df.drop_duplicates('team_id', keep='last').sort_values('team_id')
+        self.team_ids = teams_df.team_id.to_numpy(dtype=np.int64)
+        self.team_names = teams_df.team_name.to_numpy(dtype=object, na_value=None)
+
+        finished = (season_df.is_finished == 1).to_numpy()
+        regular = (season_df.is_postseason == 0).to_numpy()
+        home_idx = np.searchsorted(self.team_ids, season_df.home_team_id.to_numpy(dtype=np.int64))
+        away_idx = np.searchsorted(self.team_ids, season_df.away_team_id.to_numpy(dtype=np.int64))
+        home_won = (season_df.home_team_score > season_df.away_team_score).to_numpy(dtype=bool, na_value=False)
+        away_won = (season_df.away_team_score > season_df.home_team_score).to_numpy(dtype=bool, na_value=False)
+        counted = finished & regular
+        self.wins = np.bincount(home_idx[counted & home_won], minlength=len(self.team_ids)) + np.bincount(away_idx[counted & away_won], minlength=len(self.team_ids))
+        self.losses = np.bincount(home_idx[counted & away_won], minlength=len(self.team_ids)) + np.bincount(away_idx[counted & home_won], minlength=len(self.team_ids))
+
+        # Ratings only move with a team's own games: the pre rating of a team's first remaining game is its current
+        # rating, teams without remaining games keep the post rating of their last finished game
+        home_pre = season_df.home_elo_pre.to_numpy(dtype=np.float64, na_value=np.nan)
+        away_pre = season_df.away_elo_pre.to_numpy(dtype=np.float64, na_value=np.nan)
+        home_post = season_df.home_elo_post.to_numpy(dtype=np.float64, na_value=np.nan)
+        away_post = season_df.away_elo_post.to_numpy(dtype=np.float64, na_value=np.nan)
+        remaining = np.flatnonzero(~finished)
+        done = np.flatnonzero(finished)
+        self.ratings = np.full(len(self.team_ids), float(mean_elo), dtype=np.float64)
+        last_idx, last_post = _first_by_team(np.concatenate([home_idx[done], away_idx[done]]), -np.concatenate([done, done]), np.concatenate([home_post[done], away_post[done]]))
+        self.ratings[last_idx] = last_post
+        first_idx, first_pre = _first_by_team(np.concatenate([home_idx[remaining], away_idx[remaining]]), np.concatenate([remaining, remaining]), np.concatenate([home_pre[remaining], away_pre[remaining]]))
+        self.ratings[first_idx] = first_pre
+        self.ratings = np.where(np.isnan(self.ratings), mean_elo, self.ratings)
+
+        self.remaining_df = season_df.iloc[remaining]
+        self._home_idx = home_idx[remaining]
+        self._away_idx = away_idx[remaining]
+        self._home_hfa = np.where(self.remaining_df.neutral_site.to_numpy(dtype=np.int64) == 1, 0.0, float(hfa))
+        self._regular = regular[remaining]
+        self.remaining_games = np.bincount(self._home_idx[self._regular], minlength=len(self.team_ids)) + np.bincount(self._away_idx[self._regular], minlength=len(self.team_ids))
+
+    def simulate(self, simulations: int = 10000, seed: int = 0) -> dict:
+        """
+        Simulate the rest of the season.
+
+        Args:
+            simulations (int): Number of simulated seasons (default is 10000).
+            seed (int): Seed of the random generator (default is 0).
+
+        Returns:
+            dict: Simulated outcomes:
+                wins (np.ndarray): Final regular season wins, teams x simulations.
+                ratings (np.ndarray): Final ratings, teams x simulations.
+                home_win_prob (np.ndarray): Share of simulations won by the home team per remaining game.
+                home_elo_prob (np.ndarray): Mean simulated pre game home win probability per remaining game.
+        """
+        rng = np.random.default_rng(seed)
+        ratings = np.repeat(self.ratings[:, np.newaxis], simulations, axis=1)
+        wins = np.repeat(self.wins[:, np.newaxis], simulations, axis=1)
+        home_wins = np.zeros(len(self._home_idx), dtype=np.int64)
+        home_prob = np.zeros(len(self._home_idx), dtype=np.float64)
+        # Simulated results have no margin, which is a margin multiplier of log(2) like the projected results
+        log_margin = math.log(2.0)
+        for start, end in get_disjoint_blocks(self._home_idx, self._away_idx):
+            home = self._home_idx[start:end]
+            away = self._away_idx[start:end]
+            elo_diff = ratings[home] - ratings[away] + self._home_hfa[start:end, np.newaxis]
+            expected_home = 1.0 / (np.power(10.0, -elo_diff / self._width) + 1.0)
+            home_won = rng.random(elo_diff.shape) < expected_home
+            mult = log_margin * (2.2 / (np.where(home_won, elo_diff, -elo_diff) * 0.001 + 2.2))
+            shift = (self._k * mult) * (home_won - expected_home)
+            ratings[home] += shift
+            ratings[away] -= shift
+            regular = self._regular[start:end, np.newaxis]
+            wins[home] += home_won & regular
+            wins[away] += ~home_won & regular
+            home_wins[start:end] = home_won.sum(axis=1)
+            home_prob[start:end] = expected_home.sum(axis=1)
+        return {
+            'wins': wins,
+            'ratings': ratings,
+            'home_win_prob': home_wins / simulations,
+            'home_elo_prob': home_prob / simulations,
+        }
+
+    def seed_odds(self, outcomes: dict, spots: int) -> np.ndarray:
+        """
+        Odds of every team to finish with each of the top seeds (regular season wins, final rating as tiebreaker).
+
+        Args:
+            outcomes (dict): Outcomes returned by simulate.
+            spots (int): Number of seeds.
+
+        Returns:
+            np.ndarray: teams x spots probabilities.
+        """
+        wins = outcomes['wins']
+        ratings = outcomes['ratings']
+        # Ratings are positive and far below 1e5, so they only order teams with the same wins
+        order = np.argsort(-(wins + ratings / 1e5), axis=0, kind='stable')
+        seeds = np.empty_like(order)
+        np.put_along_axis(seeds, order, np.arange(order.shape[0])[:, np.newaxis], axis=0)
+        spots = min(spots, len(self.team_ids))
+        seeded = seeds < spots
+        cells = np.flatnonzero(seeded) // wins.shape[1] * spots + seeds[seeded]
+        return np.bincount(cells, minlength=len(self.team_ids) * spots).reshape(len(self.team_ids), spots) / wins.shape[1]
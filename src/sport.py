@@ -2,6 +2,7 @@ import datetime
 
 from src.base_api import ESPNBaseAPI
 from src.consts import ESPNSportTypes, SEASON_START_MONTH, SEASON_GROUPS, ESPNSportSeasonTypes
+from src.response_cache import ResponseCache, season_ttl
 
 
 class ESPNSport(ESPNBaseAPI):
@@ -29,7 +30,9 @@ class ESPNSport(ESPNBaseAPI):
             self,
             sport: ESPNSportTypes,
             date: datetime.datetime = datetime.datetime.utcnow(),
-            season=None
+            season=None,
+            cache: ResponseCache = None,
+            fetch_calendar: bool = True
     ):
         """
         Initialize ESPNSport.
@@ -38,8 +41,11 @@ class ESPNSport(ESPNBaseAPI):
             sport (ESPNSportTypes): Type of sport.
             date (datetime.datetime): Date for the sport.
             season: Season for the sport (default is None).
+            cache (ResponseCache): On-disk response cache for the calendar requests (default is None).
+            fetch_calendar (bool): Retrieve the calendar from ESPN (default is True). SeasonCalendarRegistry
+                passes False and fills the calendar attributes from its memoized calendars instead.
         """
-        super().__init__()
+        super().__init__(cache=cache)
         self.sport = sport
         self.espn_core_name = sport.value.split('/')[0] + '/leagues/' + sport.value.split('/')[1]
         self.is_college_sport = 'college' in sport.value
@@ -50,7 +56,7 @@ class ESPNSport(ESPNBaseAPI):
         self.end_date = None
         self.is_active = None
         self.ondays = None
-        if not (self.season == 2005 and self.sport == ESPNSportTypes.NHL):
+        if fetch_calendar and not (self.season == 2005 and self.sport == ESPNSportTypes.NHL):
             self._get_calendar()
         self.groups = SEASON_GROUPS[self.sport]
 
@@ -84,11 +90,13 @@ class ESPNSport(ESPNBaseAPI):
 
     def _get_calendar(self):
         """
-        Retrieve the calendar information for the sport season.
+        Retrieve the calendar information for the sport season. Calendars of settled past seasons are cached
+        forever, the current season calendar for a few hours.
         """
+        cache_ttl = season_ttl(self.sport, self.season, self._find_year_for_season(self.sport))
         try:
-            reg_res = self.api_request(f"{self._core_url}/{self.espn_core_name}/seasons/{self.season}/types/{ESPNSportSeasonTypes.REG.value}")
-            post_res = self.api_request(f"{self._core_url}/{self.espn_core_name}/seasons/{self.season}/types/{ESPNSportSeasonTypes.POST.value}")
+            reg_res = self.api_request(f"{self._core_url}/{self.espn_core_name}/seasons/{self.season}/types/{ESPNSportSeasonTypes.REG.value}", cache_ttl=cache_ttl)
+            post_res = self.api_request(f"{self._core_url}/{self.espn_core_name}/seasons/{self.season}/types/{ESPNSportSeasonTypes.POST.value}", cache_ttl=cache_ttl)
             if 'startDate' in reg_res:
                 self.start_date = datetime.datetime.strptime(reg_res['startDate'], '%Y-%m-%dT%H:%MZ')
                 if post_res is not None:
@@ -96,14 +104,14 @@ class ESPNSport(ESPNBaseAPI):
                 else:
                     self.end_date = datetime.datetime.strptime(reg_res['endDate'], '%Y-%m-%dT%H:%MZ')
                 self.is_active = self.start_date <= self.date <= self.end_date
-                res = self.api_request(f"{self._core_url}/{self.espn_core_name}/calendar/ondays?dates={self.season}")
+                res = self.api_request(f"{self._core_url}/{self.espn_core_name}/calendar/ondays?dates={self.season}", cache_ttl=cache_ttl)
                 if 'dates' in res['eventDate']:
                     self.ondays = [datetime.datetime.strptime(date, '%Y-%m-%dT%H:%MZ') for date in res['eventDate']['dates'] if self.start_date <= datetime.datetime.strptime(date, '%Y-%m-%dT%H:%MZ') <= self.end_date]
         except Exception as e:
             if self.sport == ESPNSportTypes.SOCCER_EPL:
-                res = self.api_request(f"{self._core_url}/{self.espn_core_name}/seasons/{self.season}/types/1/calendar/ondays")
+                res = self.api_request(f"{self._core_url}/{self.espn_core_name}/seasons/{self.season}/types/1/calendar/ondays", cache_ttl=cache_ttl)
             else:
-                res = self.api_request(f"{self._core_url}/{self.espn_core_name}/calendar/ondays?dates={self.season}")
+                res = self.api_request(f"{self._core_url}/{self.espn_core_name}/calendar/ondays?dates={self.season}", cache_ttl=cache_ttl)
             if res is None:
                 print('No Date Response for '+self.sport.value)
                 self.is_active = False
@@ -0,0 +1,189 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from scipy.stats import gamma
+
+from src.consts import ESPNSportTypes
+
+# Number of fitted point differentials the gamma distribution is fit on
+GAMMA_FIT_RECORDS = 10000
+# Quantile grid points per half of the table: geometric towards 0 (steep ppf for large shapes) and towards 1
+# (the ppf diverges), which keeps the interpolation error around 1e-4 points
+QUANTILE_GRID_SIZE = 2048
+
+
+def trim_outliers(data):
+    # Remove Outliers
+    q1 = np.percentile(data, 25)
+    q3 = np.percentile(data, 75)
+    iqr = q3 - q1
+    lower_bound = q1 - 1.5 * iqr
+    upper_bound = q3 + 1.5 * iqr
+    return data[(data >= lower_bound) & (data <= upper_bound)]
+
+
+def get_fit_scores(elo_df: pd.DataFrame) -> pd.Series:
+    """
+    Absolute point differentials (outliers trimmed) of the last finished events the gamma distribution is fit on.
+
+    Args:
+        elo_df (pd.DataFrame): Events sorted by datetime.
+
+    Returns:
+        pd.Series: Absolute point differentials.
+    """
+    scores = elo_df.loc[((elo_df.is_finished == 1))]
+    records = scores.shape[0] if scores.shape[0] < GAMMA_FIT_RECORDS else GAMMA_FIT_RECORDS
+    scores = scores[-records:][['away_team_score', 'home_team_score']]
+    dif_scores = scores.away_team_score - scores.home_team_score
+    dif_scores_no_outliers = trim_outliers(dif_scores)
+    return dif_scores_no_outliers.abs()
+
+
+def generate_gamma_distribution(elo_df):
+    '''
+    Generate gamma distribution of historical point differentials.
+    We trim outliers in the point difs, take the absolute value of the
+    point difs and fit the points to a gamma distribution.
+    :param elo_df:
+    :return:
+    '''
+    shape, loc, scale = gamma.fit(get_fit_scores(elo_df))
+    return shape, loc, scale
+
+
+def calculate_spread_from_probability(prob, shape, loc, scale):
+    '''
+    Function to convert a probability to a given spread based on the fit gamma
+    distribution hyperparameters
+    :param prob:
+    :param shape:
+    :param loc:
+    :param scale:
+    :return:
+    '''
+    probability = abs(0.50 - prob) * 2
+    ppf_value = gamma.ppf(probability, shape, loc, scale)
+    adjusted_ppf_value = (ppf_value - 1) * 2
+    return -adjusted_ppf_value if prob > 0.5 else adjusted_ppf_value
+
+
+class GammaSpreadModel:
+    """
+    Converts win probabilities to spreads with a gamma distribution fit on historical point differentials.
+
+    The fit is cached per sport on disk, keyed by a watermark of the point differentials it was fit on, so it is
+    only refit when finished results change. Probabilities are converted in a single array operation by
+    interpolating a precomputed table of gamma quantiles, with the same result as
+    calculate_spread_from_probability applied to every probability.
+
+    Attributes:
+        shape (float): Gamma shape parameter.
+        loc (float): Gamma location parameter.
+        scale (float): Gamma scale parameter.
+        watermark (str): Watermark of the point differentials the model was fit on.
+
+    Methods:
+        spreads(probs): Spreads of an array of home win probabilities.
+        fit(elo_df): Fit a model on the finished events of a sport.
+        load_or_fit(root_path, sport, elo_df): Load the cached model of a sport, refit if the data changed.
+    """
+
+    def __init__(self, shape: float, loc: float, scale: float, watermark: str = None):
+        """
+        Initialize GammaSpreadModel and build the quantile table.
+
+        Args:
+            shape (float): Gamma shape parameter.
+            loc (float): Gamma location parameter.
+            scale (float): Gamma scale parameter.
+            watermark (str): Watermark of the point differentials the model was fit on (default is None).
+        """
+        self.shape = shape
+        self.loc = loc
+        self.scale = scale
+        self.watermark = watermark
+        tail = np.geomspace(1e-12, 0.5, QUANTILE_GRID_SIZE)
+        self._quantiles = np.unique(np.concatenate([[0.0], tail, 1 - tail]))
+        self._ppf = gamma.ppf(self._quantiles, shape, loc, scale)
+
+    def spreads(self, probs) -> np.ndarray:
+        """
+        Spreads of an array of home win probabilities (negative when the home team is favored).
+
+        Args:
+            probs (array-like): Home win probabilities, NaN for unknown.
+
+        Returns:
+            np.ndarray: Spreads, NaN where the probability is NaN.
+        """
+        probs = np.asarray(probs, dtype=np.float64)
+        probability = np.abs(0.50 - probs) * 2
+        ppf_values = np.interp(probability, self._quantiles, self._ppf)
+        # Beyond the table the quantiles diverge, evaluate those exactly (inf at a probability of 1)
+        beyond = probability > self._quantiles[-1]
+        if beyond.any():
+            ppf_values[beyond] = gamma.ppf(probability[beyond], self.shape, self.loc, self.scale)
+        adjusted_ppf_values = (ppf_values - 1) * 2
+        return np.where(probs > 0.5, -adjusted_ppf_values, adjusted_ppf_values)
+
+    @staticmethod
+    def get_watermark(scores: pd.Series) -> str:
+        """
+        Watermark of the point differentials a model is fit on.
+
+        Args:
+            scores (pd.Series): Absolute point differentials.
+
+        Returns:
+            str: sha256 hex digest of the values.
+        """
+        return hashlib.sha256(scores.to_numpy(dtype=np.float64, na_value=np.nan).tobytes()).hexdigest()
+
+    @classmethod
+    def fit(cls, elo_df: pd.DataFrame):
+        """
+        Fit a model on the finished events of a sport.
+
+        Args:
+            elo_df (pd.DataFrame): Events sorted by datetime.
+
+        Returns:
+            GammaSpreadModel: Fitted model.
+        """
+        scores = get_fit_scores(elo_df)
+        shape, loc, scale = gamma.fit(scores)
+        return cls(shape, loc, scale, cls.get_watermark(scores))
+
+    @classmethod
+    def load_or_fit(cls, root_path: str, sport: ESPNSportTypes, elo_df: pd.DataFrame):
+        """
+        Load the cached model of a sport, refit (and cache) it if the point differentials changed.
+
+        Args:
+            root_path (str): Root path for spread models (one JSON file per sport).
+            sport (ESPNSportTypes): Type of sport.
+            elo_df (pd.DataFrame): Events sorted by datetime.
+
+        Returns:
+            GammaSpreadModel: Model fit on the current point differentials.
+        """
+        path = f'{root_path}/{sport.value}.json'
+        scores = get_fit_scores(elo_df)
+        watermark = cls.get_watermark(scores)
+        if os.path.exists(path):
+            with open(path, 'r') as json_file:
+                cached = json.load(json_file)
+            if cached['watermark'] == watermark:
+                return cls(cached['shape'], cached['loc'], cached['scale'], watermark)
+        shape, loc, scale = gamma.fit(scores)
+        model = cls(shape, loc, scale, watermark)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as json_file:
+            json.dump({'watermark': model.watermark, 'shape': model.shape, 'loc': model.loc, 'scale': model.scale}, json_file)
+        os.replace(tmp_path, path)
+        return model
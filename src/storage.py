@@ -0,0 +1,102 @@
+import os
+from typing import List
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from src.consts import ESPNSportTypes
+from src.profiling import stage
+from src.utils import NULLABLE_TYPES
+
+
+def get_season_paths(root_path: str, sport: ESPNSportTypes, seasons: List[int] = None) -> dict:
+    """
+    Get the parquet file of every stored season of a sport.
+
+    Args:
+        root_path (str): Root path for the data (e.g. './data/elo').
+        sport (ESPNSportTypes): Type of sport.
+        seasons (List[int]): Seasons to include (default is None for every stored season).
+
+    Returns:
+        dict: File paths keyed by season, in season order.
+    """
+    sport_path = f'{root_path}/{sport.value}'
+    if not os.path.exists(sport_path):
+        return {}
+    paths = {}
+    for file_name in os.listdir(sport_path):
+        name, extension = os.path.splitext(file_name)
+        if extension != '.parquet' or not name.isdigit():
+            continue
+        if seasons is None or int(name) in seasons:
+            paths[int(name)] = f'{sport_path}/{file_name}'
+    return dict(sorted(paths.items()))
+
+
+def _conform_table(table: pa.Table, schema: pa.Schema) -> pa.Table:
+    # Columns in schema order, cast to the unified types; columns only other seasons store are null
+    columns = [table.column(field.name).cast(field.type) if field.name in table.column_names else pa.nulls(table.num_rows, field.type) for field in schema]
+    return pa.Table.from_arrays(columns, schema=schema)
+
+
+def get_sport_dataset(root_path: str, sport: ESPNSportTypes, seasons: List[int] = None, tables: dict = None) -> ds.Dataset:
+    """
+    Expose the season files of a sport as one pyarrow dataset.
+
+    Files stay partitioned by season on disk (<root_path>/<sport>/<season>.parquet), so season selection prunes
+    whole files before the scan; every other filter and the column selection are pushed down into the scan.
+    Schemas are unified across seasons (an empty season stores its string columns as null).
+
+    Args:
+        root_path (str): Root path for the data (e.g. './data/elo').
+        sport (ESPNSportTypes): Type of sport.
+        seasons (List[int]): Seasons to include (default is None for every stored season).
+        tables (dict): Arrow tables by season used instead of the stored files, e.g. the tables put_dataframe
+            returned earlier in the same process (default is None to read every season from disk).
+
+    Returns:
+        ds.Dataset or None: Dataset over the season files, None if no season is stored.
+    """
+    sources = get_season_paths(root_path, sport, seasons)
+    for season, table in (tables or {}).items():
+        if seasons is None or season in seasons:
+            sources[season] = table
+    if len(sources) == 0:
+        return None
+    sources = [source for season, source in sorted(sources.items())]
+    schema = pa.unify_schemas([pq.read_schema(source) if isinstance(source, str) else source.schema for source in sources], promote_options='permissive')
+    if all(isinstance(source, str) for source in sources):
+        return ds.dataset(sources, schema=schema, format='parquet')
+    return ds.dataset([
+        ds.dataset(source, schema=schema, format='parquet') if isinstance(source, str) else ds.dataset(_conform_table(source, schema))
+        for source in sources
+    ])
+
+
+def read_sport_dataframe(root_path: str, sport: ESPNSportTypes, seasons: List[int] = None, columns: List[str] = None, filter: ds.Expression = None, tables: dict = None) -> pd.DataFrame:
+    """
+    Read the seasons of a sport in a single scan.
+
+    Args:
+        root_path (str): Root path for the data (e.g. './data/elo').
+        sport (ESPNSportTypes): Type of sport.
+        seasons (List[int]): Seasons to include (default is None for every stored season).
+        columns (List[str]): Columns to read (default is None for every column).
+        filter (ds.Expression): Row filter pushed into the scan, e.g. ds.field('is_finished') == 1 (default is None).
+        tables (dict): Arrow tables by season used instead of the stored files (default is None for none).
+
+    Returns:
+        pd.DataFrame: Rows of the seasons in season order with nullable dtypes, empty if no season is stored.
+    """
+    dataset = get_sport_dataset(root_path, sport, seasons, tables)
+    if dataset is None:
+        return pd.DataFrame()
+    if columns is None:
+        columns = [name for name in dataset.schema.names if not name.startswith('__index_level_')]
+    with stage('parquet_read') as timer:
+        table = dataset.to_table(columns=columns, filter=filter)
+        timer.rows = table.num_rows
+        return table.to_pandas(types_mapper=NULLABLE_TYPES.get, ignore_metadata=True)
@@ -0,0 +1,136 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from src.team_registry import TeamRegistry
+
+SWEEP_PARAMETERS = ['k', 'hfa', 'width', 'revert_percentage']
+
+
+def param_grid(k, hfa, width, revert_percentage) -> pd.DataFrame:
+    """
+    Build every combination of the candidate hyperparameters.
+
+    Args:
+        k (list): Candidate K Factors.
+        hfa (list): Candidate home field advantages.
+        width (list): Candidate widths.
+        revert_percentage (list): Candidate regression towards the mean percentages.
+
+    Returns:
+        pd.DataFrame: One row per parameter set.
+    """
+    return pd.DataFrame(list(itertools.product(k, hfa, width, revert_percentage)), columns=SWEEP_PARAMETERS)
+
+
+class EloSweep:
+    """
+    Evaluate many Elo hyperparameter sets in a single chronological pass.
+
+    Rating state is a (teams x parameter sets) array, so each event updates every parameter set at once
+    with the same math as EloGame.update_elo. Only finished events update ratings and count towards the
+    evaluation; scheduled events are skipped.
+
+    Attributes:
+        params (pd.DataFrame): Parameter sets (k, hfa, width, revert_percentage).
+        mean_elo (int): Average rating score of the system.
+        preloaded_elos (dict): Dictionary of preloaded Elo ratings.
+        eval_start_season (int): First season included in the evaluation (earlier seasons only warm up ratings).
+
+    Methods:
+        run(df): Run every parameter set over the events and evaluate them.
+    """
+
+    def __init__(self, params: pd.DataFrame, mean_elo: int = 1505, preloaded_elos=None, eval_start_season: int = None):
+        """
+        Initialize EloSweep.
+
+        Args:
+            params (pd.DataFrame): Parameter sets with k, hfa, width and revert_percentage columns.
+            mean_elo (int): Average rating score.
+            preloaded_elos (dict): Dictionary of preloaded Elo ratings.
+            eval_start_season (int): First season included in the evaluation (default is None for all seasons).
+        """
+        if ((params.revert_percentage > 1) | (params.revert_percentage < 0)).any():
+            raise Exception('Invalid revert percentage')
+        self.params = params[SWEEP_PARAMETERS].reset_index(drop=True)
+        self.mean_elo = mean_elo
+        self.preloaded_elos = preloaded_elos
+        self.eval_start_season = eval_start_season
+
+    def run(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Run every parameter set over the events and evaluate them.
+
+        Args:
+            df (pd.DataFrame): Events with season, date, neutral_site, home_team_id, home_team_score,
+                away_team_id and away_team_score columns.
+
+        Returns:
+            pd.DataFrame: params with brier_score, log_loss and records columns, best brier score first.
+        """
+        df = df.loc[((df.home_team_score.notnull()) & (df.away_team_score.notnull()))]
+        df = df.assign(date=pd.to_datetime(df['date'])).sort_values(['season', 'date'])
+
+        registry = TeamRegistry()
+        home_idx = registry.indices_of(df.home_team_id.values)
+        away_idx = registry.indices_of(df.away_team_id.values)
+
+        k = self.params.k.to_numpy(dtype=np.float64)
+        hfa = self.params.hfa.to_numpy(dtype=np.float64)
+        width = self.params.width.to_numpy(dtype=np.float64)
+        revert = self.params.revert_percentage.to_numpy(dtype=np.float64)
+
+        elos = np.full((len(registry), len(self.params)), self.mean_elo, dtype=np.float64)
+        if self.preloaded_elos is not None:
+            for team, elo in self.preloaded_elos.items():
+                if team in registry:
+                    elos[registry.index_of(team)] = elo
+
+        brier_sum = np.zeros(len(self.params), dtype=np.float64)
+        log_loss_sum = np.zeros(len(self.params), dtype=np.float64)
+        records = 0
+        eps = np.finfo(np.float64).eps
+        eval_start_season = self.eval_start_season if self.eval_start_season is not None else -1
+
+        seasons = df.season.to_numpy(dtype=np.int64)
+        margins = (df.home_team_score.to_numpy(dtype=np.float64) - df.away_team_score.to_numpy(dtype=np.float64)).tolist()
+        neutral_sites = df.neutral_site.to_numpy(dtype=np.int64).tolist()
+        current_season = seasons[0] if len(seasons) > 0 else None
+        for h, a, margin, neutral, season in zip(home_idx.tolist(), away_idx.tolist(), margins, neutral_sites, seasons.tolist()):
+            if season != current_season:
+                elos -= (elos - self.mean_elo) * revert
+                current_season = season
+            elo_diff = elos[h] - elos[a]
+            if neutral != 1:
+                elo_diff += hfa
+            expected_home_shift = 1.0 / (np.power(10.0, -elo_diff / width) + 1.0)
+
+            if margin > 0:
+                true_res = 1
+                denominator = elo_diff * 0.001 + 2.2
+            elif margin < 0:
+                true_res = 0
+                denominator = -elo_diff * 0.001 + 2.2
+            else:
+                true_res = 0.5
+                denominator = 1.0
+
+            if season >= eval_start_season:
+                result = 1.0 if margin > 0 else 0.0
+                brier_sum += (expected_home_shift - result) ** 2
+                clipped = np.clip(expected_home_shift, eps, 1 - eps)
+                log_loss_sum -= np.log(clipped) if result == 1.0 else np.log(1 - clipped)
+                records += 1
+
+            mult = np.log(max(abs(margin), 1) + 1.0) * (2.2 / denominator)
+            shift = (k * mult) * (true_res - expected_home_shift)
+            elos[h] += shift
+            elos[a] -= shift
+
+        evaluation = self.params.copy()
+        evaluation['brier_score'] = brier_sum / records if records > 0 else np.nan
+        evaluation['log_loss'] = log_loss_sum / records if records > 0 else np.nan
+        evaluation['records'] = records
+        return evaluation.sort_values(['brier_score']).reset_index(drop=True)
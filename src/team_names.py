@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+
+
+class TeamNames:
+    """
+    Canonical team name <-> ESPN team id mapping of a sport.
+
+    The canonical name of a team id is the normalized name of its latest event. ESPN sometimes hands out more
+    than one id for the same team, so the canonical id of a name is the id that used the name last; every other
+    id with that name is an alias of it. The mapping is built from the events it is used with and not persisted:
+    a stored mapping would also know teams of events the caller does not rate, and could make one of those the
+    canonical id of a rated team.
+
+    Attributes:
+        names (dict): Canonical name by team id.
+        last_seen (dict): Date of the latest event by team id.
+
+    Methods:
+        update(events_df): Merge the teams of events.
+        canonical_id(team_id): Canonical id of the team.
+        canonical_ids(team_ids): Canonical ids of an array of teams.
+        from_events(events_df): Build the mapping from events.
+    """
+
+    def __init__(self, names: dict = None, last_seen: dict = None):
+        """
+        Initialize TeamNames.
+
+        Args:
+            names (dict): Canonical name by team id (default is None).
+            last_seen (dict): Date of the latest event by team id (default is None).
+        """
+        self.names = dict(names) if names is not None else {}
+        self.last_seen = dict(last_seen) if last_seen is not None else {}
+        self._index()
+
+    def __len__(self):
+        return len(self.names)
+
+    def _index(self):
+        # Latest id per name wins; ties keep the smallest id so the mapping does not depend on insertion order
+        self._ids = {}
+        for team_id in sorted(self.names, key=lambda team_id: (self.last_seen[team_id], -team_id)):
+            self._ids[self.names[team_id]] = team_id
+
+    def update(self, events_df: pd.DataFrame):
+        """
+        Merge the teams of events (home_ and away_ team_id and team_name columns with datetime).
+
+        Args:
+            events_df (pd.DataFrame): Events with normalized team names.
+        """
+        events_df = events_df.loc[events_df.datetime.notnull()]
+        team_ids = np.concatenate([events_df.home_team_id.to_numpy(dtype=np.int64), events_df.away_team_id.to_numpy(dtype=np.int64)])
+        team_names = np.concatenate([events_df.home_team_name.to_numpy(dtype=object), events_df.away_team_name.to_numpy(dtype=object)])
+        datetimes = pd.to_datetime(pd.concat([events_df.datetime, events_df.datetime], ignore_index=True), utc=True)
+        latest_df = pd.DataFrame({'team_id': team_ids, 'team_name': team_names, 'last_seen': datetimes})
+        latest_df = latest_df.loc[latest_df.team_name.notnull()].sort_values('last_seen', kind='stable').drop_duplicates('team_id', keep='last')
+        for team_id, team_name, last_seen in zip(latest_df.team_id.tolist(), latest_df.team_name.tolist(), latest_df.last_seen.tolist()):
+            if team_id not in self.last_seen or last_seen >= self.last_seen[team_id]:
+                self.names[team_id] = team_name
+                self.last_seen[team_id] = last_seen
+        self._index()
+
+    def canonical_id(self, team_id: int) -> int:
+        """
+        Canonical id of a team (the team id itself if unknown).
+
+        Args:
+            team_id (int): ESPN team id.
+
+        Returns:
+            int: Canonical team id.
+        """
+        name = self.names.get(team_id)
+        return team_id if name is None else self._ids[name]
+
+    def canonical_ids(self, team_ids) -> np.ndarray:
+        """
+        Canonical ids of an array of teams.
+
+        Args:
+            team_ids: Array like of ESPN team ids.
+
+        Returns:
+            np.ndarray: Canonical team ids aligned with team_ids.
+        """
+        codes, uniques = pd.factorize(np.asarray(team_ids, dtype=np.int64))
+        return np.array([self.canonical_id(int(team_id)) for team_id in uniques], dtype=np.int64)[codes]
+
+    @classmethod
+    def from_events(cls, events_df: pd.DataFrame):
+        """
+        Build the mapping from events.
+
+        Args:
+            events_df (pd.DataFrame): Events with normalized team names.
+
+        Returns:
+            TeamNames: Mapping of the teams of the events.
+        """
+        team_names = cls()
+        team_names.update(events_df)
+        return team_names
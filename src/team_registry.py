@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+from src.consts import ESPNSportTypes
+from src.utils import get_dataframe, put_dataframe
+
+TEAM_REGISTRY_SCHEMA = {
+    'team_id': np.int64,
+    'team_idx': np.int32,
+}
+
+
+class TeamRegistry:
+    """
+    Maps team keys (ESPN team ids) to stable dense integer indices.
+
+    Indices are handed out in first seen order and never change, so a rating state stored as a contiguous
+    float array stays valid across runs once the registry is persisted.
+
+    Attributes:
+        team_ids (list): Team keys ordered by their index.
+
+    Methods:
+        index_of(team_id): Get (or assign) the index of a single team.
+        indices_of(team_ids): Get (or assign) the indices of an array of teams.
+        load(root_path, sport): Load the registry for a sport.
+        save(root_path, sport): Persist the registry for a sport.
+    """
+
+    def __init__(self, team_ids=None):
+        """
+        Initialize TeamRegistry.
+
+        Args:
+            team_ids (list): Team keys in index order (default is None).
+        """
+        self.team_ids = []
+        self._index = {}
+        if team_ids is not None:
+            for team_id in team_ids:
+                self.index_of(team_id)
+
+    def __len__(self):
+        return len(self.team_ids)
+
+    def __contains__(self, team_id):
+        return team_id in self._index
+
+    def index_of(self, team_id) -> int:
+        """
+        Get the index of a team, registering the team if it has not been seen before.
+
+        Args:
+            team_id: Team key.
+
+        Returns:
+            int: Dense index of the team.
+        """
+        idx = self._index.get(team_id)
+        if idx is None:
+            idx = len(self.team_ids)
+            self._index[team_id] = idx
+            self.team_ids.append(team_id)
+        return idx
+
+    def indices_of(self, team_ids) -> np.ndarray:
+        """
+        Get the indices of an array of teams, registering any team that has not been seen before.
+
+        Args:
+            team_ids: Array like of team keys.
+
+        Returns:
+            np.ndarray: Dense indices aligned with team_ids.
+        """
+        codes, uniques = pd.factorize(np.asarray(team_ids, dtype=object))
+        unique_indices = np.array([self.index_of(team_id) for team_id in uniques], dtype=np.int64)
+        return unique_indices[codes]
+
+    @staticmethod
+    def _path(root_path: str, sport: ESPNSportTypes) -> str:
+        return f'{root_path}/{sport.value}/teams.parquet'
+
+    @classmethod
+    def load(cls, root_path: str, sport: ESPNSportTypes):
+        """
+        Load the registry for a sport. A missing registry loads as an empty one.
+
+        Args:
+            root_path (str): Root path for registry data.
+            sport (ESPNSportTypes): Type of sport.
+
+        Returns:
+            TeamRegistry: Loaded registry.
+        """
+        df = get_dataframe(cls._path(root_path, sport))
+        if df.shape[0] == 0:
+            return cls()
+        df = df.sort_values('team_idx')
+        return cls([int(team_id) for team_id in df.team_id.values])
+
+    def save(self, root_path: str, sport: ESPNSportTypes):
+        """
+        Persist the registry for a sport.
+
+        Args:
+            root_path (str): Root path for registry data.
+            sport (ESPNSportTypes): Type of sport.
+        """
+        df = pd.DataFrame({
+            'team_id': self.team_ids,
+            'team_idx': list(range(len(self.team_ids))),
+        })
+        put_dataframe(df, self._path(root_path, sport), TEAM_REGISTRY_SCHEMA)
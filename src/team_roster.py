@@ -0,0 +1,199 @@
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from src.consts import ESPNSportTypes
+from src.response_cache import season_ttl
+from src.utils import find_year_for_season
+
+
+class SeasonRoster:
+    """
+    Valid ESPN team ids of a season, kept as a sorted array so membership checks are a binary search.
+
+    Attributes:
+        season (int): Season year.
+        team_ids (np.ndarray): Team ids, ascending.
+        added (np.ndarray): Team ids added since the previously stored roster (empty unless just refreshed).
+        removed (np.ndarray): Team ids removed since the previously stored roster (empty unless just refreshed).
+
+    Methods:
+        contains(team_ids): Whether each team id is on the roster.
+        diff(previous): Team ids added and removed relative to another roster.
+    """
+
+    def __init__(self, season: int, team_ids, added=None, removed=None):
+        """
+        Initialize SeasonRoster.
+
+        Args:
+            season (int): Season year.
+            team_ids: Array like of team ids (any order, duplicates are dropped).
+            added: Team ids added since the previously stored roster (default is None for none).
+            removed: Team ids removed since the previously stored roster (default is None for none).
+        """
+        self.season = season
+        self.team_ids = np.unique(np.asarray(team_ids, dtype=np.int64))
+        self.added = np.asarray(added if added is not None else [], dtype=np.int64)
+        self.removed = np.asarray(removed if removed is not None else [], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.team_ids)
+
+    def __contains__(self, team_id):
+        i = np.searchsorted(self.team_ids, team_id)
+        return bool(i < len(self.team_ids) and self.team_ids[i] == team_id)
+
+    def contains(self, team_ids) -> np.ndarray:
+        """
+        Whether each team id is on the roster.
+
+        Args:
+            team_ids: Array like of team ids.
+
+        Returns:
+            np.ndarray: Boolean mask aligned with team_ids.
+        """
+        team_ids = np.asarray(team_ids, dtype=np.int64)
+        if len(self.team_ids) == 0:
+            return np.zeros(len(team_ids), dtype=bool)
+        positions = np.minimum(np.searchsorted(self.team_ids, team_ids), len(self.team_ids) - 1)
+        return self.team_ids[positions] == team_ids
+
+    def diff(self, previous):
+        """
+        Team ids added and removed relative to another roster.
+
+        Args:
+            previous (SeasonRoster): Roster to compare against.
+
+        Returns:
+            tuple: (added, removed) sorted team id arrays.
+        """
+        return np.setdiff1d(self.team_ids, previous.team_ids), np.setdiff1d(previous.team_ids, self.team_ids)
+
+
+class SeasonRosterRegistry:
+    """
+    Resolves and memoizes the valid team ids (roster) per sport and season.
+
+    Rosters are looked up in process first, then on disk, and only then retrieved from ESPN. Settled past
+    seasons (see season_ttl) never change and are kept forever; the current season, and a past season until it
+    settled, is refetched once it is older than the current teams TTL of the response cache. A refetched roster
+    is compared with the stored one and the teams it gained or lost are logged and exposed on the returned roster.
+    It is only stored once the caller commits it after acting on those changes, so a run that fails before that
+    sees the same changes again on the next run.
+
+    Attributes:
+        root_path (str): Root path for the on-disk rosters (one JSON file per sport).
+
+    Methods:
+        get(sport, season, espn_api): Get the roster of a season.
+        commit(sport, season): Store the refetched roster of a season.
+    """
+
+    def __init__(self, root_path: str = './data/rosters'):
+        """
+        Initialize SeasonRosterRegistry.
+
+        Args:
+            root_path (str): Root path for the on-disk rosters (default is './data/rosters').
+        """
+        self.root_path = root_path
+        self._rosters = {}
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Locks cannot be pickled, worker processes get their own lock (and keep the memoized rosters)
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _path(self, sport: ESPNSportTypes) -> str:
+        return f'{self.root_path}/{sport.value}.json'
+
+    def _load(self, sport: ESPNSportTypes) -> dict:
+        path = self._path(sport)
+        if not os.path.exists(path):
+            return {}
+        with open(path, 'r') as json_file:
+            return {int(season): entry for season, entry in json.load(json_file).items()}
+
+    def _save(self, sport: ESPNSportTypes, rosters: dict):
+        path = self._path(sport)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, 'w') as json_file:
+            json.dump({str(season): entry for season, entry in sorted(rosters.items())}, json_file)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _is_fresh(entry: dict, sport: ESPNSportTypes, season: int, current_season: int) -> bool:
+        return time.time() - entry['fetched_at'] <= season_ttl(sport, season, current_season, 'current_teams')
+
+    @staticmethod
+    def _fetch(sport: ESPNSportTypes, season: int, current_season: int, espn_api) -> dict:
+        team_ids = []
+        core_sport = sport.value.split('/')[0] + '/leagues/' + sport.value.split('/')[1]
+        url = f'http://sports.core.api.espn.com/v2/sports/{core_sport}/seasons/{season}/teams'
+        res = espn_api.api_request(url + '?limit=750', cache_ttl=season_ttl(sport, season, current_season, 'current_teams'))
+        for item in res['items']:
+            team_ids.append(int(item['$ref'].replace(url + '/', '').split('?')[0]))
+        return {'team_ids': sorted(set(team_ids)), 'fetched_at': time.time()}
+
+    def get(self, sport: ESPNSportTypes, season: int, espn_api) -> SeasonRoster:
+        """
+        Get the roster of a season.
+
+        Args:
+            sport (ESPNSportTypes): Type of sport.
+            season (int): Season year.
+            espn_api (ESPNBaseAPI): API the roster is retrieved with when it is missing or stale.
+
+        Returns:
+            SeasonRoster: Roster of the season, with the teams added and removed if it was just refetched.
+        """
+        current_season = find_year_for_season(sport)
+        with self._lock:
+            roster, fetched_at = self._rosters.get((sport, season), (None, None))
+            if roster is not None and self._is_fresh({'fetched_at': fetched_at}, sport, season, current_season):
+                return roster
+            rosters = self._load(sport)
+            entry = rosters.get(season)
+            if entry is not None and self._is_fresh(entry, sport, season, current_season):
+                roster = SeasonRoster(season, entry['team_ids'])
+            else:
+                fetched = self._fetch(sport, season, current_season, espn_api)
+                roster = SeasonRoster(season, fetched['team_ids'])
+                if entry is not None:
+                    roster.added, roster.removed = roster.diff(SeasonRoster(season, entry['team_ids']))
+                    if len(roster.added) > 0 or len(roster.removed) > 0:
+                        print(f'    Roster change for {sport.value} - {season}: added {roster.added.tolist()}, removed {roster.removed.tolist()}')
+                self._pending[(sport, season)] = entry = fetched
+            self._rosters[(sport, season)] = (roster, entry['fetched_at'])
+            return roster
+
+    def commit(self, sport: ESPNSportTypes, season: int):
+        """
+        Store the refetched roster of a season, once the changes exposed on it have been acted on. Does nothing
+        if the roster was not refetched.
+
+        Args:
+            sport (ESPNSportTypes): Type of sport.
+            season (int): Season year.
+        """
+        with self._lock:
+            fetched = self._pending.pop((sport, season), None)
+            if fetched is None:
+                return
+            rosters = self._load(sport)
+            rosters[season] = fetched
+            self._save(sport, rosters)
@@ -0,0 +1,160 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+
+import requests
+
+TRANSPORT_MODES = ['live', 'record', 'replay']
+
+
+class FixtureNotFoundError(Exception):
+    """
+    Raised in replay mode when no fixture was recorded for a URL.
+    """
+
+
+class FixtureResponse:
+    """
+    Minimal stand in for requests.Response served from a fixture.
+
+    Attributes:
+        url (str): Request URL.
+        status_code (int): Recorded HTTP status code.
+        text (str): Recorded response body.
+    """
+
+    def __init__(self, url: str, status_code: int, text: str):
+        self.url = url
+        self.status_code = status_code
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+class HTTPTransport:
+    """
+    Live transport sending requests through a pooled keep-alive session.
+
+    Attributes:
+        session (requests.Session): Session used for every request.
+        timeout (float): Request timeout in seconds.
+        use_response_cache (bool): True since live requests can be served from the response cache.
+    """
+    use_response_cache = True
+
+    def __init__(self, session: requests.Session, timeout: float = 30.0):
+        self.session = session
+        self.timeout = timeout
+
+    def get(self, url: str):
+        return self.session.get(url=url, timeout=self.timeout)
+
+
+class FixtureStore:
+    """
+    Gzip compressed responses keyed by URL, one file per URL.
+
+    Attributes:
+        root_path (str): Root path for fixtures.
+    """
+
+    def __init__(self, root_path: str):
+        self.root_path = root_path
+
+    def _path(self, url: str) -> str:
+        key = hashlib.sha1(url.encode('utf-8')).hexdigest()
+        return f'{self.root_path}/{key[:2]}/{key}.json.gz'
+
+    def read(self, url: str) -> FixtureResponse:
+        path = self._path(url)
+        if not os.path.exists(path):
+            raise FixtureNotFoundError(f'No fixture recorded for {url}')
+        with gzip.open(path, 'rt', encoding='utf-8') as fixture_file:
+            fixture = json.load(fixture_file)
+        return FixtureResponse(fixture['url'], fixture['status_code'], fixture['text'])
+
+    def write(self, url: str, status_code: int, text: str):
+        path = self._path(url)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with gzip.open(tmp_path, 'wt', encoding='utf-8') as fixture_file:
+            json.dump({'url': url, 'status_code': status_code, 'text': text}, fixture_file)
+        os.replace(tmp_path, path)
+
+
+class RecordingTransport:
+    """
+    Live transport that also writes every response to a fixture store.
+
+    Attributes:
+        transport (HTTPTransport): Transport the requests are sent through.
+        store (FixtureStore): Store the responses are written to.
+        use_response_cache (bool): False so every request of the run reaches the fixture store.
+    """
+    use_response_cache = False
+
+    def __init__(self, transport: HTTPTransport, store: FixtureStore):
+        self.transport = transport
+        self.store = store
+
+    def get(self, url: str):
+        resp = self.transport.get(url)
+        self.store.write(url, resp.status_code, resp.text)
+        return resp
+
+
+class ReplayTransport:
+    """
+    Offline transport serving recorded fixtures, optionally with a simulated network latency.
+
+    Attributes:
+        store (FixtureStore): Store the responses are read from.
+        latency (float): Seconds slept before every response.
+        use_response_cache (bool): False so replayed runs exercise the same requests as the recorded run.
+    """
+    use_response_cache = False
+
+    def __init__(self, store: FixtureStore, latency: float = 0.0):
+        self.store = store
+        self.latency = latency
+
+    def get(self, url: str):
+        if self.latency > 0:
+            time.sleep(self.latency)
+        return self.store.read(url)
+
+
+def create_transport(session: requests.Session, timeout: float = 30.0, mode: str = None, fixture_path: str = None, latency: float = None):
+    """
+    Create the transport used by ESPNBaseAPI. Unset arguments are read from the environment, so every runner
+    can be switched to record or replay without code changes:
+
+        ESPN_TRANSPORT_MODE: live (default), record or replay.
+        ESPN_FIXTURE_PATH: Root path of the fixture store (default is './fixtures/espn').
+        ESPN_REPLAY_LATENCY: Seconds of simulated latency per replayed response (default is 0).
+
+    Args:
+        session (requests.Session): Session used by live and record transports.
+        timeout (float): Request timeout in seconds.
+        mode (str): Transport mode (default is None to read ESPN_TRANSPORT_MODE).
+        fixture_path (str): Root path of the fixture store (default is None to read ESPN_FIXTURE_PATH).
+        latency (float): Simulated replay latency in seconds (default is None to read ESPN_REPLAY_LATENCY).
+
+    Returns:
+        HTTPTransport, RecordingTransport or ReplayTransport: Transport for the mode.
+    """
+    mode = mode if mode is not None else os.environ.get('ESPN_TRANSPORT_MODE', 'live')
+    fixture_path = fixture_path if fixture_path is not None else os.environ.get('ESPN_FIXTURE_PATH', './fixtures/espn')
+    latency = latency if latency is not None else float(os.environ.get('ESPN_REPLAY_LATENCY', 0))
+    if mode not in TRANSPORT_MODES:
+        raise ValueError(f'"{mode}" transport mode cannot be found!')
+    if mode == 'replay':
+        return ReplayTransport(FixtureStore(fixture_path), latency)
+    transport = HTTPTransport(session, timeout)
+    if mode == 'record':
+        return RecordingTransport(transport, FixtureStore(fixture_path))
+    return transport
@@ -1,10 +1,33 @@
+import functools
 import re
+import time
 import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
 from src.consts import ESPNSportTypes, SEASON_START_MONTH, START_SEASONS
+from src.profiling import collect, cprofile, peak_rss_mb, profile_summary, stage, write_profile
 import datetime
 import os
 from typing import List
+import numpy as np
 import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Arrow to pandas nullable dtypes (what pd.read_parquet(dtype_backend='numpy_nullable') maps to)
+NULLABLE_TYPES = {
+    pa.int8(): pd.Int8Dtype(),
+    pa.int16(): pd.Int16Dtype(),
+    pa.int32(): pd.Int32Dtype(),
+    pa.int64(): pd.Int64Dtype(),
+    pa.uint8(): pd.UInt8Dtype(),
+    pa.uint16(): pd.UInt16Dtype(),
+    pa.uint32(): pd.UInt32Dtype(),
+    pa.uint64(): pd.UInt64Dtype(),
+    pa.bool_(): pd.BooleanDtype(),
+    pa.float32(): pd.Float32Dtype(),
+    pa.float64(): pd.Float64Dtype(),
+    pa.string(): pd.StringDtype(),
+    pa.large_string(): pd.StringDtype(),
+}
 
 
 def known_missed_date(sport, date):
@@ -51,76 +74,186 @@ def get_seasons_to_update(root_path, sport):
     return list(range(fs_season, current_season + 1))
 
 
+# Team name normalization patterns, compiled once
+CAMEL_CASE_PATTERN = re.compile(r'(?<=[a-z])(?=[A-Z])')
+NON_ALPHANUMERIC_PATTERN = re.compile("[^A-Za-z0-9 ]+")
+BRACES_PATTERN = re.compile("[\(\[].*?[\)\]]")
+# Distinct raw team names kept in the name_filter cache (a few thousand exist across every sport)
+NAME_FILTER_CACHE_SIZE = 16384
+
+
 def clean_string(s):
     if isinstance(s, str):
-        return re.sub("[^A-Za-z0-9 ]+", '', s)
+        return NON_ALPHANUMERIC_PATTERN.sub('', s)
     else:
         return s
 
 
 def re_braces(s):
     if isinstance(s, str):
-        return re.sub("[\(\[].*?[\)\]]", "", s)
+        return BRACES_PATTERN.sub("", s)
     else:
         return s
 
 
+@functools.lru_cache(maxsize=NAME_FILTER_CACHE_SIZE)
+def _normalize_name(s: str) -> str:
+    # Adds space to words that
+    s = CAMEL_CASE_PATTERN.sub(' ', s)
+    if 'Mary' not in s and ' State' not in s:
+        s = s.replace(' St', ' State')
+    if 'University' not in s:
+        s = s.replace('Univ', 'University')
+    if 'zz' in s or 'zzz' in s or 'zzzz' in s:
+        s = s.replace('zzzz', '').replace('zzz', '').replace('zz', '')
+    s = clean_string(s)
+    s = re_braces(s)
+    s = str(s)
+    s = s.replace(' ', '').lower()
+    return s
+
+
 def name_filter(s):
+    """
+    Normalize a team name (split camel case, expand St and Univ, drop non alphanumeric characters, braces and
+    spaces, lower case). Results are memoized in a bounded LRU cache since the same few thousand names repeat
+    across every event.
+
+    Args:
+        s: Team name (returned unchanged if not a string).
+
+    Returns:
+        str: Normalized team name.
+    """
     if isinstance(s, str):
-        # Adds space to words that
-        s = re.sub(r'(?<=[a-z])(?=[A-Z])', ' ', s)
-        if 'Mary' not in s and ' State' not in s:
-            s = s.replace(' St', ' State')
-        if 'University' not in s:
-            s = s.replace('Univ', 'University')
-        if 'zz' in s or 'zzz' in s or 'zzzz' in s:
-            s = s.replace('zzzz', '').replace('zzz', '').replace('zz', '')
-        s = clean_string(s)
-        s = re_braces(s)
-        s = str(s)
-        s = s.replace(' ', '').lower()
-        return s
+        return _normalize_name(s)
     else:
         return s
 
 
-def get_dataframe(path: str, columns: List = None):
+def to_arrow_schema(schema: dict) -> pa.Schema:
+    """
+    Declare an Arrow schema from a schema dictionary. numpy dtypes declare non-nullable fields and pandas
+    nullable dtypes ('Int32', ...) declare nullable fields.
+
+    Args:
+        schema (dict): Schema dictionary.
+
+    Returns:
+        pa.Schema: Declared Arrow schema.
+    """
+    fields = []
+    for column, dtype in schema.items():
+        if isinstance(dtype, str):
+            fields.append(pa.field(column, pa.from_numpy_dtype(pd.api.types.pandas_dtype(dtype).numpy_dtype), nullable=True))
+        else:
+            fields.append(pa.field(column, pa.from_numpy_dtype(np.dtype(dtype)), nullable=False))
+    return pa.schema(fields)
+
+
+def to_arrow_table(df: pd.DataFrame, schema) -> pa.Table:
+    """
+    Build an Arrow table straight from the columns of a DataFrame, casting the declared columns once and
+    inferring the rest. The DataFrame is not modified and its index is not stored.
+
+    Args:
+        df (pd.DataFrame): DataFrame to convert.
+        schema (dict or pa.Schema): Declared schema (dictionary or Arrow schema from to_arrow_schema).
+
+    Returns:
+        pa.Table: Table with the columns of df in order.
+
+    Raises:
+        Exception: If a declared column is missing or a non-nullable column holds missing values.
+    """
+    if isinstance(schema, dict):
+        schema = to_arrow_schema(schema)
+    arrays = []
+    fields = []
+    for column in schema.names:
+        if column not in df.columns:
+            raise Exception(f"Column '{column}' of the schema is missing from the DataFrame")
+    for column in df.columns:
+        index = schema.get_field_index(column)
+        if index == -1:
+            array = pa.array(df[column], from_pandas=True)
+            fields.append(pa.field(column, array.type))
+        else:
+            field = schema.field(index)
+            array = pa.array(df[column], from_pandas=True)
+            if array.type != field.type:
+                array = array.cast(field.type)
+            if not field.nullable and array.null_count > 0:
+                raise Exception(f"Column '{column}' has {array.null_count} missing values but is not nullable")
+            fields.append(field)
+        arrays.append(array)
+    return pa.Table.from_arrays(arrays, schema=pa.schema(fields))
+
+
+def get_dataframe(path: str, columns: List = None, as_arrow: bool = False, memory_map: bool = False):
     """
     Read a DataFrame from a parquet file.
 
     Args:
         path (str): Path to the parquet file.
         columns (List): List of columns to select (default is None).
+        as_arrow (bool): Return the Arrow table instead of a DataFrame (default is False).
+        memory_map (bool): Memory map the file instead of reading it into a buffer (default is False).
 
     Returns:
-        pd.DataFrame: Read DataFrame.
+        pd.DataFrame or pa.Table: Read data with nullable dtypes. An empty DataFrame (or None with as_arrow)
+            if the file does not exist.
     """
-    try:
-        return pd.read_parquet(path, dtype_backend='numpy_nullable', columns=columns)
-    except Exception as e:
-        print(e)
-        return pd.DataFrame()
+    if not os.path.exists(path):
+        return None if as_arrow else pd.DataFrame()
+    with stage('parquet_read') as timer:
+        table = pq.read_table(path, columns=columns, memory_map=memory_map)
+        timer.rows = table.num_rows
+        if as_arrow:
+            return table
+        return table_to_dataframe(table)
+
+
+def table_to_dataframe(table: pa.Table) -> pd.DataFrame:
+    """
+    Convert an Arrow table (read from parquet or kept in memory from put_dataframe) to a DataFrame.
+
+    Args:
+        table (pa.Table): Table to convert.
+
+    Returns:
+        pd.DataFrame: Data with nullable dtypes, the same as get_dataframe returns for the written file.
+    """
+    return table.to_pandas(types_mapper=NULLABLE_TYPES.get)
 
 
-def put_dataframe(df: pd.DataFrame, path: str, schema: dict):
+def put_dataframe(df: pd.DataFrame, path: str, schema):
     """
-    Write a DataFrame to a parquet file.
+    Write a DataFrame to a parquet file. The file is written to a temporary file and renamed into place, so
+    readers never see a partially written file.
 
     Args:
         df (pd.DataFrame): DataFrame to write.
         path (str): Path to the parquet file.
-        schema (dict): Schema dictionary.
+        schema (dict or pa.Schema): Declared schema (dictionary or Arrow schema from to_arrow_schema).
 
     Returns:
-        None
+        pa.Table: Written table, so the data can be handed on in memory (see table_to_dataframe).
     """
     key, file_name = path.rsplit('/', 1)
     if file_name.split('.')[1] != 'parquet':
         raise Exception("Invalid Filetype for Storage (Supported: 'parquet')")
     os.makedirs(key, exist_ok=True)
-    for column, dtype in schema.items():
-        df[column] = df[column].astype(dtype)
-    df.to_parquet(f"{key}/{file_name}", schema=pa.Schema.from_pandas(df))
+    tmp_path = f'{key}/.{file_name}.{os.getpid()}.tmp'
+    with stage('parquet_write', rows=df.shape[0]):
+        table = to_arrow_table(df, schema)
+        try:
+            pq.write_table(table, tmp_path)
+            os.replace(tmp_path, f'{key}/{file_name}')
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    return table
 
 
 def create_dataframe(obj, schema: dict):
@@ -213,3 +346,128 @@ def find_year_for_season(league: ESPNSportTypes, date: datetime.datetime = None)
         return today.year - 1
     else:
         return today.year
+
+
+def run_sport_job(job, sport: ESPNSportTypes, kwargs: dict, profile_path: str = None, cprofile_path: str = None) -> dict:
+    """
+    Run a per sport job and capture its status for the pump status report. Cache, stage and network counters
+    only count the job's own work, also when other jobs run in threads of the same process; peak RSS is the
+    peak of the whole process.
+
+    Args:
+        job (callable): Module level function taking a sport keyword argument.
+        sport (ESPNSportTypes): Type of sport.
+        kwargs (dict): Keyword arguments passed to the job.
+        profile_path (str): Directory the JSON run profile of the sport is written to (default is None for none).
+        cprofile_path (str): Directory the cProfile stats of the sport are written to (default is None to not
+            profile).
+
+    Returns:
+        dict: Status report with status, execution_time, end_datetime, cache_hits, cache_misses and profile (stage
+            timings, network counters and peak RSS), plus the skipped and processed counts if the job returns them.
+    """
+    start = time.time()
+    counts = {}
+    with collect() as counters:
+        try:
+            with cprofile(f'{cprofile_path}/{sport.value}.prof' if cprofile_path is not None else None):
+                res = job(sport=sport, **kwargs)
+            if isinstance(res, dict):
+                counts = {key: res[key] for key in ['skipped', 'processed'] if key in res}
+            status = True
+        except Exception as e:
+            print(f'FAILURE ({sport.value})')
+            print(e)
+            status = False
+    profile = profile_summary(counters)
+    profile['peak_rss_mb'] = peak_rss_mb()
+    status_report = {
+        'status': status,
+        'execution_time': round(time.time() - start, 2),
+        'end_datetime': datetime.datetime.utcnow(),
+        'cache_hits': counters['cache']['hits'],
+        'cache_misses': counters['cache']['misses'],
+        'profile': profile,
+        **counts,
+    }
+    if profile_path is not None:
+        write_profile(f'{profile_path}/{sport.value}.json', {'sport': sport.value, 'job': job.__name__, **status_report})
+    return status_report
+
+
+def run_sport_jobs(job, sports: List[ESPNSportTypes], workers: int = 1, profile_path: str = None, cprofile_path: str = None, **kwargs) -> dict:
+    """
+    Run a per sport job for every sport, fanning out across a process pool when workers > 1. A sport listed more
+    than once runs once, so two workers never write the same sport's files at the same time.
+
+    Args:
+        job (callable): Module level function taking a sport keyword argument.
+        sports (List[ESPNSportTypes]): Sports to run (duplicates are dropped).
+        workers (int): Number of worker processes (default is 1 to run in process, one sport at a time).
+        profile_path (str): Directory the JSON run profile of every sport is written to (default is None for none).
+        cprofile_path (str): Directory the cProfile stats of every sport are written to (default is None to not
+            profile).
+        **kwargs: Keyword arguments passed to the job.
+
+    Returns:
+        dict: Status reports keyed by sport, in the order of sports.
+    """
+    sports = list(dict.fromkeys(sports))
+    if workers <= 1 or len(sports) <= 1:
+        return {sport: run_sport_job(job, sport, kwargs, profile_path, cprofile_path) for sport in sports}
+    with ProcessPoolExecutor(max_workers=min(workers, len(sports))) as executor:
+        futures = {sport: executor.submit(run_sport_job, job, sport, kwargs, profile_path, cprofile_path) for sport in sports}
+        return {sport: future.result() for sport, future in futures.items()}
+
+
+def print_status_report(title: str, status_reports: dict, wall_time: float):
+    """
+    Print the pump status report for a runner.
+
+    Args:
+        title (str): Report title.
+        status_reports (dict): Status reports keyed by sport.
+        wall_time (float): Wall clock time of the whole pump in seconds.
+
+    Returns:
+        None
+    """
+    print('')
+    print(title)
+    print('-' * 110)
+    duration = 0
+    cache_hits = 0
+    cache_misses = 0
+    skipped = 0
+    processed = 0
+    network = {'requests': 0, 'bytes': 0, 'seconds': 0.0}
+    stages = {}
+    peak_rss = None
+    for key, report in status_reports.items():
+        duration = duration + report['execution_time']
+        cache_hits = cache_hits + report.get('cache_hits', 0)
+        cache_misses = cache_misses + report.get('cache_misses', 0)
+        skipped = skipped + report.get('skipped', 0)
+        processed = processed + report.get('processed', 0)
+        if 'profile' in report:
+            for counter in network:
+                network[counter] = network[counter] + report['profile']['network'][counter]
+            for name, counters in report['profile']['stages'].items():
+                stages[name] = stages.get(name, 0) + counters['seconds']
+            if report['profile']['peak_rss_mb'] is not None:
+                peak_rss = max(peak_rss or 0, report['profile']['peak_rss_mb'])
+        skip_note = f"skipped {report['skipped']} unchanged of {report['skipped'] + report['processed']}, " if 'skipped' in report else ''
+        print(f"    {key}: {'PASSED' if report['status'] else 'FAILED'} -- {skip_note}took {report['execution_time']} sec, finished at ({report['end_datetime']}) ")
+    print('')
+    print(f'Pump took {round(wall_time, 2)} sec (sum of sports {round(duration, 2)} sec)')
+    if skipped + processed > 0:
+        print(f'Skipped {skipped} of {skipped + processed} units with unchanged inputs')
+    if cache_hits + cache_misses > 0:
+        print(f'Response cache: {cache_hits} hits, {cache_misses} misses')
+    if network['requests'] > 0:
+        print(f"Network: {network['requests']} requests, {round(network['bytes'] / 1024 / 1024, 2)} MB in {round(network['seconds'], 2)} sec")
+    if len(stages) > 0:
+        print('Slowest stages: ' + ', '.join(f'{name} {round(seconds, 2)} sec' for name, seconds in sorted(stages.items(), key=lambda item: -item[1])[:5]))
+    if peak_rss is not None:
+        print(f'Peak RSS: {peak_rss} MB')
+    print('-' * 110)
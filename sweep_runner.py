@@ -0,0 +1,104 @@
+import argparse
+import time
+import pandas as pd
+import numpy as np
+from src.consts import ESPNSportTypes, ELO_HYPERPARAMETERS, START_SEASONS
+from src.sweep import EloSweep, param_grid, SWEEP_PARAMETERS
+from src.storage import read_sport_dataframe
+from src.utils import put_dataframe, find_year_for_season, run_sport_jobs, print_status_report
+
+SWEEP_SCHEMA = {
+    'k': np.float64,
+    'hfa': np.float64,
+    'width': np.float64,
+    'revert_percentage': np.float64,
+    'brier_score': np.float64,
+    'log_loss': np.float64,
+    'records': np.int32,
+}
+
+
+def get_default_param_grid(sport: ESPNSportTypes) -> pd.DataFrame:
+    """
+    Get a grid of candidate hyperparameters centered on the current settings for a sport.
+
+    Args:
+        sport (ESPNSportTypes): Type of sport.
+
+    Returns:
+        pd.DataFrame: One row per parameter set.
+    """
+    k = ELO_HYPERPARAMETERS[sport]['k']
+    hfa = ELO_HYPERPARAMETERS[sport]['hfa']
+    return param_grid(
+        k=[k * mult for mult in [0.5, 0.75, 1, 1.25, 1.5, 2]],
+        hfa=[hfa * mult for mult in [0, 0.5, 0.75, 1, 1.25, 1.5]],
+        width=[400, 600, 800],
+        revert_percentage=[0.25, 1.0 / 3, 0.5],
+    )
+
+
+def run_sweep_for_sport(event_root_path: str, sweep_root_path: str, sport: ESPNSportTypes, params: pd.DataFrame = None):
+    """
+    Evaluate a grid of Elo hyperparameters over the full history of a sport.
+
+    Args:
+        event_root_path (str): Root path for event data.
+        sweep_root_path (str): Root path for sweep results.
+        sport (ESPNSportTypes): Type of sport.
+        params (pd.DataFrame): Parameter sets to evaluate (default is get_default_param_grid).
+
+    Returns:
+        pd.DataFrame: Evaluated parameter sets, best brier score first.
+    """
+    if params is None:
+        params = get_default_param_grid(sport)
+    seasons = list(range(START_SEASONS[sport], find_year_for_season(sport) + 1))
+    print(f'Starting Sweep for {sport.value} ({seasons[0]}-{seasons[-1]}) over {params.shape[0]} parameter sets...')
+    df = read_sport_dataframe(event_root_path, sport, seasons, columns=['season', 'date', 'neutral_site', 'home_team_id', 'home_team_score', 'away_team_id', 'away_team_score'])
+
+    # Skip the first two seasons of the evaluation while ratings warm up (same as the system evaluation report)
+    shift = 2 if len(seasons) > 5 else 0
+    sweep = EloSweep(
+        params,
+        mean_elo=1505,
+        preloaded_elos=ELO_HYPERPARAMETERS[sport]['preloaded_elos'],
+        eval_start_season=START_SEASONS[sport] + shift
+    )
+    evaluation = sweep.run(df)
+    put_dataframe(evaluation, f'{sweep_root_path}/{sport.value}.parquet', SWEEP_SCHEMA)
+    print(evaluation.head(5)[SWEEP_PARAMETERS + ['brier_score', 'log_loss']].to_string(index=False))
+    return evaluation
+
+
+def main(workers: int = 1):
+    """
+    Main function to run hyperparameter sweeps for specified sports.
+
+    Args:
+        workers (int): Number of sports to run in parallel worker processes (default is 1).
+
+    Returns:
+        None
+    """
+    sports = [sport for sport in ESPNSportTypes if sport != ESPNSportTypes.SOCCER_EPL]
+    start = time.time()
+    status_reports = run_sport_jobs(run_sweep_for_sport, sports, workers=workers, event_root_path='./data/events', sweep_root_path='./data/sweeps')
+    print_status_report('Sweep Pump Status Report', status_reports, time.time() - start)
+
+
+def parse_args():
+    """
+    Parse command line arguments.
+
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=1, help='Number of sports to run in parallel worker processes')
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    main(workers=args.workers)